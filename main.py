@@ -4,10 +4,23 @@ Lancé par le Bot de Correction avec : python main.py --target_dir "./sandbox/da
 """
 
 import argparse
+import atexit
 import sys
 import os
 from dotenv import load_dotenv
-from src.utils.logger import log_experiment, ActionType
+from src.utils.logger import log_experiment, ActionType, configure_logging, export_logs, LOG_FORMATS
+from src.llm.cache import configure_llm_cache
+from src.llm.backends import configure_backend, LLM_BACKENDS, STUB_SERVER_URL
+from src.llm.cassette import configure_recording
+from src.llm.rate_limiter import configure_rate_limit, LLM_MAX_RETRIES
+from src.llm.usage import configure_budget
+from src.llm.streaming import configure_streaming
+from src.llm.compression import configure_compression
+from src.utils.cancellation import configure_timeouts, LLM_TIMEOUT_S, PYLINT_TIMEOUT_S, PYTEST_TIMEOUT_S
+from src.llm.hedging import configure_hedging
+from src.llm.circuit_breaker import configure_circuit_breaker, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+from src.llm.router import configure_routing, ESCALATE_AFTER
+from src.agents.auditor import PACK_PROMPT_MAX_CHARS
 
 
 load_dotenv()
@@ -40,6 +53,76 @@ def main():
         default="gemini-2.5-flash-lite",
         help="Modèle LLM à utiliser (défaut: gemini-2.5-flash-lite)"
     )
+    parser.add_argument(
+        "--auditor_model",
+        type=str,
+        default=None,
+        help="Modèle de l'Auditor (défaut: --model)"
+    )
+    parser.add_argument(
+        "--fixer_model",
+        type=str,
+        default=None,
+        help="Modèle du Fixer (défaut: --model)"
+    )
+    parser.add_argument(
+        "--judge_model",
+        type=str,
+        default=None,
+        help="Modèle du Judge (défaut: --model)"
+    )
+    parser.add_argument(
+        "--escalation_models",
+        type=str,
+        default="",
+        help="Modèles d'escalade du Fixer pour les fichiers difficiles, séparés par des virgules (ex: gemini-2.5-flash,gemini-2.5-pro)"
+    )
+    parser.add_argument(
+        "--escalate_after",
+        type=int,
+        default=ESCALATE_AFTER,
+        help=f"Cycles du Judge en échec sur un fichier avant de passer à l'échelon suivant (défaut: {ESCALATE_AFTER})"
+    )
+    parser.add_argument(
+        "--pack_audit",
+        action="store_true",
+        help="Regroupe les petits fichiers (et leurs rapports pylint) dans un même appel LLM de l'Auditor"
+    )
+    parser.add_argument(
+        "--pack_chars",
+        type=int,
+        default=PACK_PROMPT_MAX_CHARS,
+        help=f"Taille maximale du code regroupé dans un appel de l'Auditor, en caractères (défaut: {PACK_PROMPT_MAX_CHARS})"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Nombre de fichiers traités simultanément par chaque agent (défaut: 1, séquentiel)"
+    )
+    parser.add_argument(
+        "--audit_workers",
+        type=int,
+        default=None,
+        help="Nombre de fichiers analysés simultanément par l'Auditor (lecture, pylint, LLM) ; défaut: --concurrency"
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Enchaîne Auditor et Fixer fichier par fichier : un fichier audité est corrigé sans attendre la fin de l'audit"
+    )
+    parser.add_argument(
+        "--generation_workers",
+        type=int,
+        default=None,
+        help="Nombre de générations de tests/documentation simultanées ; défaut: --concurrency"
+    )
+    parser.add_argument(
+        "--compress_prompts",
+        action="store_true",
+        help="Compresse les prompts de l'Auditor et du Judge (pylint compact, code minifié, tracebacks raccourcis)"
+    )
+    
     parser.add_argument(
         "--generate_tests",
         action="store_true",
@@ -50,9 +133,192 @@ def main():
         action="store_true",
         help="Génère automatiquement la documentation"
     )
+    parser.add_argument(
+        "--log_format",
+        type=str,
+        choices=LOG_FORMATS,
+        default=os.getenv("LOG_FORMAT", "json"),
+        help="Format des logs : json (tableau historique), jsonl (append-only) ou sqlite (base indexée) ; jsonl et sqlite sont exportés en JSON en fin d'exécution"
+    )
+    parser.add_argument(
+        "--sync_logs",
+        action="store_true",
+        help="Écrit chaque log immédiatement au lieu de passer par le writer d'arrière-plan"
+    )
+    parser.add_argument(
+        "--log_blobs",
+        action="store_true",
+        help="Stocke les prompts/réponses volumineux une seule fois dans logs/blobs (formats jsonl/sqlite uniquement, réintégrés à l'export)"
+    )
+    
+    parser.add_argument(
+        "--no_llm_cache",
+        action="store_true",
+        help="Contourne le cache disque des réponses LLM (.cache/llm_cache.sqlite, jamais utilisé par le Fixer)"
+    )
+    parser.add_argument(
+        "--clear_llm_cache",
+        action="store_true",
+        help="Invalide le cache des réponses LLM avant l'exécution"
+    )
+    
+    parser.add_argument(
+        "--llm_backend",
+        type=str,
+        choices=LLM_BACKENDS,
+        default=os.getenv("LLM_BACKEND", "google"),
+        help="Backend LLM : google (défaut), stub (local, déterministe), http (serveur stub) ou replay (cassette)"
+    )
+    parser.add_argument(
+        "--stub_latency",
+        type=float,
+        default=0.0,
+        help="Backend stub : latence simulée par appel en secondes"
+    )
+    parser.add_argument(
+        "--stub_error_rate",
+        type=float,
+        default=0.0,
+        help="Backend stub : proportion d'appels en erreur simulée (0 à 1)"
+    )
+    parser.add_argument(
+        "--stub_url",
+        type=str,
+        default=STUB_SERVER_URL,
+        help=f"Backend http : URL du serveur stub (défaut: {STUB_SERVER_URL})"
+    )
+    parser.add_argument(
+        "--record_cassette",
+        type=str,
+        default=None,
+        help="Enregistre chaque échange LLM de l'exécution dans cette cassette (NDJSON)"
+    )
+    parser.add_argument(
+        "--replay_cassette",
+        type=str,
+        default=None,
+        help="Rejoue les réponses de cette cassette au lieu d'appeler un LLM (implique --llm_backend replay)"
+    )
+    
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=float(os.getenv("LLM_RPM", "0")) or None,
+        help="Quota de requêtes LLM par minute partagé par tous les agents (défaut: illimité)"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=float(os.getenv("LLM_TPM", "0")) or None,
+        help="Quota de tokens LLM par minute partagé par tous les agents (défaut: illimité)"
+    )
+    parser.add_argument(
+        "--llm_retries",
+        type=int,
+        default=LLM_MAX_RETRIES,
+        help=f"Nombre de reprises des erreurs LLM transitoires (429, 5xx) (défaut: {LLM_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--stream_llm",
+        action="store_true",
+        help="Reçoit les réponses LLM en streaming (mesure du TTFT, arrêt anticipé des réponses hors format)"
+    )
+    parser.add_argument(
+        "--hedge_pct",
+        type=float,
+        default=0.0,
+        help="Double les appels LLM plus lents que le p95 de leur agent, dans la limite de ce pourcentage des appels (défaut: 0 = désactivé)"
+    )
+    parser.add_argument(
+        "--circuit_threshold",
+        type=int,
+        default=CIRCUIT_FAILURE_THRESHOLD,
+        help=f"Échecs LLM consécutifs avant ouverture du disjoncteur et passage en mode dégradé (défaut: {CIRCUIT_FAILURE_THRESHOLD}, 0 = désactivé)"
+    )
+    parser.add_argument(
+        "--circuit_reset",
+        type=float,
+        default=CIRCUIT_RESET_TIMEOUT,
+        help=f"Délai en secondes avant qu'un appel de sonde puisse refermer le disjoncteur (défaut: {CIRCUIT_RESET_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Durée maximale de l'exécution en secondes ; à l'échéance, les appels en cours sont interrompus et les résultats partiels conservés"
+    )
+    parser.add_argument(
+        "--llm_timeout",
+        type=float,
+        default=LLM_TIMEOUT_S,
+        help=f"Délai maximal d'un appel LLM en secondes, 0 = illimité (défaut: {LLM_TIMEOUT_S:g})"
+    )
+    parser.add_argument(
+        "--pylint_timeout",
+        type=float,
+        default=PYLINT_TIMEOUT_S,
+        help=f"Délai maximal d'une analyse pylint en secondes, 0 = illimité (défaut: {PYLINT_TIMEOUT_S:g})"
+    )
+    parser.add_argument(
+        "--pytest_timeout",
+        type=float,
+        default=PYTEST_TIMEOUT_S,
+        help=f"Délai maximal d'une exécution pytest en secondes, 0 = illimité (défaut: {PYTEST_TIMEOUT_S:g})"
+    )
+    parser.add_argument(
+        "--token_budget",
+        type=int,
+        default=None,
+        help="Nombre maximal de tokens LLM pour l'exécution ; au-delà, aucun nouvel appel n'est lancé"
+    )
+    parser.add_argument(
+        "--cost_budget",
+        type=float,
+        default=None,
+        help="Coût LLM maximal de l'exécution en USD (prix indicatifs de src/llm/usage.py)"
+    )
     
     args = parser.parse_args()
     
+    if args.replay_cassette:
+        args.llm_backend = "replay"
+    if args.log_blobs and args.log_format == "json":
+        print(" ERREUR : --log_blobs nécessite --log_format jsonl ou sqlite")
+        sys.exit(1)
+
+    if args.llm_backend == "replay" and not args.replay_cassette:
+        print(" ERREUR : Le backend replay nécessite --replay_cassette")
+        sys.exit(1)
+    
+    if args.llm_backend == "stub":
+        configure_backend("stub", latency_s=args.stub_latency, error_rate=args.stub_error_rate)
+    elif args.llm_backend == "http":
+        configure_backend("http", url=args.stub_url)
+    elif args.llm_backend == "replay":
+        configure_backend("replay", path=args.replay_cassette)
+    else:
+        configure_backend("google")
+    configure_llm_cache(enabled=not args.no_llm_cache, clear=args.clear_llm_cache)
+    configure_rate_limit(rpm=args.rpm, tpm=args.tpm, max_retries=args.llm_retries)
+    configure_budget(token_budget=args.token_budget, cost_budget=args.cost_budget)
+    configure_streaming(args.stream_llm)
+    configure_compression(args.compress_prompts)
+    configure_hedging(args.hedge_pct)
+    configure_circuit_breaker(args.circuit_threshold, args.circuit_reset)
+    configure_timeouts(llm=args.llm_timeout, pylint=args.pylint_timeout, pytest=args.pytest_timeout)
+    configure_routing(
+        auditor_model=args.auditor_model,
+        fixer_model=args.fixer_model,
+        judge_model=args.judge_model,
+        escalation_models=[m.strip() for m in args.escalation_models.split(",") if m.strip()],
+        escalate_after=args.escalate_after
+    )
+    configure_recording(args.record_cassette)
+    configure_logging(log_format=args.log_format, background=not args.sync_logs, blobs=args.log_blobs)
+    if args.log_format != "json":
+        # Les correcteurs lisent logs/experiment_data.json : on le régénère une seule fois à la sortie
+        atexit.register(export_logs)
+    
     
     if not os.path.exists(args.target_dir):
         print(f" ERREUR : Le dossier {args.target_dir} n'existe pas.")
@@ -60,7 +326,7 @@ def main():
     
     
     api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    if args.llm_backend == "google" and not api_key:
         print(" ERREUR : La clé API GOOGLE_API_KEY n'est pas configurée dans le fichier .env")
         sys.exit(1)
     
@@ -71,6 +337,7 @@ def main():
     print(f" Dossier cible    : {args.target_dir}")
     print(f" Itérations max   : {args.max_iterations}")
     print(f" Modèle LLM       : {args.model}")
+    print(f" Backend LLM      : {args.llm_backend}")
     print(f" Tests            : {'Activé' if args.generate_tests else 'Désactivé'}")
     print(f" Documentation    : {'Activé' if args.generate_docs else 'Désactivé'}")
     print("=" * 80)
@@ -102,7 +369,14 @@ def main():
             model_name=args.model,
             max_iterations=args.max_iterations,
             generate_tests=args.generate_tests,
-            generate_docs=args.generate_docs
+            generate_docs=args.generate_docs,
+            pack_audit=args.pack_audit,
+            pack_chars=args.pack_chars,
+            deadline=args.deadline,
+            concurrency=args.concurrency,
+            audit_workers=args.audit_workers,
+            pipeline=args.pipeline,
+            generation_workers=args.generation_workers
             
             
         )
@@ -125,7 +399,8 @@ def main():
                     "output_response": f"Succès en {result['total_iterations']} itérations",
                     "success": True,
                     "total_iterations": result['total_iterations'],
-                    "history": result.get('history', [])
+                    "history": result.get('history', []),
+                    "performance_summary": result.get("performance_summary")
                 },
                 status="SUCCESS"
             )
@@ -140,6 +415,12 @@ def main():
             
             if result.get("max_iterations_reached"):
                 print(f"   Raison : Nombre maximum d'itérations atteint ({args.max_iterations})")
+            elif result.get("budget_exhausted"):
+                print("   Raison : Budget de tokens/coût atteint")
+            elif result.get("degraded"):
+                print("   Raison : Backend LLM indisponible (mode dégradé)")
+            elif result.get("deadline_reached"):
+                print(f"   Raison : Échéance de l'exécution atteinte ({args.deadline:g}s)")
             else:
                 print("   Raison : Erreur durant l'exécution")
             
@@ -153,7 +434,11 @@ def main():
                     "success": False,
                     "total_iterations": result['total_iterations'],
                     "max_iterations_reached": result.get("max_iterations_reached", False),
-                    "history": result.get('history', [])
+                    "budget_exhausted": result.get("budget_exhausted", False),
+                    "degraded": result.get("degraded", False),
+                    "deadline_reached": result.get("deadline_reached", False),
+                    "history": result.get('history', []),
+                    "performance_summary": result.get("performance_summary")
                 },
                 status="FAILURE"
             )
@@ -3,16 +3,23 @@ Agent Auditeur (The Auditor)
 Rôle : Analyser le code Python, détecter les problèmes de qualité et générer un rapport.
 """
 
+import asyncio
 import os
-from dotenv import load_dotenv 
-from typing import Dict, List
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Awaitable, Callable, Dict, List, Tuple
 from src.utils.logger import log_experiment, ActionType
-
-load_dotenv()
+from src.llm.gateway import invoke_chat, invoke_chat_async
+from src.llm.streaming import EXPECT_JSON
+from src.llm.backends import get_backend
+from src.llm.router import get_model_router
+from src.llm.usage import BudgetExceeded, add_pending_usage, take_pending_usage
+from src.llm.circuit_breaker import CircuitOpenError, llm_available
+from src.llm.compression import compact_pylint_rows, is_compression_enabled, minify_code, record_compression
 
 from src.tools.file_tools import read_file_safe, list_python_files
-from src.tools.pylint_tool import run_pylint, parse_pylint_output
+from src.tools.pylint_tool import run_pylint, run_pylint_async, parse_pylint_output
+from src.utils.json_repair import JSONRepairError, parse_json_lenient
+from src.utils.cancellation import OperationCancelled
+from src.utils.async_utils import SKIPPED, map_bounded, run_sync
 
 try:
     from src.prompts.auditor_prompts import AUDITOR_SYSTEM_PROMPT
@@ -41,6 +48,22 @@ FORMAT DE SORTIE (STRICT) :
 Réponds UNIQUEMENT avec du JSON valide, sans texte avant ou après."""
 
 
+# Mode packing : un fichier est "petit" s'il tient en entier dans le prompt individuel
+PACK_FILE_MAX_CHARS = 2000
+PACK_PROMPT_MAX_CHARS = 12000
+PACK_MAX_FILES = 10
+# Surcoût estimé par fichier dans un prompt groupé (en-tête, rapport pylint)
+PACK_FILE_OVERHEAD_CHARS = 600
+
+# Dernier recours quand une réponse est irréparable : demande de remise en forme (sans le code)
+REFORMAT_SYSTEM_PROMPT = "Tu convertis des rapports d'audit en JSON strict. Tu n'ajoutes ni ne retires aucun problème."
+REFORMAT_MAX_CHARS = 4000
+
+SEVERITIES = ("high", "medium", "low")
+SEVERITY_ALIASES = {"critical": "high", "error": "high", "major": "high", "warning": "medium",
+                    "minor": "low", "info": "low", "convention": "low"}
+
+
 class AuditorAgent:
     """
     Agent responsable de l'audit du code.
@@ -49,34 +72,47 @@ class AuditorAgent:
     Correspond à l'Agent Auditeur (The Auditor) du TP "The Refactoring Swarm".
     """
     
-    def __init__(self, model_name: str = "gemini-2.0-flash-exp"):
+    def __init__(self, model_name: str = "gemini-2.0-flash-exp", pack_small_files: bool = False,
+                 pack_max_chars: int = PACK_PROMPT_MAX_CHARS, concurrency: int = 1):
         """
         Initialise l'agent auditeur.
         
         Args:
             model_name: Nom du modèle LLM à utiliser (recommandé: gemini-2.0-flash-exp)
+            pack_small_files: Regroupe les petits fichiers dans un même appel LLM
+            pack_max_chars: Taille maximale du code regroupé dans un appel (caractères)
+            concurrency: Nombre de fichiers analysés simultanément (--audit_workers, 1 = séquentiel)
         """
+        self.pack_small_files = pack_small_files
+        self.concurrency = max(1, concurrency)
+        self.pack_max_chars = pack_max_chars
+        # Le routeur peut attribuer un modèle propre à chaque agent (--auditor_model)
+        model_name = get_model_router().agent_model("Auditor_Agent", model_name)
         self.model_name = model_name
+        self.temperature = 0.1
         
-        api_key = os.getenv("GOOGLE_API_KEY")
-        
-        if not api_key:
-            raise ValueError(
-                " Clé API Google non trouvée. "
-                "Assurez-vous d'avoir GOOGLE_API_KEY dans votre fichier .env"
-            )
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            google_api_key=api_key,
-            temperature=0.1,
-            convert_system_message_to_human=True
-        )
+        # Backend configuré (client Google partagé entre agents, stub local, ...)
+        self.llm = get_backend(model_name, self.temperature)
         print(f" AuditorAgent initialisé avec le modèle : {model_name}")
     
     def analyze(self, target_dir: str) -> Dict:
+        """
+        Analyse tous les fichiers Python d'un dossier (enveloppe synchrone de analyze_async).
+        
+        Args:
+            target_dir: Chemin du dossier à analyser (ex: "./sandbox/dataset_inconnu")
+            
+        Returns:
+            Dict: Rapport d'audit contenant les problèmes détectés
+        """
+        return run_sync(self.analyze_async(target_dir))
+    
+    async def analyze_async(self, target_dir: str, on_file_report: Callable[[str, List[Dict]], Awaitable] = None) -> Dict:
         """
         Analyse tous les fichiers Python d'un dossier et logue chaque fichier individuellement.
+        Jusqu'à `concurrency` fichiers sont analysés simultanément (lecture, pylint, appel LLM) ;
+        le rapport et les entrées de log (une par fichier) suivent l'ordre des fichiers.
+        Chaque fichier est remis dès que lui et ceux qui le précèdent sont analysés.
         
         Cette méthode respecte le protocole de logging du TP en enregistrant :
         - file_analyzed : Nom du fichier Python analysé
@@ -86,6 +122,9 @@ class AuditorAgent:
         
         Args:
             target_dir: Chemin du dossier à analyser (ex: "./sandbox/dataset_inconnu")
+            on_file_report: Coroutine appelée avec (fichier, problèmes) pour chaque fichier analysé,
+                dans l'ordre des fichiers (ex: passage au Fixer en mode pipeline). L'analyse
+                attend qu'elle se termine : un consommateur lent freine l'Auditor.
             
         Returns:
             Dict: Rapport d'audit contenant les problèmes détectés
@@ -95,7 +134,8 @@ class AuditorAgent:
         try:
             
             print(" Recherche des fichiers Python...")
-            python_files = list_python_files(target_dir)
+            # Ordre stable (indépendant du système de fichiers) : rapport et log ne dépendent pas du nombre de workers
+            python_files = sorted(list_python_files(target_dir))
             
             if not python_files:
                 print("  Aucun fichier Python trouvé dans le dossier.")
@@ -127,90 +167,94 @@ class AuditorAgent:
             
             all_issues = []
             files_analyzed = []
+            prepared_files = {}
+            pending_files = python_files
             
-            for filename in python_files:
-                print(f"\n Analyse de : {filename}")
-                
+            if self.pack_small_files and llm_available():
                 try:
-                    
-                    full_path = os.path.join(target_dir, filename)
-                    file_content = read_file_safe(full_path, target_dir)
-                    
-                    
-                    print(f"   Exécution de pylint sur {filename}...")
-                    pylint_output = run_pylint(full_path)
-                    pylint_result = parse_pylint_output(pylint_output)
-                    pylint_score = pylint_result.get("score", 0)
-                    pylint_issues = pylint_result.get("issues", [])
-                    
-                    print(f"   Score Pylint : {pylint_score}/10")
-                    print(f"   Problèmes Pylint détectés : {len(pylint_issues)}")
-                    
-                    
-                    user_prompt = self._build_analysis_prompt(
-                        filename=filename,
-                        file_content=file_content,
-                        pylint_result=pylint_result
-                    )
-                    
-                    
-                    print(f"   Consultation du LLM pour l'analyse approfondie...")
-                    llm_response = self._call_llm(user_prompt)
-                    
-                    
-                    file_issues = self._parse_llm_response(llm_response, filename)
-                    file_issues_count = len(file_issues)
-                    
-                    
-                    log_experiment(
-                        agent_name="Auditor_Agent",
-                        model_used=self.model_name,
-                        action=ActionType.ANALYSIS,
-                        details={
-                            "file_analyzed": filename,  
-                            "input_prompt": user_prompt,  
-                            "output_response": llm_response,  
-                            "issues_found": file_issues_count,  
-                            "pylint_score": pylint_score,
-                            "pylint_issues_count": len(pylint_issues),
-                            "file_path": full_path,
-                            
-                        },
-                        status="SUCCESS"  
+                    if self.concurrency > 1:
+                        # Lecture et pylint en parallèle ; un échec est relevé (et logué) par _analyze_packed
+                        prepared_list = await map_bounded(
+                            lambda f: self._prepare_file_async(f, target_dir), python_files,
+                            limit=self.concurrency, stop_on=(OperationCancelled,)
+                        )
+                        for filename, prepared in zip(python_files, prepared_list):
+                            if isinstance(prepared, OperationCancelled):
+                                raise prepared
+                            if isinstance(prepared, dict):
+                                prepared_files[filename] = prepared
+                    pending_files = await asyncio.to_thread(
+                        self._analyze_packed, python_files, target_dir, prepared_files, all_issues, files_analyzed
                     )
-                    
-                    
-                    all_issues.extend(file_issues)
-                    files_analyzed.append(filename)
-                    
-                    print(f"  {'' if file_issues_count == 0 else ''} Analyse terminée : {file_issues_count} problème(s) détecté(s)")
-                    
-                except Exception as e:
-                    print(f" Erreur lors de l'analyse de {filename} : {str(e)}")
-                    
-                    
-                    log_experiment(
-                        agent_name="Auditor_Agent",
-                        model_used=self.model_name,
-                        action=ActionType.DEBUG,
-                        details={
-                            "file_analyzed": filename,
-                            "input_prompt": f"Tentative d'analyse de {filename} dans {target_dir}",
-                            "output_response": f" Erreur : {str(e)}",
-                            "issues_found": 1,
-                            "error_type": type(e).__name__
-                        },
-                        status="FAILURE"  
-                    )
-                    
-                    
-                    all_issues.append({
-                        "file": filename,
-                        "line": 0,
-                        "severity": "high",
-                        "type": "analysis_error",
-                        "message": f"Erreur lors de l'analyse : {str(e)}"
-                    })
+                except (BudgetExceeded, OperationCancelled) as e:
+                    print(f" [AUDITOR] {str(e)} : analyse interrompue")
+                    pending_files = []
+                
+                if on_file_report is not None:
+                    for filename in python_files:
+                        if filename not in pending_files:
+                            await on_file_report(filename, [i for i in all_issues if i.get("file") == filename])
+            
+            outcomes = {}
+            next_index = 0
+            interrupted = False
+            fatal = None
+            flush_lock = asyncio.Lock()
+            
+            async def flush(final=False):
+                # Remet les fichiers terminés dans l'ordre : log, rapport, puis on_file_report
+                nonlocal next_index, interrupted, fatal
+                async with flush_lock:
+                    while next_index < len(pending_files) and (final or next_index in outcomes):
+                        filename = pending_files[next_index]
+                        outcome = outcomes.pop(next_index, SKIPPED)
+                        next_index += 1
+                        if outcome is SKIPPED:
+                            continue
+                        if isinstance(outcome, (BudgetExceeded, OperationCancelled)):
+                            # Budget épuisé ou échéance atteinte : on rend le rapport partiel plutôt qu'une erreur par fichier restant
+                            if not interrupted:
+                                print(f" [AUDITOR] {str(outcome)} : analyse interrompue à {filename}")
+                            interrupted = True
+                            continue
+                        if isinstance(outcome, Exception):
+                            file_issues = [self._log_analysis_error(filename, target_dir, outcome)]
+                        elif isinstance(outcome, BaseException):
+                            fatal = fatal or outcome
+                            continue
+                        else:
+                            file_issues, log_entry, usage = outcome
+                            # Entrée de log écrite dans l'ordre des fichiers, avec la consommation de son appel
+                            add_pending_usage(usage)
+                            log_experiment(**log_entry)
+                            files_analyzed.append(filename)
+                        all_issues.extend(file_issues)
+                        if on_file_report is not None:
+                            await on_file_report(filename, file_issues)
+            
+            async def audit_file(index):
+                filename = pending_files[index]
+                print(f"\n Analyse de : {filename}")
+                try:
+                    prepared = prepared_files.get(filename) or await self._prepare_file_async(filename, target_dir)
+                    outcome = await self._analyze_file_async(prepared)
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    outcome = e
+                outcomes[index] = outcome
+                if isinstance(outcome, (BudgetExceeded, OperationCancelled)):
+                    # Aucun nouveau fichier n'est démarré (voir map_bounded)
+                    raise outcome
+                await flush()
+            
+            await map_bounded(
+                audit_file, range(len(pending_files)), limit=self.concurrency,
+                stop_on=(BudgetExceeded, OperationCancelled)
+            )
+            await flush(final=True)
+            if fatal is not None:
+                raise fatal
             
             
             report = {
@@ -243,8 +287,426 @@ class AuditorAgent:
             )
             raise
     
+    def _prepare_file(self, filename: str, target_dir: str) -> Dict:
+        """
+        Lit un fichier et exécute pylint dessus.
+        
+        Args:
+            filename: Nom du fichier
+            target_dir: Dossier analysé
+            
+        Returns:
+            Dict: filename, full_path, content, pylint_result, pylint_score, pylint_issues
+        """
+        full_path = os.path.join(target_dir, filename)
+        file_content = read_file_safe(full_path, target_dir)
+        
+        
+        print(f"   Exécution de pylint sur {filename}...")
+        return self._prepared_entry(filename, full_path, file_content, run_pylint(full_path))
+    
+    async def _prepare_file_async(self, filename: str, target_dir: str) -> Dict:
+        """Variante asynchrone de _prepare_file (pylint en sous-processus asyncio)."""
+        full_path = os.path.join(target_dir, filename)
+        file_content = read_file_safe(full_path, target_dir)
+        
+        print(f"   Exécution de pylint sur {filename}...")
+        return self._prepared_entry(filename, full_path, file_content, await run_pylint_async(full_path))
+    
+    def _prepared_entry(self, filename: str, full_path: str, file_content: str, pylint_output: str) -> Dict:
+        pylint_result = parse_pylint_output(pylint_output)
+        pylint_score = pylint_result.get("score", 0)
+        pylint_issues = pylint_result.get("issues", [])
+        
+        print(f"   Score Pylint : {pylint_score}/10")
+        print(f"   Problèmes Pylint détectés : {len(pylint_issues)}")
+        
+        return {
+            "filename": filename,
+            "full_path": full_path,
+            "content": file_content,
+            "pylint_result": pylint_result,
+            "pylint_score": pylint_score,
+            "pylint_issues": pylint_issues
+        }
+    
+    async def _analyze_file_async(self, prepared: Dict):
+        """
+        Analyse un fichier préparé avec le LLM (ou pylint seul en mode dégradé).
+        L'entrée de log est rendue à l'appelant, qui l'écrit dans l'ordre des fichiers.
+        
+        Args:
+            prepared: Fichier préparé par _prepare_file
+            
+        Returns:
+            Tuple: (problèmes détectés, arguments de log_experiment, consommation de tokens à rattacher à l'entrée)
+        """
+        user_prompt, compression = self._file_prompt(prepared)
+        
+        llm_response = None
+        if llm_available():
+            print(f"   Consultation du LLM pour l'analyse approfondie...")
+            try:
+                llm_response = await self._call_llm_async(user_prompt)
+            except CircuitOpenError:
+                llm_response = None
+        
+        usage = take_pending_usage()
+        # Le parsing peut demander une remise en forme au LLM (appel synchrone) : hors de la boucle
+        file_issues, log_entry = await asyncio.to_thread(
+            self._file_analysis, prepared, user_prompt, llm_response, compression
+        )
+        return file_issues, log_entry, usage
+    
+    def _file_prompt(self, prepared: Dict):
+        """
+        Construit le prompt d'analyse d'un fichier préparé et mesure sa compression.
+        
+        Returns:
+            Tuple: (prompt, rapport de compression ou None)
+        """
+        filename = prepared["filename"]
+        user_prompt = self._build_analysis_prompt(
+            filename=filename,
+            file_content=prepared["content"],
+            pylint_result=prepared["pylint_result"]
+        )
+        compression = None
+        if is_compression_enabled():
+            raw_prompt = self._build_analysis_prompt(
+                filename, prepared["content"], prepared["pylint_result"], compress=False
+            )
+            compression = record_compression("Auditor_Agent", raw_prompt, user_prompt)
+        return user_prompt, compression
+    
+    def _file_analysis(self, prepared: Dict, user_prompt: str, llm_response, compression):
+        """
+        Interprète la réponse du LLM pour un fichier et prépare son entrée de log.
+        
+        Args:
+            prepared: Fichier préparé par _prepare_file
+            user_prompt: Prompt envoyé au LLM
+            llm_response: Réponse du LLM (None si le backend est indisponible : pylint seul)
+            compression: Rapport de compression du prompt (ou None)
+            
+        Returns:
+            Tuple: (problèmes détectés, arguments de log_experiment)
+        """
+        filename = prepared["filename"]
+        pylint_issues = prepared["pylint_issues"]
+        
+        if llm_response is None:
+            # Mode dégradé : backend LLM indisponible, seul le rapport pylint est utilisé
+            print(f"   Backend LLM indisponible : audit pylint seul")
+            file_issues = self._pylint_only_issues(filename, pylint_issues)
+            return file_issues, dict(
+                agent_name="Auditor_Agent",
+                model_used=self.model_name,
+                action=ActionType.ANALYSIS,
+                details={
+                    "file_analyzed": filename,
+                    "input_prompt": f"Audit pylint seul de {filename} (backend LLM indisponible)",
+                    "output_response": f"{len(file_issues)} problème(s) pylint retenu(s)",
+                    "issues_found": len(file_issues),
+                    "pylint_score": prepared["pylint_score"],
+                    "pylint_issues_count": len(pylint_issues),
+                    "file_path": prepared["full_path"],
+                    "degraded": True
+                },
+                status="SUCCESS"
+            )
+        
+        
+        file_issues = self._parse_llm_response(llm_response, filename)
+        parse_failed = file_issues is None
+        if parse_failed:
+            # Réponse inexploitable : on retient le rapport pylint plutôt qu'un faux problème
+            print(f"   Réponse inexploitable : problèmes pylint retenus pour {filename}")
+            file_issues = self._pylint_only_issues(filename, pylint_issues)
+        file_issues_count = len(file_issues)
+        
+        print(f"  {'' if file_issues_count == 0 else ''} Analyse terminée : {file_issues_count} problème(s) détecté(s)")
+        return file_issues, dict(
+            agent_name="Auditor_Agent",
+            model_used=self.model_name,
+            action=ActionType.ANALYSIS,
+            details={
+                "file_analyzed": filename,  
+                "input_prompt": user_prompt,  
+                "output_response": llm_response,  
+                "issues_found": file_issues_count,  
+                "pylint_score": prepared["pylint_score"],
+                "pylint_issues_count": len(pylint_issues),
+                "file_path": prepared["full_path"],
+                **({"prompt_compression": compression} if compression else {}),
+                **({"parse_failed": True} if parse_failed else {})
+            },
+            status="SUCCESS"  
+        )
+    
+    def _log_analysis_error(self, filename: str, target_dir: str, error: Exception) -> Dict:
+        """
+        Logue l'échec de l'analyse d'un fichier.
+        
+        Returns:
+            Dict: Problème "analysis_error" à ajouter au rapport
+        """
+        print(f" Erreur lors de l'analyse de {filename} : {str(error)}")
+        
+        
+        log_experiment(
+            agent_name="Auditor_Agent",
+            model_used=self.model_name,
+            action=ActionType.DEBUG,
+            details={
+                "file_analyzed": filename,
+                "input_prompt": f"Tentative d'analyse de {filename} dans {target_dir}",
+                "output_response": f" Erreur : {str(error)}",
+                "issues_found": 1,
+                "error_type": type(error).__name__
+            },
+            status="FAILURE"  
+        )
+        
+        
+        return {
+            "file": filename,
+            "line": 0,
+            "severity": "high",
+            "type": "analysis_error",
+            "message": f"Erreur lors de l'analyse : {str(error)}"
+        }
+    
+    def _analyze_packed(self, python_files: List[str], target_dir: str, prepared_files: Dict,
+                        all_issues: List[Dict], files_analyzed: List[str]) -> List[str]:
+        """
+        Mode packing : analyse les petits fichiers par groupes, en un appel LLM par groupe.
+        Chaque fichier garde sa propre entrée de log. Les fichiers trop gros, et ceux d'un
+        groupe dont la réponse est inexploitable, sont rendus pour une analyse individuelle.
+        
+        Args:
+            python_files: Fichiers à analyser
+            target_dir: Dossier analysé
+            prepared_files: Fichiers déjà préparés, complété avec les autres (réutilisés ensuite)
+            all_issues: Liste des problèmes du rapport (complétée)
+            files_analyzed: Liste des fichiers analysés (complétée)
+            
+        Returns:
+            List[str]: Fichiers restant à analyser un par un, dans l'ordre d'origine
+        """
+        print(f" Mode packing : regroupement des petits fichiers (max {self.pack_max_chars} caractères par appel)")
+        
+        small_files = []
+        for filename in python_files:
+            print(f"\n Préparation de : {filename}")
+            try:
+                prepared = prepared_files.get(filename) or self._prepare_file(filename, target_dir)
+            except Exception as e:
+                all_issues.append(self._log_analysis_error(filename, target_dir, e))
+                continue
+            prepared_files[filename] = prepared
+            if len(prepared["content"]) <= PACK_FILE_MAX_CHARS:
+                small_files.append(prepared)
+        
+        # Groupes successifs de petits fichiers dans la limite de taille du prompt
+        packs, current, current_size = [], [], 0
+        for prepared in small_files:
+            size = len(prepared["content"]) + PACK_FILE_OVERHEAD_CHARS
+            if current and (current_size + size > self.pack_max_chars or len(current) >= PACK_MAX_FILES):
+                packs.append(current)
+                current, current_size = [], 0
+            current.append(prepared)
+            current_size += size
+        if current:
+            packs.append(current)
+        
+        done = set()
+        for pack in packs:
+            if len(pack) < 2:
+                continue
+            filenames = [prepared["filename"] for prepared in pack]
+            print(f"\n Analyse groupée de {len(pack)} fichiers : {', '.join(filenames)}")
+            
+            user_prompt = self._build_pack_prompt(pack)
+            compression = None
+            if is_compression_enabled():
+                compression = record_compression("Auditor_Agent", self._build_pack_prompt(pack, compress=False), user_prompt)
+            try:
+                llm_response = self._call_llm(user_prompt)
+            except BudgetExceeded:
+                raise
+            except CircuitOpenError:
+                continue
+            except Exception as e:
+                # Erreur du backend sur l'appel groupé : ces fichiers repassent par l'analyse individuelle,
+                # qui logue une erreur par fichier si le backend échoue encore
+                print(f"   Échec de l'analyse groupée ({str(e)}) : analyse individuelle de ces fichiers")
+                continue
+            
+            issues_by_file = self._parse_pack_response(llm_response, filenames)
+            if issues_by_file is None:
+                print(f"   Réponse groupée inexploitable : analyse individuelle de ces fichiers")
+                continue
+            
+            for prepared in pack:
+                filename = prepared["filename"]
+                if filename not in issues_by_file:
+                    print(f"   {filename} absent de la réponse groupée : analyse individuelle")
+                    continue
+                
+                file_issues = issues_by_file[filename]
+                log_experiment(
+                    agent_name="Auditor_Agent",
+                    model_used=self.model_name,
+                    action=ActionType.ANALYSIS,
+                    details={
+                        "file_analyzed": filename,
+                        "input_prompt": user_prompt,
+                        "output_response": llm_response,
+                        "issues_found": len(file_issues),
+                        "pylint_score": prepared["pylint_score"],
+                        "pylint_issues_count": len(prepared["pylint_issues"]),
+                        "file_path": prepared["full_path"],
+                        "packed_files": filenames,
+                        **({"prompt_compression": compression} if compression else {})
+                    },
+                    status="SUCCESS"
+                )
+                all_issues.extend(file_issues)
+                files_analyzed.append(filename)
+                done.add(filename)
+                print(f"   {filename} : {len(file_issues)} problème(s) détecté(s)")
+        
+        return [f for f in python_files if f in prepared_files and f not in done]
+    
+    def _build_pack_prompt(self, pack: List[Dict], compress: bool = None) -> str:
+        """
+        Construit le prompt d'analyse groupée de plusieurs petits fichiers.
+        
+        Args:
+            pack: Fichiers préparés par _prepare_file
+            compress: Compresse le code et les rapports pylint (None = réglage global)
+            
+        Returns:
+            str: Prompt formaté pour le LLM
+        """
+        if compress is None:
+            compress = is_compression_enabled()
+        sections = []
+        for prepared in pack:
+            pylint_issues = prepared["pylint_issues"]
+            content = minify_code(prepared["content"]) if compress else prepared["content"]
+            issues_summary = compact_pylint_rows(pylint_issues) if compress else pylint_issues[:10]
+            sections.append(f"""=== FICHIER : {prepared["filename"]} ===
+SCORE PYLINT : {prepared["pylint_score"]}/10
+NOMBRE D'ERREURS PYLINT : {len(pylint_issues)}
+
+CODE :
+```python
+{content}
+```
+
+ERREURS PYLINT (échantillon des plus importantes) :
+{issues_summary}""")
+        
+        filenames = ", ".join(prepared["filename"] for prepared in pack)
+        return f"""Analyse ces {len(pack)} fichiers Python et leurs rapports pylint pour identifier les problèmes de qualité.
+
+""" + "\n\n".join(sections) + f"""
+
+INSTRUCTIONS :
+1. Identifie les problèmes les plus critiques (bugs, erreurs de logique, code non maintenable)
+2. Classe-les par sévérité : "high", "medium", "low"
+3. Propose des recommandations concrètes
+4. Renseigne pour chaque problème le champ "file" avec le nom exact du fichier concerné
+5. Liste dans files_analyzed TOUS les fichiers analysés : {filenames}
+
+Génère un rapport JSON strict avec les champs : files_analyzed, total_issues, issues, recommendations.
+Réponds UNIQUEMENT avec du JSON valide."""
+    
+    def _parse_pack_response(self, response: str, filenames: List[str]):
+        """
+        Répartit par fichier les problèmes d'une réponse groupée.
+        
+        Args:
+            response: Réponse brute du LLM
+            filenames: Fichiers du groupe
+            
+        Returns:
+            Dict[str, List[Dict]]: Problèmes par fichier pour les fichiers couverts par la réponse,
+            None si la réponse n'est pas un rapport JSON exploitable
+        """
+        try:
+            data, _ = parse_json_lenient(response)
+            issues = self._validate_issues(data, "")
+        except JSONRepairError as e:
+            print(f"  Impossible de parser la réponse JSON groupée : {str(e)}")
+            return None
+        if not isinstance(data, dict):
+            return None
+        
+        # Les noms sont parfois renvoyés avec un chemin : on compare les noms de base
+        by_basename = {os.path.basename(f): f for f in filenames}
+        covered = {
+            by_basename[os.path.basename(str(f))]
+            for f in data.get("files_analyzed", []) or []
+            if os.path.basename(str(f)) in by_basename
+        }
+        
+        issues_by_file = {}
+        for issue in issues:
+            filename = by_basename.get(os.path.basename(str(issue.get("file", ""))))
+            if filename is None:
+                continue
+            issue["file"] = filename
+            issues_by_file.setdefault(filename, []).append(issue)
+            covered.add(filename)
+        
+        return {filename: issues_by_file.get(filename, []) for filename in covered}
+    
+    def _pylint_only_issues(self, filename: str, pylint_issues: List[Dict]) -> List[Dict]:
+        """
+        Convertit les messages pylint au format des problèmes d'audit (mode dégradé).
+        
+        Args:
+            filename: Nom du fichier
+            pylint_issues: Messages pylint (format JSON de pylint)
+            
+        Returns:
+            List[Dict]: Problèmes au format du rapport d'audit
+        """
+        severities = {"fatal": "high", "error": "high", "warning": "medium"}
+        return [
+            {
+                "file": filename,
+                "line": issue.get("line", 0),
+                "severity": severities.get(issue.get("type"), "low"),
+                "type": issue.get("symbol", issue.get("type", "pylint")),
+                "message": issue.get("message", "")
+            }
+            for issue in pylint_issues
+        ]
+    
+    def analysis_prompts(self, filename: str, target_dir: str) -> Tuple[str, str]:
+        """
+        Construit le prompt d'analyse d'un fichier sans et avec compression, sans appeler le LLM
+        (mesure du gain de la compression).
+        
+        Args:
+            filename: Nom du fichier
+            target_dir: Dossier cible
+            
+        Returns:
+            Tuple[str, str]: Prompt brut, prompt compressé
+        """
+        prepared = self._prepare_file(filename, target_dir)
+        return tuple(
+            self._build_analysis_prompt(filename, prepared["content"], prepared["pylint_result"], compress=compress)
+            for compress in (False, True)
+        )
+    
     def _build_analysis_prompt(self, filename: str, file_content: str, 
-                               pylint_result: Dict) -> str:
+                               pylint_result: Dict, compress: bool = None) -> str:
         """
         Construit le prompt pour l'analyse d'un fichier.
         
@@ -252,12 +714,19 @@ class AuditorAgent:
             filename: Nom du fichier
             file_content: Contenu du fichier
             pylint_result: Résultat de l'analyse pylint
+            compress: Compresse le code et le rapport pylint (None = réglage global)
             
         Returns:
             str: Prompt formaté pour le LLM
         """
+        if compress is None:
+            compress = is_compression_enabled()
         pylint_issues = pylint_result.get('issues', [])
-        issues_summary = pylint_issues[:10] if len(pylint_issues) > 10 else pylint_issues
+        if compress:
+            file_content = minify_code(file_content)
+            issues_summary = compact_pylint_rows(pylint_issues)
+        else:
+            issues_summary = pylint_issues[:10] if len(pylint_issues) > 10 else pylint_issues
         
         return f"""Analyse ce code Python et le rapport pylint pour identifier les problèmes de qualité.
 
@@ -291,69 +760,163 @@ Réponds UNIQUEMENT avec du JSON valide."""
         Returns:
             str: Réponse du LLM
         """
-        messages = [
-            {"role": "system", "content": AUDITOR_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt}
-        ]
-        
-        response = self.llm.invoke(messages)
+        return invoke_chat(
+            self.llm,
+            system_prompt=AUDITOR_SYSTEM_PROMPT,
+            prompt=prompt,
+            agent_name="Auditor_Agent",
+            model_name=self.model_name,
+            temperature=self.temperature,
+            expect=EXPECT_JSON
+        )
+    
+    async def _call_llm_async(self, prompt: str) -> str:
+        """Variante asynchrone de _call_llm."""
+        return await invoke_chat_async(
+            self.llm,
+            system_prompt=AUDITOR_SYSTEM_PROMPT,
+            prompt=prompt,
+            agent_name="Auditor_Agent",
+            model_name=self.model_name,
+            temperature=self.temperature,
+            expect=EXPECT_JSON
+        )
+    
+    def _parse_llm_response(self, response: str, filename: str):
+        """
+        Parse la réponse JSON du LLM, en la réparant localement si nécessaire.
+        En dernier recours, une remise en forme (sans le code) est demandée au LLM.
         
+        Args:
+            response: Réponse brute du LLM
+            filename: Nom du fichier analysé
+            
+        Returns:
+            List[Dict]: Liste des problèmes détectés, None si la réponse est inexploitable
+        """
+        try:
+            data, repaired = parse_json_lenient(response)
+            if repaired:
+                print(f"   Réponse JSON réparée localement")
+            return self._validate_issues(data, filename)
+            
+        except JSONRepairError as e:
+            print(f"  Impossible de parser la réponse JSON du LLM : {str(e)}")
+            print(f"Réponse brute : {str(response)[:200]}...")
         
-        if isinstance(response.content, list):
-            content = response.content[0] if response.content else ""
-            if hasattr(content, 'text'):
-                return content.text
-            return str(content)
+        if not llm_available():
+            return None
         
-        return response.content
+        reformatted = self._reformat_response(response, filename)
+        if reformatted is None:
+            return None
+        try:
+            data, _ = parse_json_lenient(reformatted)
+            return self._validate_issues(data, filename)
+        except JSONRepairError as e:
+            print(f"  Réponse remise en forme toujours invalide : {str(e)}")
+            return None
     
-    def _parse_llm_response(self, response: str, filename: str) -> List[Dict]:
+    def _reformat_response(self, response: str, filename: str):
         """
-        Parse la réponse JSON du LLM.
+        Demande au LLM de remettre une réponse irréparable au format JSON attendu.
+        Le prompt ne contient que la réponse fautive (pas le code) : l'appel est bon marché.
         
         Args:
-            response: Réponse brute du LLM
+            response: Réponse brute irréparable
             filename: Nom du fichier analysé
             
         Returns:
-            List[Dict]: Liste des problèmes détectés
+            str: Réponse remise en forme, None si l'appel a échoué
         """
-        import json
+        prompt = f"""Reformate la réponse suivante (audit de {filename}) en JSON strict avec les champs :
+files_analyzed, total_issues, issues (file, line, severity, type, message), recommendations.
+N'ajoute aucune analyse. Réponds UNIQUEMENT avec du JSON valide.
+
+RÉPONSE :
+{str(response)[:REFORMAT_MAX_CHARS]}"""
         
+        print(f"   Demande de remise en forme de la réponse au LLM...")
         try:
+            reformatted = invoke_chat(
+                self.llm,
+                system_prompt=REFORMAT_SYSTEM_PROMPT,
+                prompt=prompt,
+                agent_name="Auditor_Agent",
+                model_name=self.model_name,
+                temperature=0.0,
+                expect=EXPECT_JSON
+            )
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"   Remise en forme impossible : {str(e)}")
+            return None
+        
+        log_experiment(
+            agent_name="Auditor_Agent",
+            model_used=self.model_name,
+            action=ActionType.DEBUG,
+            details={
+                "file_analyzed": filename,
+                "input_prompt": prompt,
+                "output_response": reformatted,
+                "issues_found": 0,
+                "reformat": True
+            },
+            status="SUCCESS"
+        )
+        return reformatted
+    
+    def _validate_issues(self, data, filename: str) -> List[Dict]:
+        """
+        Valide les problèmes d'une réponse parsée contre le schéma du rapport d'audit.
+        Les champs manquants sont complétés, les sévérités normalisées, les entrées sans
+        message écartées.
+        
+        Args:
+            data: Réponse parsée (rapport complet ou liste de problèmes)
+            filename: Fichier par défaut des problèmes
             
-            cleaned = response.strip()
-            if cleaned.startswith("```json"):
-                cleaned = cleaned[7:]
-            if cleaned.startswith("```"):
-                cleaned = cleaned[3:]
-            if cleaned.endswith("```"):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            
-            data = json.loads(cleaned)
-            issues = data.get("issues", [])
-            
-            
-            for issue in issues:
-                if "file" not in issue:
-                    issue["file"] = filename
-            
-            return issues
+        Returns:
+            List[Dict]: Problèmes valides
             
-        except json.JSONDecodeError as e:
-            print(f"  Impossible de parser la réponse JSON du LLM : {str(e)}")
-            print(f"Réponse brute : {response[:200]}...")
+        Raises:
+            JSONRepairError: Si la réponse n'a pas la forme d'un rapport d'audit
+                (notamment un objet sans liste "issues")
+        """
+        if isinstance(data, list):
+            raw_issues = data
+        elif isinstance(data, dict) and isinstance(data.get("issues"), list):
+            # Un objet sans liste "issues" ({}, {"result": ...}) n'est pas un rapport vide
+            raw_issues = data["issues"]
+        else:
+            raise JSONRepairError("La réponse ne respecte pas le schéma du rapport d'audit")
+        
+        issues = []
+        for issue in raw_issues:
+            if not isinstance(issue, dict):
+                continue
+            message = issue.get("message") or issue.get("description")
+            if not message:
+                continue
             
+            severity = str(issue.get("severity", "medium")).lower()
+            severity = SEVERITY_ALIASES.get(severity, severity)
+            try:
+                line = int(issue.get("line") or 0)
+            except (TypeError, ValueError):
+                line = 0
             
-            return [{
-                "file": filename,
-                "line": 0,
-                "severity": "medium",
-                "type": "parse_error",
-                "message": "Erreur lors de l'analyse LLM - Réponse non valide"
-            }]
+            issues.append({
+                **issue,
+                "file": issue.get("file") or filename,
+                "line": line,
+                "severity": severity if severity in SEVERITIES else "medium",
+                "type": issue.get("type") or "quality",
+                "message": str(message)
+            })
+        return issues
     
     def _generate_recommendations(self, issues: List[Dict]) -> List[str]:
         """
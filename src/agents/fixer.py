@@ -3,15 +3,22 @@ Agent Correcteur (The Fixer)
 Rôle : Corriger le code Python selon le rapport d'audit ET générer du nouveau contenu.
 """
 
+import asyncio
 import os
-from dotenv import load_dotenv 
 from typing import Dict, List
-from langchain_google_genai import ChatGoogleGenerativeAI
 from src.utils.logger import log_experiment, ActionType
+from src.llm.gateway import invoke_chat, invoke_chat_async
+from src.llm.streaming import EXPECT_CODE, EXPECT_TEXT
+from src.llm.backends import get_backend
+from src.llm.router import get_model_router
+from src.llm.rate_limiter import PRIORITY_FIX, PRIORITY_GENERATION
+from src.llm.usage import BudgetExceeded
+from src.llm.circuit_breaker import CircuitOpenError, llm_available
+from src.utils.cancellation import OperationCancelled
+from src.utils.async_utils import SKIPPED, map_bounded, run_sync
 
-load_dotenv()
-
-from src.tools.file_tools import read_file_safe, write_file_safe
+from src.tools.file_tools import delete_file_safe, read_file_safe, write_file_safe
+from src.tools.pytest_tool import run_test_file_async
 
 try:
     from src.prompts.fixer_prompts import FIXER_SYSTEM_PROMPT
@@ -34,40 +41,51 @@ Retourne UNIQUEMENT le code Python corrigé, sans explication ni commentaire.
 Ne mets pas de balises ```python, juste le code brut."""
 
 
+# Nouvelles générations d'un fichier de tests qui échoue isolément, avant de l'abandonner
+TEST_REGENERATIONS = 1
+
+
 class FixerAgent:
     """
     Agent responsable de la correction du code et de la génération de contenu.
     Applique les corrections basées sur le rapport d'audit ET peut créer des tests/documentation.
     """
     
-    def __init__(self, model_name: str = "gemini-2.0-flash-exp"):
+    def __init__(self, model_name: str = "gemini-2.0-flash-exp", concurrency: int = 1):
         """
         Initialise l'agent correcteur.
         
         Args:
             model_name: Nom du modèle LLM à utiliser
+            concurrency: Nombre de fichiers corrigés simultanément (1 = séquentiel)
         """
+        self.concurrency = max(1, concurrency)
+        # Le routeur peut attribuer un modèle propre à chaque agent (--fixer_model)
+        model_name = get_model_router().agent_model("Fixer_Agent", model_name)
         self.model_name = model_name
+        self.temperature = 0.2
         
-        api_key = os.getenv("GOOGLE_API_KEY")
-        
-        if not api_key:
-            raise ValueError(
-                " Clé API Google non trouvée. "
-                "Assurez-vous d'avoir GOOGLE_API_KEY dans votre fichier .env"
-            )
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            google_api_key=api_key,
-            temperature=0.2,
-            convert_system_message_to_human=True 
-        )
+        # Backend configuré (client Google partagé entre agents, stub local, ...)
+        self.llm = get_backend(model_name, self.temperature)
         print(f" FixerAgent initialisé avec le modèle : {model_name}")
     
     def fix(self, audit_report: Dict, target_dir: str) -> Dict:
+        """
+        Corrige les fichiers selon le rapport d'audit (enveloppe synchrone de fix_async).
+        
+        Args:
+            audit_report: Rapport généré par l'Auditor
+            target_dir: Dossier contenant les fichiers à corriger
+            
+        Returns:
+            Dict: Résumé des corrections effectuées
+        """
+        return run_sync(self.fix_async(audit_report, target_dir))
+    
+    async def fix_async(self, audit_report: Dict, target_dir: str) -> Dict:
         """
         Corrige les fichiers selon le rapport d'audit (ActionType.FIX).
+        Jusqu'à `concurrency` fichiers sont corrigés simultanément.
         
         Args:
             audit_report: Rapport généré par l'Auditor
@@ -92,87 +110,265 @@ class FixerAgent:
             print(f" {len(issues)} problème(s) à corriger")
             
             
-            issues_by_file = self._group_issues_by_file(issues)
+            issues_by_file = list(self._group_issues_by_file(issues).items())
             
-            files_fixed = []
-            total_fixes = 0
+            results = await map_bounded(
+                lambda item: self._fix_file_async(item[0], item[1], target_dir),
+                issues_by_file,
+                limit=self.concurrency,
+                stop_on=(BudgetExceeded, CircuitOpenError, OperationCancelled)
+            )
+            return self._fix_summary(issues_by_file, results)
             
+        except Exception as e:
+            self._log_fix_failure(target_dir, e)
+            raise
+    
+    async def fix_stream(self, queue: asyncio.Queue, target_dir: str) -> Dict:
+        """
+        Mode pipeline : corrige les fichiers au fil de leur arrivée dans la file, avec jusqu'à
+        `concurrency` fichiers simultanés. La file est bornée par l'appelant : tant que les
+        corrections ont du retard, le producteur (l'Auditor) attend.
+        
+        Args:
+            queue: File de tuples (fichier, problèmes), terminée par None
+            target_dir: Dossier contenant les fichiers à corriger
             
-            for filename, file_issues in issues_by_file.items():
-                print(f"\n Correction de : {filename}")
-                
-                filepath = os.path.join(target_dir, filename)
-                
-                try:
-                    original_content = read_file_safe(filepath, target_dir)
-                except Exception as e:
-                    print(f"  Impossible de lire {filename} : {str(e)}")
+        Returns:
+            Dict: Résumé des corrections effectuées (comme fix_async)
+        """
+        print(f"\n [FIXER] Corrections en flux : en attente des rapports de l'Auditor...")
+        
+        received = []
+        results = {}
+        stopped = False
+        
+        async def worker():
+            nonlocal stopped
+            while True:
+                item = await queue.get()
+                if item is None:
+                    # Fin du flux : relayée aux autres workers
+                    await queue.put(None)
+                    return
+                filename, file_issues = item
+                if not file_issues:
                     continue
-                
-                
-                user_prompt = self._build_fix_prompt(
-                    filename=filename,
-                    original_content=original_content,
-                    issues=file_issues
-                )
-                
-                
-                print(f"   Génération du code corrigé...")
-                fixed_content = self._call_llm(user_prompt)
-                fixed_content = self._clean_code_response(fixed_content)
-                
-                
-                try:
-                    write_file_safe(filepath, fixed_content, target_dir)
-                    print(f"   Fichier corrigé et sauvegardé")
-                    files_fixed.append(filename)
-                    total_fixes += len(file_issues)
-                except Exception as e:
-                    print(f"   Erreur lors de l'écriture de {filename} : {str(e)}")
+                index = len(received)
+                received.append((filename, file_issues))
+                if stopped:
+                    # La file est vidée sans corriger : le producteur ne doit pas rester bloqué
+                    results[index] = SKIPPED
                     continue
-                
-                
-                log_experiment(
-                    agent_name="Fixer_Agent",
-                    model_used=self.model_name,
-                    action=ActionType.FIX,  
-                    details={
-                        "file_analyzed": filename,
-                        "input_prompt": user_prompt,
-                        "output_response": fixed_content[:500] + "..." if len(fixed_content) > 500 else fixed_content,
-                        "issues_found": len(file_issues),  
-                        "issues_types": [issue.get("type") for issue in file_issues]
-                    },
-                    status="SUCCESS"
-                )
-            
-            result = {
-                "files_fixed": files_fixed,
-                "total_fixes": total_fixes,
-                "status": "completed"
+                try:
+                    results[index] = await self._fix_file_async(filename, file_issues, target_dir)
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    results[index] = e
+                    stopped = stopped or isinstance(e, (BudgetExceeded, CircuitOpenError, OperationCancelled))
+        
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        
+        if not received:
+            print(" Aucun problème à corriger.")
+            return {
+                "files_fixed": [],
+                "total_fixes": 0,
+                "status": "no_issues"
             }
+        try:
+            return self._fix_summary(received, [results[i] for i in range(len(received))])
+        except Exception as e:
+            self._log_fix_failure(target_dir, e)
+            raise
+    
+    def _fix_summary(self, issues_by_file: List, results: List) -> Dict:
+        """
+        Résume les corrections dans l'ordre des fichiers.
+        
+        Args:
+            issues_by_file: Couples (fichier, problèmes) traités
+            results: Résultat de _fix_file_async pour chaque fichier (ou exception levée, ou SKIPPED)
+            
+        Returns:
+            Dict: files_fixed, total_fixes, status
+        """
+        files_fixed = []
+        total_fixes = 0
+        budget_exhausted = False
+        degraded = False
+        cancelled = False
+        
+        for (filename, file_issues), result in zip(issues_by_file, results):
+            if result is SKIPPED:
+                continue
+            if isinstance(result, BudgetExceeded):
+                if not budget_exhausted:
+                    print(f" [FIXER] {str(result)} : corrections interrompues à {filename}")
+                budget_exhausted = True
+            elif isinstance(result, CircuitOpenError):
+                # Mode dégradé : aucune réécriture sans LLM, les fichiers restent inchangés
+                if not degraded:
+                    print(f" [FIXER] {str(result)} : corrections suspendues")
+                degraded = True
+            elif isinstance(result, OperationCancelled):
+                if not cancelled:
+                    print(f" [FIXER] {str(result)} : corrections interrompues à {filename}")
+                cancelled = True
+            elif isinstance(result, BaseException):
+                raise result
+            elif result:
+                files_fixed.append(filename)
+                total_fixes += len(file_issues)
+        
+        result = {
+            "files_fixed": files_fixed,
+            "total_fixes": total_fixes,
+            "status": (
+                "budget_exhausted" if budget_exhausted else "degraded" if degraded
+                else "cancelled" if cancelled else "completed"
+            )
+        }
+        
+        print(f"\n [FIXER] Corrections terminées : {total_fixes} problème(s) corrigé(s) dans {len(files_fixed)} fichier(s)")
+        return result
+    
+    def _log_fix_failure(self, target_dir: str, e: Exception):
+        """Logue l'échec global des corrections."""
+        print(f" [FIXER] Erreur lors des corrections : {str(e)}")
+        log_experiment(
+            agent_name="Fixer_Agent",
+            model_used=self.model_name,
+            action=ActionType.DEBUG,
+            details={
+                "file_analyzed": "system_error",
+                "input_prompt": f"Correction des fichiers dans {target_dir}",
+                "output_response": f"Erreur : {str(e)}",
+                "issues_found": 1,
+                "error_type": type(e).__name__
+            },
+            status="FAILURE"
+        )
+    
+    async def _fix_file_async(self, filename: str, file_issues: List[Dict], target_dir: str) -> bool:
+        """
+        Corrige un fichier et logue la correction.
+        
+        Args:
+            filename: Fichier à corriger
+            file_issues: Problèmes du fichier
+            target_dir: Dossier du fichier
             
-            print(f"\n [FIXER] Corrections terminées : {total_fixes} problème(s) corrigé(s) dans {len(files_fixed)} fichier(s)")
-            return result
+        Returns:
+            bool: True si le fichier corrigé a été écrit
             
+        Raises:
+            CircuitOpenError: Si le backend LLM est indisponible (mode dégradé)
+            BudgetExceeded, OperationCancelled: Budget épuisé ou échéance atteinte
+        """
+        if not llm_available():
+            raise CircuitOpenError("Backend LLM indisponible", status=503)
+        
+        print(f"\n Correction de : {filename}")
+        
+        filepath = os.path.join(target_dir, filename)
+        
+        try:
+            original_content = read_file_safe(filepath, target_dir)
         except Exception as e:
-            print(f" [FIXER] Erreur lors des corrections : {str(e)}")
-            log_experiment(
-                agent_name="Fixer_Agent",
-                model_used=self.model_name,
-                action=ActionType.DEBUG,
-                details={
-                    "file_analyzed": "system_error",
-                    "input_prompt": f"Correction des fichiers dans {target_dir}",
-                    "output_response": f"Erreur : {str(e)}",
-                    "issues_found": 1,
-                    "error_type": type(e).__name__
-                },
-                status="FAILURE"
-            )
+            print(f"  Impossible de lire {filename} : {str(e)}")
+            return False
+        
+        
+        user_prompt = self._build_fix_prompt(
+            filename=filename,
+            original_content=original_content,
+            issues=file_issues
+        )
+        
+        
+        model_name = get_model_router().model_for_file("Fixer_Agent", filename, self.model_name)
+        print(f"   Génération du code corrigé...")
+        fixed_content = await self._call_llm_async(user_prompt, model_name=model_name)
+        fixed_content = self._clean_code_response(fixed_content)
+        
+        
+        try:
+            write_file_safe(filepath, fixed_content, target_dir)
+            print(f"   Fichier corrigé et sauvegardé")
+        except Exception as e:
+            print(f"   Erreur lors de l'écriture de {filename} : {str(e)}")
+            return False
+        
+        
+        log_experiment(
+            agent_name="Fixer_Agent",
+            model_used=model_name,
+            action=ActionType.FIX,  
+            details={
+                "file_analyzed": filename,
+                "input_prompt": user_prompt,
+                "output_response": fixed_content[:500] + "..." if len(fixed_content) > 500 else fixed_content,
+                "issues_found": len(file_issues),  
+                "issues_types": [issue.get("type") for issue in file_issues]
+            },
+            status="SUCCESS"
+        )
+        return True
+    
+    async def generate_validated_tests_async(self, filename: str, target_dir: str):
+        """
+        Génère les tests d'un fichier puis les exécute isolément (sans attendre le Judge).
+        Un fichier de tests qui échoue est régénéré avec l'erreur obtenue, puis supprimé
+        s'il échoue encore : seul un fichier qui passe est conservé, un test cassé ne coûte
+        pas une itération complète du Swarm. L'abandon et ses échecs sont consignés dans les logs.
+        
+        Args:
+            filename: Nom du fichier source
+            target_dir: Dossier cible
+            
+        Returns:
+            str: Nom du fichier de tests conservé, None s'il a été abandonné
+        """
+        test_filename = f"test_{filename}"
+        test_filepath = os.path.join(target_dir, test_filename)
+        feedback = None
+        
+        try:
+            for attempt in range(1 + TEST_REGENERATIONS):
+                await asyncio.to_thread(self.generate_tests, filename, target_dir, feedback)
+                result = await run_test_file_async(test_filepath)
+                if result["success"]:
+                    print(f"   {test_filename} validé isolément ({result['passed']} test(s) réussi(s))")
+                    return test_filename
+                feedback = result["output"]
+                print(f"   {test_filename} échoue isolément (tentative {attempt + 1}/{1 + TEST_REGENERATIONS})")
+        except BaseException:
+            # Régénération interrompue (budget, échéance, erreur) : la version en échec n'est pas gardée
+            if feedback is not None:
+                delete_file_safe(test_filepath, target_dir)
             raise
+        
+        delete_file_safe(test_filepath, target_dir)
+        print(f"   {test_filename} abandonné et supprimé ({result['failed']} test(s) en échec)")
+        log_experiment(
+            agent_name="Fixer_Agent",
+            model_used=self.model_name,
+            action=ActionType.DEBUG,
+            details={
+                "file_analyzed": test_filename,
+                "input_prompt": f"Validation isolée de {test_filename} (pytest {test_filename})",
+                "output_response": feedback[-500:],
+                "issues_found": result["failed"],
+                "source_file": filename,
+                "discarded": True
+            },
+            status="FAILURE"
+        )
+        return None
     
-    def generate_tests(self, filename: str, target_dir: str) -> str:
+    def generate_tests(self, filename: str, target_dir: str, feedback: str = None) -> str:
         """
         Génère des tests unitaires pour un fichier (ActionType.GENERATION).
         CRÉE un NOUVEAU fichier qui n'existait pas.
@@ -180,6 +376,7 @@ class FixerAgent:
         Args:
             filename: Nom du fichier source
             target_dir: Dossier cible
+            feedback: Sortie de pytest de la version précédente des tests (régénération)
             
         Returns:
             str: Contenu des tests générés
@@ -209,9 +406,18 @@ INSTRUCTIONS :
 6. Import toutes les dépendances nécessaires
 
 Retourne UNIQUEMENT le code des tests, sans explication."""
+            if feedback:
+                prompt += f"""
+
+LA VERSION PRÉCÉDENTE DE CES TESTS A ÉCHOUÉ :
+{feedback[-1500:]}
+
+Corrige uniquement les erreurs des tests eux-mêmes (imports, noms, fixtures, syntaxe).
+Les valeurs attendues doivent décrire le comportement voulu du code (docstrings, noms, usage),
+pas sa sortie actuelle : si un test révèle un bug, garde-le tel quel plutôt que de l'adapter au code."""
             
             
-            test_content = self._call_llm(prompt)
+            test_content = self._call_llm(prompt, priority=PRIORITY_GENERATION)
             test_content = self._clean_code_response(test_content)
             
             
@@ -230,7 +436,8 @@ Retourne UNIQUEMENT le code des tests, sans explication."""
                     "output_response": test_content[:500] + "..." if len(test_content) > 500 else test_content,
                     "issues_found": 0,  
                     "source_file": filename,
-                    "content_type": "unit_tests"
+                    "content_type": "unit_tests",
+                    **({"regeneration": True} if feedback else {})
                 },
                 status="SUCCESS"
             )
@@ -302,7 +509,7 @@ Crée un README.md avec :
 
 Format Markdown strict. Sois concis mais complet."""
             
-            doc_content = self._call_llm(prompt)
+            doc_content = self._call_llm(prompt, priority=PRIORITY_GENERATION, expect=EXPECT_TEXT)
             
             
             doc_filename = f"README_{filename.replace('.py', '')}.md"
@@ -359,6 +566,7 @@ Format Markdown strict. Sois concis mais complet."""
             str: Code corrigé
         """
         print(f"\n [FIXER] Nouvelle tentative de correction pour : {os.path.basename(filepath)}")
+        model_name = get_model_router().model_for_file("Fixer_Agent", os.path.basename(filepath), self.model_name)
         
         try:
             original_content = read_file_safe(filepath, target_dir)
@@ -376,14 +584,14 @@ CODE ACTUEL :
 
 Analyse l'erreur et corrige le code. Retourne uniquement le code Python corrigé."""
             
-            fixed_content = self._call_llm(retry_prompt)
+            fixed_content = self._call_llm(retry_prompt, model_name=model_name)
             fixed_content = self._clean_code_response(fixed_content)
             
             write_file_safe(filepath, fixed_content, target_dir)
             
             log_experiment(
                 agent_name="Fixer_Agent",
-                model_used=self.model_name,
+                model_used=model_name,
                 action=ActionType.FIX,
                 details={
                     "file_analyzed": os.path.basename(filepath),
@@ -404,7 +612,7 @@ Analyse l'erreur et corrige le code. Retourne uniquement le code Python corrigé
             
             log_experiment(
                 agent_name="Fixer_Agent",
-                model_used=self.model_name,
+                model_used=model_name,
                 action=ActionType.FIX,
                 details={
                     "file_analyzed": os.path.basename(filepath),
@@ -458,22 +666,44 @@ INSTRUCTIONS :
 
 Retourne uniquement le code Python corrigé, sans explication."""
     
-    def _call_llm(self, prompt: str) -> str:
-        """Appelle le LLM."""
-        messages = [
-            {"role": "system", "content": FIXER_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt}
-        ]
-        
-        response = self.llm.invoke(messages)
-        
-        if isinstance(response.content, list):
-            content = response.content[0] if response.content else ""
-            if hasattr(content, 'text'):
-                return content.text
-            return str(content)
-        
-        return response.content
+    def _call_llm(self, prompt: str, priority: int = PRIORITY_FIX, expect: str = EXPECT_CODE,
+                  model_name: str = None) -> str:
+        """
+        Appelle le LLM (les générations de tests/docs passent après les corrections).
+        model_name permet d'utiliser un modèle escaladé pour un fichier difficile.
+        Le cache LLM n'est pas consulté : une correction rejetée doit pouvoir être
+        régénérée différemment au lieu d'être resservie à l'identique.
+        """
+        model_name = model_name or self.model_name
+        llm = self.llm if model_name == self.model_name else get_backend(model_name, self.temperature)
+        return invoke_chat(
+            llm,
+            system_prompt=FIXER_SYSTEM_PROMPT,
+            prompt=prompt,
+            agent_name="Fixer_Agent",
+            model_name=model_name,
+            temperature=self.temperature,
+            priority=priority,
+            expect=expect,
+            use_cache=False
+        )
+    
+    async def _call_llm_async(self, prompt: str, priority: int = PRIORITY_FIX, expect: str = EXPECT_CODE,
+                              model_name: str = None) -> str:
+        """Variante asynchrone de _call_llm."""
+        model_name = model_name or self.model_name
+        llm = self.llm if model_name == self.model_name else get_backend(model_name, self.temperature)
+        return await invoke_chat_async(
+            llm,
+            system_prompt=FIXER_SYSTEM_PROMPT,
+            prompt=prompt,
+            agent_name="Fixer_Agent",
+            model_name=model_name,
+            temperature=self.temperature,
+            priority=priority,
+            expect=expect,
+            use_cache=False
+        )
     
     def _clean_code_response(self, response: str) -> str:
         """Nettoie la réponse du LLM (enlève les balises markdown)."""
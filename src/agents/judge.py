@@ -5,19 +5,22 @@ Rôle : Exécuter les tests unitaires et valider que le code fonctionne.
 
 import os
 from typing import Dict, List, Tuple
-from langchain_google_genai import ChatGoogleGenerativeAI
 from src.utils.logger import log_experiment, ActionType
-from dotenv import load_dotenv
-
-load_dotenv()
+from src.llm.gateway import invoke_chat, invoke_chat_async
+from src.llm.streaming import EXPECT_JSON
+from src.llm.backends import get_backend
+from src.llm.router import get_model_router
+from src.utils.json_repair import JSONRepairError, parse_json_lenient
+from src.llm.compression import compression_report, is_compression_enabled, record_compression, trim_traceback
+from src.utils.async_utils import run_sync
 
 try:
-    from src.tools.pytest_tool import run_pytest
+    from src.tools.pytest_tool import run_pytest_async
     from src.tools.file_tools import read_file_safe
 except ImportError:
     print("  ATTENTION : Les outils du Toolsmith ne sont pas encore disponibles.")
     print("   Les fonctions suivantes doivent être créées :")
-    print("   - src/tools/pytest_tool.py : run_pytest()")
+    print("   - src/tools/pytest_tool.py : run_pytest_async()")
     print("   - src/tools/file_tools.py : read_file_safe()")
 
 try:
@@ -59,24 +62,28 @@ class JudgeAgent:
         Args:
             model_name: Nom du modèle LLM à utiliser (recommandé: gemini-2.0-flash-exp)
         """
+        # Le routeur peut attribuer un modèle propre à chaque agent (--judge_model)
+        model_name = get_model_router().agent_model("Judge_Agent", model_name)
         self.model_name = model_name
+        self.temperature = 0.1
         
-        api_key = os.getenv("GOOGLE_API_KEY")
-        
-        if not api_key:
-            raise ValueError(
-                " Clé API Google non trouvée. "
-                "Assurez-vous d'avoir GOOGLE_API_KEY dans votre fichier .env"
-            )
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            google_api_key=api_key,
-            temperature=0.1,
-        )
+        # Backend configuré (client Google partagé entre agents, stub local, ...)
+        self.llm = get_backend(model_name, self.temperature)
         print(f"  JudgeAgent initialisé avec le modèle : {model_name}")
     
     def test(self, target_dir: str) -> Dict:
+        """
+        Exécute les tests unitaires sur le code (enveloppe synchrone de test_async).
+        
+        Args:
+            target_dir: Dossier contenant le code à tester (ex: "./sandbox/dataset_inconnu")
+            
+        Returns:
+            Dict: Résultat des tests avec statut et détails
+        """
+        return run_sync(self.test_async(target_dir))
+    
+    async def test_async(self, target_dir: str) -> Dict:
         """
         Exécute les tests unitaires sur le code et logue chaque fichier individuellement.
         
@@ -111,7 +118,7 @@ class JudgeAgent:
             
             #  ÉTAPE 2 : Exécution de pytest sur tout le dossier
             print(" Exécution de pytest...")
-            test_result = run_pytest(target_dir)
+            test_result = await run_pytest_async(target_dir)
             
             passed = test_result.get("passed", 0)
             failed = test_result.get("failed", 0)
@@ -183,7 +190,7 @@ class JudgeAgent:
             #  ÉTAPE 4 : Analyse LLM si des erreurs existent
             if failed > 0:
                 print(f"\n [JUDGE] {failed} test(s) ont échoué - Analyse LLM en cours...")
-                analysis, llm_raw_response = self._analyze_test_failures(errors, target_dir)
+                analysis, llm_raw_response = await self._analyze_test_failures_async(errors, target_dir)
                 
                 # Logger l'analyse LLM globale
                 log_experiment(
@@ -196,7 +203,11 @@ class JudgeAgent:
                         "output_response": llm_raw_response,
                         "issues_found": failed,
                         "recommendations": analysis.get("recommendations", []),
-                        "root_causes": analysis.get("root_causes", [])
+                        "root_causes": analysis.get("root_causes", []),
+                        **({"prompt_compression": compression_report(
+                            self._build_analysis_prompt(errors, compress=False),
+                            self._build_analysis_prompt(errors)
+                        )} if is_compression_enabled() else {})
                     },
                     status="SUCCESS"  #  CORRIGÉ : L'analyse a fonctionné
                 )
@@ -267,7 +278,7 @@ class JudgeAgent:
         
         return file_errors
     
-    def _analyze_test_failures(self, errors: List[str], target_dir: str) -> Tuple[Dict, str]:
+    async def _analyze_test_failures_async(self, errors: List[str], target_dir: str) -> Tuple[Dict, str]:
         """
         Analyse les échecs de tests avec le LLM pour identifier les causes profondes.
         
@@ -280,7 +291,9 @@ class JudgeAgent:
         """
         try:
             analysis_prompt = self._build_analysis_prompt(errors)
-            llm_response = self._call_llm(analysis_prompt)
+            if is_compression_enabled():
+                record_compression("Judge_Agent", self._build_analysis_prompt(errors, compress=False), analysis_prompt)
+            llm_response = await self._call_llm_async(analysis_prompt)
             analysis = self._parse_analysis_response(llm_response)
             return analysis, llm_response
         except Exception as e:
@@ -291,10 +304,22 @@ class JudgeAgent:
                 "severity": "unknown"
             }, f"Erreur : {str(e)}"
     
-    def _build_analysis_prompt(self, errors: List[str]) -> str:
-        """Construit le prompt pour analyser les erreurs avec le LLM."""
+    def analysis_prompts(self, errors: List[str]) -> Tuple[str, str]:
+        """
+        Construit le prompt d'analyse des erreurs sans et avec compression, sans appeler le LLM
+        (mesure du gain de la compression).
+        
+        Returns:
+            Tuple[str, str]: Prompt brut, prompt compressé
+        """
+        return self._build_analysis_prompt(errors, compress=False), self._build_analysis_prompt(errors, compress=True)
+    
+    def _build_analysis_prompt(self, errors: List[str], compress: bool = None) -> str:
+        """Construit le prompt pour analyser les erreurs avec le LLM (tracebacks raccourcis si compress)."""
+        if compress is None:
+            compress = is_compression_enabled()
         errors_text = "\n\n".join([
-            f"ERREUR {i+1}:\n{error}" 
+            f"ERREUR {i+1}:\n{trim_traceback(error) if compress else error}" 
             for i, error in enumerate(errors[:5])  # Limiter à 5 erreurs
         ])
         
@@ -319,25 +344,30 @@ Réponds UNIQUEMENT avec du JSON valide."""
     
     def _call_llm(self, prompt: str) -> str:
         """Appelle le LLM avec le system prompt et le user prompt."""
-        messages = [
-            {"role": "system", "content": JUDGE_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt}
-        ]
-        response = self.llm.invoke(messages)
-        
-        # Gestion des différents formats de réponse
-        if isinstance(response.content, list):
-            content = response.content[0] if response.content else ""
-            if hasattr(content, 'text'):
-                return content.text
-            return str(content)
-        
-        return response.content
+        return invoke_chat(
+            self.llm,
+            system_prompt=JUDGE_SYSTEM_PROMPT,
+            prompt=prompt,
+            agent_name="Judge_Agent",
+            model_name=self.model_name,
+            temperature=self.temperature,
+            expect=EXPECT_JSON
+        )
+    
+    async def _call_llm_async(self, prompt: str) -> str:
+        """Variante asynchrone de _call_llm."""
+        return await invoke_chat_async(
+            self.llm,
+            system_prompt=JUDGE_SYSTEM_PROMPT,
+            prompt=prompt,
+            agent_name="Judge_Agent",
+            model_name=self.model_name,
+            temperature=self.temperature,
+            expect=EXPECT_JSON
+        )
     
     def _parse_analysis_response(self, response: str) -> Dict:
         """Parse la réponse JSON du LLM."""
-        import json
-        
         if not isinstance(response, str):
             print(f"  Réponse LLM inattendue (type: {type(response)})")
             return {
@@ -347,18 +377,10 @@ Réponds UNIQUEMENT avec du JSON valide."""
             }
         
         try:
-            # Nettoyer la réponse des balises markdown
-            cleaned = response.strip()
-            if cleaned.startswith("```json"):
-                cleaned = cleaned[7:]
-            if cleaned.startswith("```"):
-                cleaned = cleaned[3:]
-            if cleaned.endswith("```"):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            # Parser le JSON
-            data = json.loads(cleaned)
+            # Extraire et réparer le JSON (prose, balises markdown, virgules finales...)
+            data, _ = parse_json_lenient(response)
+            if not isinstance(data, dict):
+                raise JSONRepairError("Rapport JSON attendu")
             
             # Normaliser la structure
             return {
@@ -366,7 +388,7 @@ Réponds UNIQUEMENT avec du JSON valide."""
                 "root_causes": [data.get("root_cause", "Cause inconnue")] if isinstance(data.get("root_cause"), str) else data.get("root_causes", ["Cause inconnue"]),
                 "severity": data.get("severity", "medium")
             }
-        except json.JSONDecodeError as e:
+        except JSONRepairError as e:
             print(f"  Erreur de parsing JSON : {str(e)}")
             return {
                 "recommendations": [response[:200]] if response else ["Corriger les erreurs"],
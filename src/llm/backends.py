@@ -0,0 +1,321 @@
+"""
+Backends LLM interchangeables
+Rôle : Découpler les agents du fournisseur. Un backend est tout objet exposant
+invoke(messages) ; la réponse peut être un message LangChain ou une simple chaîne.
+
+Backends disponibles :
+- "google" : ChatGoogleGenerativeAI partagé via le registre (défaut)
+- "stub"   : réponses locales déterministes, dans le processus
+- "http"   : serveur stub local (python -m src.llm.stub_server) interrogé en HTTP
+- "replay" : réponses d'une cassette enregistrée (voir src/llm/cassette.py)
+"""
+
+import ast
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+from src.llm.registry import get_chat_model
+
+LLM_BACKENDS = ("google", "stub", "http", "replay")
+
+# URL par défaut du serveur stub
+STUB_SERVER_URL = "http://127.0.0.1:8765"
+
+# Taille des morceaux renvoyés par le stub en streaming (caractères)
+STUB_CHUNK_CHARS = 32
+
+_backend_name = os.getenv("LLM_BACKEND", "google").lower()
+_backend_options = {}
+_shared_backend = None
+_stub_lock = threading.Lock()
+
+
+class LLMBackendError(Exception):
+    """
+    Erreur d'un backend LLM.
+
+    Attributes:
+        status: Code HTTP équivalent (ex: 429, 503), None si inconnu
+        retry_after: Délai suggéré avant une nouvelle tentative (secondes), None si absent
+    """
+
+    def __init__(self, message: str, status: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class StubBackend:
+    """
+    Backend local déterministe : produit un rapport d'audit JSON valide, du code
+    "corrigé" plausible et des analyses de tests, sans réseau ni clé API.
+    Latence et taux d'erreur configurables pour les mesures de débit.
+    """
+
+    def __init__(self, latency_s: float = 0.0, jitter_s: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            latency_s: Latence fixe ajoutée à chaque appel
+            jitter_s: Latence aléatoire supplémentaire (0 à jitter_s)
+            error_rate: Proportion d'appels qui échouent (erreur 503 simulée)
+            seed: Graine du générateur (séquence d'erreurs/latences reproductible)
+        """
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def invoke(self, messages: List[Dict]) -> str:
+        """Simule un appel LLM (latence, erreur éventuelle) et retourne la réponse."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_s + (self._rng.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+            fail = self._rng.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise LLMBackendError("503 Service Unavailable (erreur injectée par le stub)", status=503)
+
+        return generate_stub_response(messages)
+
+    def stream(self, messages: List[Dict]):
+        """Comme invoke, mais renvoie la réponse par morceaux (la latence précède le premier morceau)."""
+        text = self.invoke(messages)
+        for i in range(0, len(text), STUB_CHUNK_CHARS):
+            yield text[i:i + STUB_CHUNK_CHARS]
+
+
+class HttpBackend:
+    """Client du serveur stub local (voir src/llm/stub_server.py)."""
+
+    def __init__(self, url: str = STUB_SERVER_URL, model_name: str = "stub",
+                 temperature: float = 0.0, timeout: float = 60.0):
+        self.url = url.rstrip("/")
+        self.model_name = model_name
+        self.temperature = temperature
+        self.timeout = timeout
+
+    def invoke(self, messages: List[Dict]) -> str:
+        """Envoie les messages au serveur et retourne le texte de la réponse."""
+        payload = json.dumps({
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "messages": messages,
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.url}/v1/chat", data=payload, headers={"Content-Type": "application/json"}
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))["content"]
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After") if e.headers else None
+            raise LLMBackendError(
+                f"{e.code} {e.reason}",
+                status=e.code,
+                retry_after=float(retry_after) if retry_after else None
+            ) from e
+        except urllib.error.URLError as e:
+            raise LLMBackendError(f"Serveur LLM injoignable ({self.url}) : {e.reason}") from e
+
+
+def configure_backend(name: str = None, **options):
+    """
+    Choisit le backend utilisé par les agents créés ensuite.
+
+    Args:
+        name: "google", "stub", "http" ou "replay"
+        **options: Options du backend (stub : latency_s, jitter_s, error_rate, seed ; http : url, timeout ;
+            replay : path)
+
+    Raises:
+        ValueError: Si le backend est inconnu
+    """
+    global _backend_name, _backend_options, _shared_backend
+
+    if name is not None:
+        name = name.lower()
+        if name not in LLM_BACKENDS:
+            raise ValueError(f" Backend LLM inconnu : '{name}'. Backends disponibles : {LLM_BACKENDS}")
+        _backend_name = name
+
+    _backend_options = options
+    _shared_backend = None
+
+
+def get_backend_name() -> str:
+    """Retourne le nom du backend configuré."""
+    return _backend_name
+
+
+def get_backend(model_name: str, temperature: float):
+    """
+    Retourne le client à utiliser pour (modèle, température) selon le backend configuré.
+
+    Args:
+        model_name: Nom du modèle
+        temperature: Température d'échantillonnage
+
+    Returns:
+        Objet exposant invoke(messages)
+    """
+    global _shared_backend
+
+    if _backend_name == "stub":
+        with _stub_lock:
+            if _shared_backend is None:
+                _shared_backend = StubBackend(**_backend_options)
+            return _shared_backend
+
+    if _backend_name == "replay":
+        with _stub_lock:
+            if _shared_backend is None:
+                # Import local : cassette dépend de ce module
+                from src.llm.cassette import ReplayBackend
+                _shared_backend = ReplayBackend(_backend_options["path"])
+            return _shared_backend
+
+    if _backend_name == "http":
+        return HttpBackend(
+            url=_backend_options.get("url", STUB_SERVER_URL),
+            model_name=model_name,
+            temperature=temperature,
+            timeout=_backend_options.get("timeout", 60.0)
+        )
+
+    return get_chat_model(model_name, temperature)
+
+
+# --- Génération des réponses du stub ---
+
+def generate_stub_response(messages: List[Dict]) -> str:
+    """
+    Produit une réponse plausible selon le type de demande reconnu dans le prompt.
+
+    Args:
+        messages: Messages système + utilisateur
+
+    Returns:
+        str: Réponse au format attendu par l'agent appelant
+    """
+    prompt = messages[-1]["content"] if messages else ""
+    filename = _extract_field(prompt, "FICHIER")
+    code = _extract_code(prompt)
+
+    if "Génère des tests unitaires" in prompt:
+        return _stub_tests(filename)
+    if "Génère une documentation" in prompt:
+        return f"# {filename}\n\nDocumentation générée localement (backend stub).\n"
+    if "erreurs de tests pytest" in prompt:
+        return json.dumps({
+            "recommendations": ["Corriger les assertions en échec"],
+            "root_causes": ["Comportement différent de celui attendu par les tests"],
+            "severity": "medium",
+        }, ensure_ascii=False)
+    if code is not None and ("Corrige" in prompt or "corrige" in prompt):
+        return _stub_fix(code, filename)
+    if "=== FICHIER : " in prompt:
+        return _stub_pack_audit(prompt)
+    if "SCORE PYLINT" in prompt:
+        return _stub_audit(filename, code or "")
+
+    return "{}"
+
+
+def _extract_field(prompt: str, label: str) -> str:
+    match = re.search(rf"{label} : (\S+)", prompt)
+    return match.group(1) if match else "module.py"
+
+
+def _extract_code(prompt: str):
+    match = re.search(r"```python\n(.*?)```", prompt, re.S)
+    return match.group(1) if match else None
+
+
+def _stub_audit(filename: str, code: str) -> str:
+    """Rapport d'audit : signale les fonctions sans docstring et les erreurs de syntaxe."""
+    issues = []
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        issues.append({
+            "file": filename, "line": e.lineno or 0, "severity": "high",
+            "type": "syntax_error", "message": f"Erreur de syntaxe : {e.msg}",
+        })
+    else:
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) \
+                    and ast.get_docstring(node) is None:
+                issues.append({
+                    "file": filename, "line": node.lineno, "severity": "low",
+                    "type": "missing_docstring", "message": f"'{node.name}' n'a pas de docstring",
+                })
+
+    return json.dumps({
+        "files_analyzed": [filename],
+        "total_issues": len(issues),
+        "issues": issues,
+        "recommendations": ["Ajouter des docstrings"] if issues else [],
+    }, ensure_ascii=False)
+
+
+def _stub_pack_audit(prompt: str) -> str:
+    """Rapport d'audit groupé : un rapport par section "=== FICHIER : x ===", fusionnés."""
+    reports = [
+        json.loads(_stub_audit(filename, _extract_code(section) or ""))
+        for filename, section in re.findall(r"=== FICHIER : (\S+) ===\n(.*?)(?==== FICHIER : |\Z)", prompt, re.S)
+    ]
+    issues = [issue for report in reports for issue in report["issues"]]
+    return json.dumps({
+        "files_analyzed": [name for report in reports for name in report["files_analyzed"]],
+        "total_issues": len(issues),
+        "issues": issues,
+        "recommendations": ["Ajouter des docstrings"] if issues else [],
+    }, ensure_ascii=False)
+
+
+def _stub_fix(code: str, filename: str) -> str:
+    """Code "corrigé" : ajoute une docstring aux fonctions/classes qui n'en ont pas."""
+    lines = code.rstrip("\n").split("\n")
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code
+
+    targets = [
+        node for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        and ast.get_docstring(node) is None and node.body
+    ]
+    # Insertion de bas en haut pour conserver les numéros de ligne
+    for node in sorted(targets, key=lambda n: n.body[0].lineno, reverse=True):
+        first = lines[node.body[0].lineno - 1]
+        indent = first[:len(first) - len(first.lstrip())]
+        if node.body[0].lineno == node.lineno:
+            continue  # corps sur la même ligne que la définition
+        lines.insert(node.body[0].lineno - 1, f'{indent}"""{node.name} ({filename})."""')
+
+    return "\n".join(lines) + "\n"
+
+
+def _stub_tests(filename: str) -> str:
+    module = filename[:-3] if filename.endswith(".py") else filename
+    return (
+        f'"""Tests générés localement pour {filename}."""\n\n'
+        f"import {module}\n\n\n"
+        f"def test_{module}_importable():\n"
+        f'    """Le module s\'importe sans erreur."""\n'
+        f"    assert {module} is not None\n"
+    )
@@ -0,0 +1,192 @@
+"""
+Cache persistant des réponses LLM
+Rôle : Éviter de repayer latence et coût pour un prompt déjà envoyé au même modèle.
+Clé : (modèle, température, prompt système, prompt utilisateur).
+Éviction LRU par nombre d'entrées, taille totale et âge.
+Seuls les appels d'analyse (Auditor, Judge) y passent : les générations du Fixer le contournent.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# Fichier du cache (hors logs/ : ce n'est pas une donnée d'expérience)
+LLM_CACHE_FILE = os.path.join(".cache", "llm_cache.sqlite")
+
+# Limites par défaut
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+LLM_CACHE_MAX_AGE_S = 7 * 24 * 3600
+
+# Fréquence (en écritures) des passes d'éviction
+_EVICTION_EVERY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses (created_at);
+"""
+
+
+class LLMCache:
+    """
+    Cache disque (SQLite) des réponses LLM avec éviction LRU et compteurs hit/miss.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_FILE, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES, max_age_s: float = LLM_CACHE_MAX_AGE_S):
+        """
+        Args:
+            path: Fichier SQLite du cache
+            max_entries: Nombre maximal de réponses conservées
+            max_bytes: Taille totale maximale des réponses (octets)
+            max_age_s: Âge maximal d'une réponse (secondes)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._puts = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, prompt: str) -> str:
+        """Calcule la clé de cache d'un appel."""
+        payload = json.dumps([model, temperature, system_prompt, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retourne la réponse en cache, ou None (absente ou expirée).
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.max_age_s:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        """Enregistre une réponse et déclenche périodiquement l'éviction."""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            self._puts += 1
+            if self._puts % _EVICTION_EVERY == 0:
+                self._evict(now)
+
+    def evict(self):
+        """Applique immédiatement les limites d'âge, de nombre et de taille."""
+        with self._lock, self._conn:
+            self._evict(time.time())
+
+    def _evict(self, now: float):
+        """Éviction sous verrou : expirées d'abord, puis les moins récemment utilisées."""
+        cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_s,))
+        self.evictions += cursor.rowcount
+
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Invalide tout le cache."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        """Compteurs hit/miss/éviction et occupation du cache."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": count,
+            "bytes": total,
+        }
+
+
+_cache = None
+
+
+def configure_llm_cache(enabled: bool = True, path: str = LLM_CACHE_FILE, clear: bool = False,
+                        **limits) -> Optional[LLMCache]:
+    """
+    Active ou désactive le cache LLM du processus.
+
+    Args:
+        enabled: False pour contourner le cache (aucune lecture ni écriture)
+        path: Fichier SQLite du cache
+        clear: Invalider le contenu existant
+        **limits: max_entries, max_bytes, max_age_s
+
+    Returns:
+        Optional[LLMCache]: Cache actif, ou None si désactivé
+    """
+    global _cache
+
+    if not enabled:
+        if clear and os.path.exists(path):
+            LLMCache(path).clear()
+        _cache = None
+        return None
+
+    _cache = LLMCache(path, **limits)
+    if clear:
+        _cache.clear()
+    return _cache
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Retourne le cache actif (None si non configuré ou désactivé)."""
+    return _cache
@@ -0,0 +1,233 @@
+"""
+Cassettes d'échanges LLM (enregistrement / rejeu)
+Rôle : Enregistrer chaque échange LLM d'une exécution puis le rejouer sans réseau,
+pour des benchmarks reproductibles de tout sauf la latence du modèle.
+
+Une cassette est un fichier NDJSON : une ligne par échange, indexée par le hash du prompt utilisateur
+(le prompt système n'apparaît pas dans les logs, il ne fait donc pas partie de la clé).
+
+Usage :
+    python main.py --target_dir ./sandbox/ --record_cassette cassettes/run.jsonl
+    python main.py --target_dir ./sandbox/ --replay_cassette cassettes/run.jsonl
+    python -m src.llm.cassette import logs/experiment_data.json -o cassettes/from_logs.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from src.llm.backends import LLMBackendError
+from src.utils.logger import iter_log_entries
+
+# Longueur des réponses tronquées par le Fixer dans les logs (500 caractères + "...")
+_TRUNCATED_LENGTH = 503
+
+
+def prompt_key(prompt: str) -> str:
+    """Clé d'un échange : SHA-256 du prompt utilisateur."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class CassetteRecorder:
+    """Ajoute les échanges LLM d'une exécution à une cassette NDJSON."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Fichier cassette (créé ou complété)
+        """
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def record(self, agent_name: str, model_name: str, prompt: str, response: str):
+        """Enregistre un échange."""
+        line = json.dumps({
+            "key": prompt_key(prompt),
+            "agent": agent_name,
+            "model": model_name,
+            "prompt": prompt,
+            "response": response,
+        }, ensure_ascii=False) + "\n"
+
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            self.recorded += 1
+
+
+class CassetteMiss(LLMBackendError):
+    """Aucun échange enregistré pour ce prompt."""
+
+
+class ReplayBackend:
+    """
+    Backend servant les réponses d'une cassette par hash de prompt.
+    Si un même prompt a été enregistré plusieurs fois, les réponses sont servies dans l'ordre
+    d'enregistrement (la dernière est ensuite répétée).
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        """
+        Args:
+            paths: Une ou plusieurs cassettes (NDJSON, quelle que soit l'extension)
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        self._responses = defaultdict(list)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        for path in paths:
+            for exchange in iter_log_entries(path):
+                self._responses[exchange["key"]].append(exchange["response"])
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._responses.values())
+
+    def invoke(self, messages: List[Dict]) -> str:
+        """Retourne la réponse enregistrée pour le prompt utilisateur."""
+        prompt = messages[-1]["content"] if messages else ""
+        key = prompt_key(prompt)
+
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                self.misses += 1
+                raise CassetteMiss(f"Aucune réponse enregistrée pour ce prompt (clé {key[:12]})", status=404)
+
+            index = min(self._served[key], len(responses) - 1)
+            self._served[key] += 1
+            self.hits += 1
+            return responses[index]
+
+    def stream(self, messages: List[Dict]):
+        """Rejoue la réponse enregistrée en un seul morceau."""
+        yield self.invoke(messages)
+
+
+def exchanges_from_logs(log_paths: Iterable[str]):
+    """
+    Extrait des logs les échanges LLM réutilisables.
+    Ne retient que les vrais appels LLM réussis dont la réponse n'a pas été tronquée :
+    audits par fichier, corrections/générations non tronquées et analyses globales du Judge.
+
+    Args:
+        log_paths: Fichiers de logs (tableau JSON ou NDJSON)
+
+    Yields:
+        Dict: Échange au format cassette
+    """
+    for path in log_paths:
+        for entry in iter_log_entries(path, rehydrate=True):
+            details = entry.get("details") if isinstance(entry, dict) else None
+            if not isinstance(details, dict) or entry.get("status") != "SUCCESS":
+                continue
+
+            prompt = details.get("input_prompt")
+            response = details.get("output_response")
+            if not isinstance(prompt, str) or not isinstance(response, str) or not response:
+                continue
+
+            if not _is_llm_exchange(entry, details):
+                continue
+            if len(response) == _TRUNCATED_LENGTH and response.endswith("..."):
+                continue
+
+            yield {
+                "key": prompt_key(prompt),
+                "agent": entry.get("agent"),
+                "model": entry.get("model"),
+                "prompt": prompt,
+                "response": response,
+            }
+
+
+def _is_llm_exchange(entry: Dict, details: Dict) -> bool:
+    """Distingue les entrées issues d'un appel LLM des entrées purement informatives."""
+    agent = entry.get("agent")
+    action = entry.get("action")
+
+    if agent == "Auditor_Agent":
+        # Un audit dégradé (pylint seul, backend indisponible) n'a pas interrogé le LLM
+        return (action == "CODE_ANALYSIS" and details.get("file_analyzed") not in (None, "N/A")
+                and not details.get("degraded"))
+    if agent == "Fixer_Agent":
+        return action in ("FIX", "CODE_GEN")
+    if agent == "Judge_Agent":
+        return details.get("file_analyzed") == "global_analysis"
+    return False
+
+
+def import_logs(log_paths: Iterable[str], cassette_path: str) -> int:
+    """
+    Construit une cassette à partir de logs existants.
+
+    Args:
+        log_paths: Fichiers de logs
+        cassette_path: Cassette de sortie (complétée si elle existe)
+
+    Returns:
+        int: Nombre d'échanges importés
+    """
+    os.makedirs(os.path.dirname(cassette_path) or ".", exist_ok=True)
+    count = 0
+    with open(cassette_path, "a", encoding="utf-8") as f:
+        for exchange in exchanges_from_logs(log_paths):
+            f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+_recorder = None
+
+
+def configure_recording(path: str = None):
+    """Active (path) ou désactive (None) l'enregistrement des échanges LLM."""
+    global _recorder
+    _recorder = CassetteRecorder(path) if path else None
+
+
+def get_recorder():
+    """Retourne l'enregistreur actif (None si l'enregistrement est désactivé)."""
+    return _recorder
+
+
+def main():
+    """Point d'entrée CLI."""
+    parser = argparse.ArgumentParser(description="Cassettes d'échanges LLM")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Construit une cassette depuis des logs")
+    import_parser.add_argument("paths", nargs="+", help="Fichiers de logs")
+    import_parser.add_argument("-o", "--output", required=True, help="Cassette de sortie")
+
+    info_parser = subparsers.add_parser("info", help="Résume le contenu d'une cassette")
+    info_parser.add_argument("path", help="Cassette")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        count = import_logs(args.paths, args.output)
+        print(f" {count} échange(s) importé(s) dans {args.output}")
+
+    elif args.command == "info":
+        by_agent = defaultdict(int)
+        keys = set()
+        for exchange in iter_log_entries(args.path):
+            by_agent[exchange.get("agent")] += 1
+            keys.add(exchange["key"])
+        print(f" {sum(by_agent.values())} échange(s), {len(keys)} prompt(s) distinct(s)")
+        for agent, count in sorted(by_agent.items(), key=lambda item: -item[1]):
+            print(f"   {agent:<16} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Disjoncteur du backend LLM
+Rôle : Détecter une panne du fournisseur (échecs consécutifs) et faire échouer immédiatement
+les appels suivants au lieu d'attendre chaque timeout. Pendant l'ouverture, le Swarm passe
+en mode dégradé (audit pylint seul, aucune réécriture par le Fixer). Après un délai, un appel
+de sonde est autorisé : s'il réussit, le disjoncteur se referme.
+"""
+
+import threading
+import time
+
+from src.llm.backends import LLMBackendError
+
+# Nombre d'échecs consécutifs qui ouvrent le disjoncteur (0 = désactivé)
+CIRCUIT_FAILURE_THRESHOLD = 5
+
+# Délai avant d'autoriser un appel de sonde (secondes)
+CIRCUIT_RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(LLMBackendError):
+    """Appel refusé sans être envoyé : le backend LLM est considéré comme indisponible."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur partagé par tous les agents (thread-safe).
+    closed -> open après `failure_threshold` échecs consécutifs ;
+    open -> half_open après `reset_timeout` secondes (une seule sonde à la fois) ;
+    half_open -> closed si la sonde réussit, -> open sinon.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        """
+        Args:
+            failure_threshold: Échecs consécutifs avant ouverture
+            reset_timeout: Délai avant la première sonde (secondes)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    def before_call(self) -> bool:
+        """
+        À appeler avant chaque appel LLM.
+
+        Returns:
+            bool: True si l'appel est la sonde du demi-ouvert (à libérer via release_probe)
+
+        Raises:
+            CircuitOpenError: Si le disjoncteur est ouvert (ou si une sonde est déjà en cours)
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_calls += 1
+            remaining = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(
+            f"Backend LLM indisponible (disjoncteur ouvert, nouvelle sonde dans {remaining:.0f}s)",
+            status=503,
+            retry_after=remaining
+        )
+
+    def record_success(self):
+        """Un appel a abouti : le disjoncteur se referme."""
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Un appel a échoué pour une raison d'infrastructure (réseau, 5xx, quota)."""
+        with self._lock:
+            self._failures += 1
+            probe_failed = self.state == HALF_OPEN
+            self._probe_in_flight = False
+            if probe_failed or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """
+        La sonde s'est terminée sans succès ni panne (requête refusée, annulation) :
+        le disjoncteur reste demi-ouvert et un autre appel pourra servir de sonde.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def allows_calls(self) -> bool:
+        """Indique si un appel serait tenté (fermé, ou sonde possible)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN:
+                return not self._probe_in_flight
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def stats(self) -> dict:
+        """État courant et compteurs."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls,
+            }
+
+
+_breaker = CircuitBreaker()
+
+
+def configure_circuit_breaker(failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                              reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+    """
+    Remplace le disjoncteur partagé.
+
+    Args:
+        failure_threshold: Échecs consécutifs avant ouverture (0 = disjoncteur désactivé)
+        reset_timeout: Délai avant une sonde (secondes)
+    """
+    global _breaker
+    _breaker = CircuitBreaker(failure_threshold, reset_timeout) if failure_threshold > 0 else None
+
+
+def get_circuit_breaker():
+    """Retourne le disjoncteur partagé (None s'il est désactivé)."""
+    return _breaker
+
+
+def llm_available() -> bool:
+    """
+    Indique si les agents doivent solliciter le LLM.
+    False pendant l'ouverture du disjoncteur : les agents passent en mode dégradé.
+    """
+    return _breaker is None or _breaker.allows_calls()
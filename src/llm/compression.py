@@ -0,0 +1,226 @@
+"""
+Compression des prompts de l'Auditor et du Judge
+Rôle : Réduire les tokens redondants envoyés au LLM sans changer ce que le modèle doit voir :
+rapports pylint en lignes compactes (line:symbol:message), code sans espaces superflus
+(numéros de ligne conservés), tracebacks pytest sans cadres répétés. Le gain est mesuré
+pour chaque prompt (tokens avant/après) et agrégé dans le résumé de performance.
+"""
+
+import argparse
+import io
+import re
+import tokenize
+from typing import Dict, List
+
+from src.llm.rate_limiter import estimate_tokens
+from src.utils.perf_metrics import get_run_metrics
+
+# Longueur maximale d'un commentaire conservé tel quel (caractères)
+COMMENT_MAX_CHARS = 80
+
+# Lignes gardées au début et à la fin d'un traceback trop long (la fin porte l'erreur)
+TRACEBACK_HEAD_LINES = 6
+TRACEBACK_TAIL_LINES = 24
+
+# Taille maximale (en lignes) d'un bloc répété recherché dans un traceback
+TRACEBACK_MAX_FRAME_LINES = 8
+
+# Répétitions consécutives à partir desquelles un bloc est replié
+TRACEBACK_MIN_REPEATS = 2
+
+_SEPARATOR = re.compile(r"^\s*(_ ){3,}_?\s*$|^\s*[_=-]{10,}\s*$")
+
+_compression_enabled = False
+
+
+def compact_pylint_rows(issues: List[Dict], limit: int = 10) -> str:
+    """
+    Formate des messages pylint (JSON) en lignes compactes "line:symbol:message".
+
+    Args:
+        issues: Messages pylint (clés line, symbol, message...)
+        limit: Nombre maximal de messages
+
+    Returns:
+        str: Une ligne par message ("aucune" si la liste est vide)
+    """
+    rows = []
+    for issue in issues[:limit]:
+        if not isinstance(issue, dict):
+            rows.append(str(issue))
+            continue
+        symbol = issue.get("symbol") or issue.get("message-id") or issue.get("type", "")
+        rows.append(f"{issue.get('line', 0)}:{symbol}:{issue.get('message', '')}")
+    if len(issues) > limit:
+        rows.append(f"(+{len(issues) - limit} autre(s))")
+    return "\n".join(rows) if rows else "aucune"
+
+
+def minify_code(code: str) -> str:
+    """
+    Retire les espaces non significatifs d'un code Python en conservant ses lignes :
+    espaces de fin de ligne supprimés, commentaires longs tronqués. Le nombre de lignes
+    est inchangé pour que les numéros cités par pylint et par le LLM restent valides.
+
+    Args:
+        code: Code source
+
+    Returns:
+        str: Code minifié
+    """
+    lines = [line.rstrip() for line in code.split("\n")]
+
+    try:
+        comments = [
+            token for token in tokenize.generate_tokens(io.StringIO(code).readline)
+            if token.type == tokenize.COMMENT and len(token.string) > COMMENT_MAX_CHARS
+        ]
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # Code invalide (souvent justement ce que l'audit doit signaler) : seuls les espaces sont retirés
+        comments = []
+
+    for token in comments:
+        row, col = token.start
+        line = lines[row - 1]
+        lines[row - 1] = line[:col] + token.string[:COMMENT_MAX_CHARS].rstrip() + "…"
+
+    # Les lignes vides finales n'apportent rien et ne décalent aucun numéro
+    while len(lines) > 1 and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def trim_traceback(text: str) -> str:
+    """
+    Raccourcit un traceback pytest (longrepr) : lignes vides et séparateurs supprimés,
+    cadres répétés (récursion) repliés, milieu coupé si le traceback reste trop long.
+
+    Args:
+        text: Message d'erreur / traceback
+
+    Returns:
+        str: Traceback raccourci
+    """
+    lines = [line.rstrip() for line in text.split("\n")]
+    lines = [line for line in lines if line.strip() and not _SEPARATOR.match(line)]
+
+    collapsed = []
+    i = 0
+    while i < len(lines):
+        best_size, best_repeats = 0, 1
+        for size in range(1, TRACEBACK_MAX_FRAME_LINES + 1):
+            block = lines[i:i + size]
+            if len(block) < size:
+                break
+            repeats = 1
+            while lines[i + repeats * size:i + (repeats + 1) * size] == block:
+                repeats += 1
+            if repeats >= TRACEBACK_MIN_REPEATS and size * (repeats - 1) > best_size * (best_repeats - 1):
+                best_size, best_repeats = size, repeats
+        if best_size:
+            collapsed.extend(lines[i:i + best_size])
+            collapsed.append(f"[... {best_repeats - 1} répétition(s) identique(s) de ces {best_size} ligne(s) omise(s)]")
+            i += best_size * best_repeats
+        else:
+            collapsed.append(lines[i])
+            i += 1
+
+    if len(collapsed) > TRACEBACK_HEAD_LINES + TRACEBACK_TAIL_LINES:
+        omitted = len(collapsed) - TRACEBACK_HEAD_LINES - TRACEBACK_TAIL_LINES
+        collapsed = (
+            collapsed[:TRACEBACK_HEAD_LINES]
+            + [f"[... {omitted} ligne(s) omise(s)]"]
+            + collapsed[-TRACEBACK_TAIL_LINES:]
+        )
+    return "\n".join(collapsed)
+
+
+def compression_report(raw_prompt: str, prompt: str) -> Dict:
+    """
+    Mesure le gain de la compression d'un prompt.
+
+    Args:
+        raw_prompt: Prompt non compressé
+        prompt: Prompt effectivement envoyé
+
+    Returns:
+        Dict: tokens_before, tokens_after, saved_pct (tokens estimés)
+    """
+    before = estimate_tokens(raw_prompt)
+    after = estimate_tokens(prompt)
+    return {
+        "tokens_before": before,
+        "tokens_after": after,
+        "saved_pct": round(100.0 * (before - after) / before, 1) if before else 0.0,
+    }
+
+
+def record_compression(agent_name: str, raw_prompt: str, prompt: str) -> Dict:
+    """
+    Mesure le gain d'un prompt et l'ajoute aux métriques de l'exécution.
+
+    Args:
+        agent_name: Agent émetteur du prompt
+        raw_prompt: Prompt non compressé
+        prompt: Prompt effectivement envoyé
+
+    Returns:
+        Dict: Rapport de compression (voir compression_report)
+    """
+    report = compression_report(raw_prompt, prompt)
+    get_run_metrics().record_compression(agent_name, report["tokens_before"], report["tokens_after"])
+    print(f"   Prompt compressé : {report['tokens_before']} -> {report['tokens_after']} tokens (-{report['saved_pct']}%)")
+    return report
+
+
+def configure_compression(enabled: bool = True):
+    """Active ou désactive la compression des prompts."""
+    global _compression_enabled
+    _compression_enabled = enabled
+
+
+def is_compression_enabled() -> bool:
+    """Indique si la compression des prompts est active."""
+    return _compression_enabled
+
+
+def main():
+    """Point d'entrée CLI : mesure le gain de la compression sur un corpus."""
+    parser = argparse.ArgumentParser(description="Mesure le gain de la compression des prompts sur un dossier")
+    parser.add_argument("target_dir", help="Dossier de code Python (corpus)")
+    parser.add_argument("--no_tests", action="store_true", help="Ne mesure pas le prompt du Judge (pytest non exécuté)")
+    args = parser.parse_args()
+
+    # Le stub suffit : seuls les prompts sont construits, aucun appel LLM n'est fait
+    from src.llm.backends import configure_backend
+    configure_backend("stub")
+    from src.agents.auditor import AuditorAgent
+    from src.agents.judge import JudgeAgent
+    from src.tools.file_tools import list_python_files
+    from src.tools.pytest_tool import run_pytest
+
+    auditor = AuditorAgent(model_name="stub")
+    totals = {"tokens_before": 0, "tokens_after": 0}
+    print(f"\n {'Fichier':<40} {'avant':>8} {'après':>8} {'gain':>7}")
+    for filename in list_python_files(args.target_dir):
+        report = compression_report(*auditor.analysis_prompts(filename, args.target_dir))
+        totals["tokens_before"] += report["tokens_before"]
+        totals["tokens_after"] += report["tokens_after"]
+        print(f" {filename:<40} {report['tokens_before']:>8} {report['tokens_after']:>8} {report['saved_pct']:>6}%")
+
+    if not args.no_tests:
+        judge = JudgeAgent(model_name="stub")
+        errors = run_pytest(args.target_dir).get("errors", [])
+        if errors:
+            report = compression_report(*judge.analysis_prompts(errors))
+            totals["tokens_before"] += report["tokens_before"]
+            totals["tokens_after"] += report["tokens_after"]
+            print(f" {'(prompt du Judge)':<40} {report['tokens_before']:>8} {report['tokens_after']:>8} {report['saved_pct']:>6}%")
+
+    before, after = totals["tokens_before"], totals["tokens_after"]
+    saved = round(100.0 * (before - after) / before, 1) if before else 0.0
+    print(f"\n Total : {before} -> {after} tokens (-{saved}%)")
+
+
+if __name__ == "__main__":
+    main()
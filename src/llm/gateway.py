@@ -0,0 +1,241 @@
+"""
+Passerelle d'appel LLM commune aux agents
+Rôle : Point unique par lequel passent les appels des agents (cache, budget, limitation de débit,
+reprises, métriques, comptabilité des tokens, enregistrement des cassettes, extraction du texte).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.llm.backends import get_backend_name
+from src.llm.cache import get_llm_cache
+from src.llm.cassette import get_recorder
+from src.llm.circuit_breaker import get_circuit_breaker
+from src.llm.hedging import get_hedge_policy
+from src.llm.rate_limiter import (
+    AGENT_PRIORITIES, PRIORITY_AUDIT, backoff_delay, estimate_tokens,
+    get_max_retries, get_rate_limiter, is_retryable, retry_after
+)
+from src.llm.streaming import EXPECT_TEXT, OffFormatResponse, is_streaming_enabled, stream_chat
+from src.llm.usage import (
+    add_pending_usage, get_token_ledger, take_pending_usage, usage_from_response
+)
+from src.utils.perf_metrics import get_run_metrics
+from src.utils.cancellation import call_with_timeout, get_cancellation_token, get_timeout
+
+# Threads réservés aux appels LLM des agents asynchrones (attente réseau, pas de calcul)
+ASYNC_LLM_WORKERS = 64
+
+_async_executor = ThreadPoolExecutor(max_workers=ASYNC_LLM_WORKERS, thread_name_prefix="llm-async")
+
+
+def invoke_chat(llm, system_prompt: str, prompt: str, agent_name: str,
+                model_name: str, temperature: float, priority: int = None,
+                expect: str = EXPECT_TEXT, use_cache: bool = True) -> str:
+    """
+    Envoie un prompt système + utilisateur au LLM et retourne le texte de la réponse.
+    Consulte d'abord le cache persistant s'il est actif, attend son tour auprès du limiteur
+    partagé puis réessaie les erreurs transitoires (429, 5xx) avec backoff.
+    En mode streaming, la réponse est reçue par morceaux et coupée si elle sort du format attendu.
+    Si la couverture est active, un appel plus lent que le p95 de l'agent est doublé.
+    Si le disjoncteur est ouvert (backend en panne), l'appel échoue immédiatement.
+    Chaque tentative est bornée par le délai LLM et par l'échéance de l'exécution.
+
+    Args:
+        llm: Backend LLM (tout objet exposant invoke(messages), voir src/llm/backends.py)
+        system_prompt: Prompt système de l'agent
+        prompt: Prompt utilisateur
+        agent_name: Nom de l'agent appelant (ex: "Auditor_Agent"), pour les métriques
+        model_name: Modèle utilisé (fait partie de la clé de cache)
+        temperature: Température utilisée (fait partie de la clé de cache)
+        priority: Classe de priorité auprès du limiteur (défaut : selon l'agent)
+        expect: Format attendu de la réponse en streaming ("json", "code" ou "text")
+        use_cache: False pour ignorer le cache (appels dont la réponse doit pouvoir varier)
+
+    Returns:
+        str: Texte de la réponse
+
+    Raises:
+        BudgetExceeded: Si le budget de tokens/coût de l'exécution est atteint
+        CircuitOpenError: Si le disjoncteur du backend est ouvert
+        OperationCancelled: Si l'échéance de l'exécution est atteinte
+        Exception: Erreur du backend non transitoire ou persistante après les reprises
+    """
+    metrics = get_run_metrics()
+    cache = get_llm_cache() if use_cache else None
+    recorder = get_recorder()
+
+    cache_key = None
+    if cache is not None:
+        # Les réponses d'un backend de test ne doivent pas servir au vrai modèle
+        backend = get_backend_name()
+        cache_model = model_name if backend == "google" else f"{backend}/{model_name}"
+        cache_key = cache.make_key(cache_model, temperature, system_prompt, prompt)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            metrics.increment("llm_cache_hits")
+            if recorder is not None:
+                recorder.record(agent_name, model_name, prompt, cached)
+            return cached
+        metrics.increment("llm_cache_misses")
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ]
+
+    # Les réponses en cache ne consomment rien : le budget n'est vérifié qu'avant un vrai appel
+    get_token_ledger().check()
+
+    if priority is None:
+        priority = AGENT_PRIORITIES.get(agent_name, PRIORITY_AUDIT)
+    limiter = get_rate_limiter()
+    prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+    max_retries = get_max_retries()
+    streaming = is_streaming_enabled() and hasattr(llm, "stream")
+    hedge_policy = get_hedge_policy()
+    breaker = get_circuit_breaker()
+    token = get_cancellation_token()
+    llm_timeout = get_timeout("llm")
+
+    def call_once(cancel=None):
+        if streaming:
+            response, text, stream_stats = stream_chat(llm, messages, expect, cancel)
+            metrics.record_stream(agent_name, **stream_stats)
+        else:
+            response = llm.invoke(messages)
+            text = extract_text(response)
+        # Chaque tentative terminée est facturée, y compris une copie perdante
+        # ou un appel abandonné après son délai : le registre et le budget les comptent
+        usage = usage_from_response(response, system_prompt + prompt, text)
+        get_token_ledger().record(agent_name, model_name, usage)
+        if limiter is not None:
+            # Le limiteur n'a débité que l'estimation du prompt
+            limiter.consume(usage["total_tokens"] - prompt_tokens)
+        return text, usage
+
+    def bounded_call(cancel=None):
+        if hedge_policy is not None:
+            return hedge_policy.call(agent_name, call_once, on_hedge=before_hedge, cancel=cancel)
+        return call_once(cancel)
+
+    def before_hedge():
+        metrics.increment("llm_hedges")
+        if limiter is not None:
+            limiter.acquire(prompt_tokens, priority)
+
+    attempt = 0
+    while True:
+        probe = breaker is not None and breaker.before_call()
+        try:
+            if limiter is not None:
+                waited = limiter.acquire(prompt_tokens, priority)
+                if waited >= 0.001:
+                    metrics.increment("llm_throttle_wait_ms", int(waited * 1000))
+
+            start = time.perf_counter()
+            try:
+                text, usage = call_with_timeout(bounded_call, llm_timeout, f"Appel LLM ({agent_name})")
+                if breaker is not None:
+                    breaker.record_success()
+                break
+            except OffFormatResponse as e:
+                # Le backend a répondu : il est disponible, même si la réponse est inutilisable
+                if breaker is not None:
+                    breaker.record_success()
+                metrics.record_llm_call(agent_name, time.perf_counter() - start, success=False)
+                metrics.increment("llm_stream_aborts")
+                # Une seule nouvelle tentative immédiate : la réponse suivante peut être au bon format
+                if attempt >= min(1, max_retries):
+                    raise
+                print(f" [LLM] {agent_name} : {e}, flux interrompu, nouvelle tentative")
+                attempt += 1
+                continue
+            except Exception as e:
+                metrics.record_llm_call(agent_name, time.perf_counter() - start, success=False)
+                retryable = is_retryable(e)
+                if breaker is not None and retryable:
+                    # Seules les pannes d'infrastructure comptent : une requête refusée (400...) n'indique
+                    # pas que le backend est indisponible
+                    breaker.record_failure()
+                if attempt >= max_retries or not retryable:
+                    raise
+                if breaker is not None and not breaker.allows_calls():
+                    # Panne détectée : inutile d'attendre le backoff pour un appel qui sera refusé
+                    raise
+
+                imposed = retry_after(e)
+                if limiter is not None and imposed:
+                    # Le quota est atteint pour tout le monde, pas seulement pour cet appel
+                    limiter.pause(imposed)
+                delay = backoff_delay(attempt, e)
+                metrics.increment("llm_retries")
+                print(f" [LLM] {agent_name} : erreur transitoire ({e}), nouvelle tentative dans {delay:.1f}s")
+                token.sleep(delay)
+                attempt += 1
+        finally:
+            if probe:
+                # Sonde terminée sans verdict (erreur non transitoire, annulation...) : une autre pourra partir
+                breaker.release_probe()
+    metrics.record_llm_call(agent_name, time.perf_counter() - start)
+
+    # Déjà comptée au registre par la tentative : rattachée ici à la prochaine entrée de log
+    add_pending_usage(usage)
+
+    if cache is not None and text:
+        cache.put(cache_key, model_name, text)
+    if recorder is not None and text:
+        recorder.record(agent_name, model_name, prompt, text)
+
+    return text
+
+
+async def invoke_chat_async(llm, system_prompt: str, prompt: str, agent_name: str,
+                            model_name: str, temperature: float, priority: int = None,
+                            expect: str = EXPECT_TEXT, use_cache: bool = True) -> str:
+    """
+    Variante asynchrone de invoke_chat, pour les agents qui traitent plusieurs fichiers en parallèle.
+    L'appel complet (cache, limiteur, disjoncteur, reprises, couverture, streaming) s'exécute
+    dans un thread dédié : ces mécanismes sont synchrones et partagés entre threads, la boucle
+    asyncio reste libre pendant l'attente. La consommation de tokens de l'appel est rattachée
+    à la tâche appelante, comme si l'appel avait été fait dans son contexte.
+
+    Args:
+        voir invoke_chat
+
+    Returns:
+        str: Texte de la réponse
+
+    Raises:
+        voir invoke_chat
+    """
+    def call():
+        text = invoke_chat(llm, system_prompt, prompt, agent_name, model_name,
+                           temperature, priority=priority, expect=expect, use_cache=use_cache)
+        return text, take_pending_usage()
+
+    text, usage = await asyncio.get_running_loop().run_in_executor(_async_executor, call)
+    add_pending_usage(usage)
+    return text
+
+
+def extract_text(response) -> str:
+    """
+    Extrait le texte d'une réponse LLM (message LangChain, liste de parties ou chaîne).
+
+    Args:
+        response: Réponse brute du client
+
+    Returns:
+        str: Texte de la réponse
+    """
+    content = getattr(response, "content", response)
+
+    if isinstance(content, list):
+        content = content[0] if content else ""
+        if hasattr(content, 'text'):
+            return content.text
+        return str(content)
+
+    return content
@@ -0,0 +1,188 @@
+"""
+Requêtes LLM couvertes (hedging)
+Rôle : Réduire la latence de queue. Si un appel n'a pas répondu après le p95 observé pour
+son agent, une copie est envoyée ; la première réponse est gardée et l'autre est annulée.
+Le nombre de copies est plafonné à un pourcentage du trafic.
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+from src.llm.backends import LLMBackendError
+
+# Nombre de latences conservées par agent pour estimer le p95
+HEDGE_WINDOW = 100
+
+# Nombre minimal de mesures avant d'envoyer des copies
+HEDGE_MIN_SAMPLES = 5
+
+# Threads exécutant les appels couverts (original + copie)
+HEDGE_MAX_WORKERS = 32
+
+
+class HedgeCancelled(LLMBackendError):
+    """L'appel a été abandonné car l'autre requête a répondu en premier."""
+
+
+class HedgePolicy:
+    """
+    Politique de couverture partagée par tous les agents.
+    Thread-safe : les latences et le quota de copies sont globaux à l'exécution.
+    """
+
+    def __init__(self, hedge_pct: float, min_samples: int = HEDGE_MIN_SAMPLES):
+        """
+        Args:
+            hedge_pct: Part maximale des appels pouvant recevoir une copie (en %)
+            min_samples: Mesures nécessaires par agent avant la première copie
+        """
+        self.hedge_pct = hedge_pct
+        self.min_samples = min_samples
+        self._latencies = defaultdict(lambda: deque(maxlen=HEDGE_WINDOW))
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self, agent_name: str):
+        """
+        Délai après lequel une copie est envoyée : p95 des latences de l'agent.
+
+        Returns:
+            float: Délai en secondes, None si l'agent n'a pas assez de mesures
+        """
+        with self._lock:
+            values = sorted(self._latencies[agent_name])
+        if len(values) < self.min_samples:
+            return None
+        return values[max(1, math.ceil(0.95 * len(values))) - 1]
+
+    def observe(self, agent_name: str, seconds: float):
+        """Enregistre la latence d'un appel réussi."""
+        with self._lock:
+            self._latencies[agent_name].append(seconds)
+
+    def _take_hedge(self) -> bool:
+        """Réserve une copie si le plafond le permet."""
+        with self._lock:
+            if self.hedges + 1 > self.calls * self.hedge_pct / 100.0:
+                return False
+            self.hedges += 1
+            return True
+
+    def call(self, agent_name: str, attempt: Callable, on_hedge: Callable = None, cancel=None):
+        """
+        Exécute un appel, en le doublant s'il dépasse le p95 de l'agent.
+
+        Args:
+            agent_name: Agent appelant (les latences sont suivies par agent)
+            attempt: Fonction attempt(cancel_event) réalisant un appel ; elle doit
+                s'arrêter au plus tôt quand cancel_event est positionné
+            on_hedge: Fonction appelée avant l'envoi de la copie (ex: attente du limiteur)
+            cancel: threading.Event d'abandon de l'appel complet (délai, échéance),
+                transmis à l'original comme à la copie
+
+        Returns:
+            Résultat du premier appel réussi
+        """
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay(agent_name)
+
+        primary_cancel = _AttemptCancel(cancel)
+        start = time.perf_counter()
+        primary = self._executor.submit(_timed, attempt, primary_cancel)
+        if delay is None:
+            return self._settle(agent_name, primary.result())
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge():
+            return self._settle(agent_name, primary.result())
+
+        if on_hedge is not None:
+            on_hedge()
+        hedge_cancel = _AttemptCancel(cancel)
+        hedge = self._executor.submit(_timed, attempt, hedge_cancel)
+        cancels = {primary: primary_cancel, hedge: hedge_cancel}
+        pending = {primary, hedge}
+        first_error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if first_error is None or future is primary:
+                        first_error = e
+                    continue
+
+                # Premier succès : l'autre requête est annulée (ou son résultat ignoré)
+                for other in pending:
+                    cancels[other].set()
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                # La latence vue par l'appelant compte depuis l'envoi de l'original
+                return self._settle(agent_name, (result[0], time.perf_counter() - start))
+
+        raise first_error
+
+    def _settle(self, agent_name: str, timed_result):
+        result, seconds = timed_result
+        self.observe(agent_name, seconds)
+        return result
+
+    def stats(self) -> dict:
+        """Appels, copies envoyées et copies gagnantes."""
+        with self._lock:
+            return {
+                "hedge_pct": self.hedge_pct,
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            }
+
+
+class _AttemptCancel:
+    """Abandon d'une tentative : demandé pour elle seule (l'autre a gagné) ou pour tout l'appel."""
+
+    def __init__(self, parent=None):
+        self._own = threading.Event()
+        self._parent = parent
+
+    def set(self):
+        self._own.set()
+
+    def is_set(self) -> bool:
+        return self._own.is_set() or (self._parent is not None and self._parent.is_set())
+
+
+def _timed(attempt: Callable, cancel: threading.Event):
+    start = time.perf_counter()
+    result = attempt(cancel)
+    return result, time.perf_counter() - start
+
+
+_policy = None
+
+
+def configure_hedging(hedge_pct: float = None):
+    """
+    Active la couverture des appels LLM.
+
+    Args:
+        hedge_pct: Part maximale des appels doublés, en % (None ou 0 = désactivé)
+    """
+    global _policy
+    _policy = HedgePolicy(hedge_pct) if hedge_pct else None
+
+
+def get_hedge_policy():
+    """Retourne la politique active (None si la couverture est désactivée)."""
+    return _policy
@@ -0,0 +1,257 @@
+"""
+Limiteur de débit et reprises des appels LLM
+Rôle : Partager entre tous les agents les quotas du fournisseur (requêtes/min et tokens/min),
+servir les appels par ordre de priorité et réessayer les erreurs transitoires
+(429, 5xx) avec un backoff exponentiel à jitter qui respecte Retry-After.
+"""
+
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+
+# Classes de priorité (plus petit = servi en premier)
+PRIORITY_FIX = 0
+PRIORITY_AUDIT = 1
+PRIORITY_GENERATION = 2
+PRIORITY_JUDGE = 3
+
+AGENT_PRIORITIES = {
+    "Fixer_Agent": PRIORITY_FIX,
+    "Auditor_Agent": PRIORITY_AUDIT,
+    "Judge_Agent": PRIORITY_JUDGE,
+}
+
+# Marge sous le quota annoncé : le débit se stabilise juste en dessous
+QUOTA_HEADROOM = 0.95
+
+# Rafale maximale autorisée, exprimée en secondes de débit
+BURST_SECONDS = 10.0
+
+# Reprises des erreurs transitoires
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 30.0
+
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+_RETRYABLE_ERROR_NAMES = (
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "TooManyRequests", "TimeoutError", "CallTimeout",
+)
+_RETRY_AFTER_PATTERN = re.compile(r"retry(?:[_ ]delay|[_ ]after| in)\D{0,20}(\d+(?:\.\d+)?)", re.I)
+
+
+class TokenBucket:
+    """
+    Seau à jetons rechargé en continu. Une demande plus grosse que la capacité passe
+    quand le seau est plein et le met en dette, ce qui retarde les demandes suivantes.
+    """
+
+    def __init__(self, per_minute: float, burst_s: float = BURST_SECONDS):
+        """
+        Args:
+            per_minute: Débit autorisé (unités par minute)
+            burst_s: Taille du seau en secondes de débit
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_s)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Délai avant que amount unités soient disponibles."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        """Consomme amount unités (le niveau peut devenir négatif)."""
+        self._refill(now)
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Limiteur partagé requêtes/min + tokens/min avec file de priorité.
+    Seul le demandeur le plus prioritaire (puis le plus ancien) peut consommer :
+    un appel du Fixer en attente passe devant une analyse du Judge arrivée avant lui.
+    """
+
+    def __init__(self, rpm: float = None, tpm: float = None):
+        """
+        Args:
+            rpm: Requêtes par minute autorisées (None = illimité)
+            tpm: Tokens par minute autorisés (None = illimité)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm * QUOTA_HEADROOM) if rpm else None
+        self._tokens = TokenBucket(tpm * QUOTA_HEADROOM) if tpm else None
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._blocked_until = 0.0
+
+    def acquire(self, tokens: int = 0, priority: int = PRIORITY_AUDIT) -> float:
+        """
+        Attend qu'une requête de `tokens` tokens puisse partir.
+
+        Args:
+            tokens: Tokens estimés de la requête
+            priority: Classe de priorité (voir PRIORITY_*)
+
+        Returns:
+            float: Temps d'attente en secondes
+        """
+        start = time.monotonic()
+        ticket = (priority, next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._blocked_until - now
+                    if self._waiters[0] == ticket:
+                        wait = max(wait, self._bucket_wait(tokens, now))
+                        if wait <= 0:
+                            if self._requests is not None:
+                                self._requests.take(1, now)
+                            if self._tokens is not None:
+                                self._tokens.take(tokens, now)
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        # Réveillé quand le demandeur en tête est servi
+                        self._cond.wait()
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+        return time.monotonic() - start
+
+    def consume(self, tokens: int):
+        """Débite des tokens constatés après coup (ex: réponse plus longue qu'estimé)."""
+        if self._tokens is None or tokens <= 0:
+            return
+        with self._cond:
+            self._tokens.take(tokens, time.monotonic())
+
+    def pause(self, seconds: float):
+        """Suspend tous les appels pendant `seconds` (réponse 429 du fournisseur)."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def _bucket_wait(self, tokens: int, now: float) -> float:
+        wait = 0.0
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1, now))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        return wait
+
+
+def error_status(error: Exception):
+    """Code HTTP d'une erreur de backend ou de SDK (None si inconnu)."""
+    for attribute in ("status", "status_code", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Indique si une erreur est transitoire (quota, surcharge, coupure réseau).
+
+    Args:
+        error: Exception levée par le backend
+
+    Returns:
+        bool: True si l'appel peut être réessayé
+    """
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+
+    if type(error).__name__ in _RETRYABLE_ERROR_NAMES:
+        return True
+
+    # Backend injoignable (LLMBackendError sans statut) ou SDK sans code exploitable
+    from src.llm.backends import LLMBackendError
+    if isinstance(error, LLMBackendError):
+        return True
+
+    message = str(error)
+    return any(marker in message for marker in ("429", "RESOURCE_EXHAUSTED", "503", "UNAVAILABLE"))
+
+
+def retry_after(error: Exception):
+    """Délai imposé par le fournisseur (Retry-After), None s'il n'est pas indiqué."""
+    value = getattr(error, "retry_after", None)
+    if value:
+        return float(value)
+    match = _RETRY_AFTER_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    """
+    Délai avant la tentative suivante : backoff exponentiel à jitter complet,
+    jamais inférieur au Retry-After de l'erreur.
+
+    Args:
+        attempt: Numéro de la reprise (0 pour la première)
+        error: Erreur ayant provoqué la reprise
+
+    Returns:
+        float: Délai en secondes
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** attempt)))
+    imposed = retry_after(error) if error is not None else None
+    return max(delay, imposed) if imposed else delay
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière du nombre de tokens (environ 4 caractères par token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+_limiter = None
+_max_retries = LLM_MAX_RETRIES
+
+
+def configure_rate_limit(rpm: float = None, tpm: float = None, max_retries: int = None):
+    """
+    Configure le limiteur partagé par tous les agents.
+
+    Args:
+        rpm: Requêtes par minute (None = illimité)
+        tpm: Tokens par minute (None = illimité)
+        max_retries: Nombre de reprises des erreurs transitoires (0 = aucune)
+    """
+    global _limiter, _max_retries
+    _limiter = RateLimiter(rpm, tpm) if (rpm or tpm) else None
+    if max_retries is not None:
+        _max_retries = max_retries
+
+
+def get_rate_limiter():
+    """Retourne le limiteur partagé (None si aucun quota n'est configuré)."""
+    return _limiter
+
+
+def get_max_retries() -> int:
+    """Retourne le nombre de reprises autorisées par appel."""
+    return _max_retries
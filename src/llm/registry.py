@@ -0,0 +1,95 @@
+"""
+Registre des clients LLM du processus
+Rôle : Créer une seule fois chaque client (par modèle et température) et le partager
+entre l'Auditor, le Fixer et le Judge, pour réutiliser la configuration et les connexions.
+"""
+
+import os
+import threading
+from typing import Dict
+
+from dotenv import load_dotenv
+
+
+_lock = threading.Lock()
+_clients = {}
+_handouts = {}
+_env_loaded = False
+
+
+def get_chat_model(model_name: str, temperature: float):
+    """
+    Retourne le client partagé pour (modèle, température), en le créant au premier appel.
+
+    Args:
+        model_name: Nom du modèle (ex: "gemini-2.5-flash-lite")
+        temperature: Température d'échantillonnage
+
+    Returns:
+        ChatGoogleGenerativeAI: Client partagé
+
+    Raises:
+        ValueError: Si GOOGLE_API_KEY n'est pas configurée
+    """
+    global _env_loaded
+
+    key = (model_name, temperature)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if not _env_loaded:
+                load_dotenv()
+                _env_loaded = True
+
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise ValueError(
+                    " Clé API Google non trouvée. "
+                    "Assurez-vous d'avoir GOOGLE_API_KEY dans votre fichier .env"
+                )
+
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            client = ChatGoogleGenerativeAI(
+                model=model_name,
+                google_api_key=api_key,
+                temperature=temperature,
+                convert_system_message_to_human=True,
+                # Une seule tentative : les reprises sont gérées par la passerelle (rate_limiter)
+                # Pas de timeout ici : ignoré par ce client, le délai est appliqué par la passerelle
+                max_retries=1
+            )
+            _clients[key] = client
+            _handouts[key] = 0
+
+        _handouts[key] += 1
+        return client
+
+
+def registry_stats() -> Dict:
+    """
+    Statistiques du cache de clients : elles comptent les demandes de client servies par un
+    objet déjà créé, pas les connexions réseau réutilisées (gérées par le transport du client).
+
+    Returns:
+        Dict: Clients créés, demandes de client, demandes servies depuis le cache,
+            demandes par (modèle, température)
+    """
+    with _lock:
+        created = len(_clients)
+        handouts = sum(_handouts.values())
+        return {
+            "clients_created": created,
+            "client_lookups": handouts,
+            "client_cache_hits": handouts - created,
+            "lookups_by_client": {
+                f"{model}@{temperature}": count for (model, temperature), count in _handouts.items()
+            },
+        }
+
+
+def reset_registry():
+    """Oublie les clients existants (changement de clé API, tests)."""
+    with _lock:
+        _clients.clear()
+        _handouts.clear()
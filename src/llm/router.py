@@ -0,0 +1,157 @@
+"""
+Routage des modèles par agent et échelle d'escalade
+Rôle : Choisir le modèle de chaque appel. Chaque agent a son modèle (rapide et bon marché
+pour l'audit et l'analyse des tests) ; un fichier qui échoue encore aux tests après
+N cycles du Judge est confié à un modèle plus puissant, un échelon à la fois.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, List
+
+from src.utils.logger import log_experiment, ActionType
+
+# Cycles du Judge en échec avant de passer à l'échelon suivant
+ESCALATE_AFTER = 2
+
+
+class ModelRouter:
+    """
+    Table de routage partagée par les agents (thread-safe).
+    Les escalades sont journalisées via log_experiment.
+    """
+
+    def __init__(self, agent_models: Dict[str, str] = None, escalation_models: List[str] = None,
+                 escalate_after: int = ESCALATE_AFTER):
+        """
+        Args:
+            agent_models: Modèle par agent (ex: {"Auditor_Agent": "gemini-2.5-flash-lite"}) ;
+                un agent absent utilise le modèle passé à son constructeur
+            escalation_models: Échelons successifs pour les fichiers difficiles (du moins au plus cher)
+            escalate_after: Échecs du Judge sur un fichier avant chaque escalade
+        """
+        self.agent_models = {agent: model for agent, model in (agent_models or {}).items() if model}
+        self.escalation_models = list(escalation_models or [])
+        self.escalate_after = max(1, escalate_after)
+        self._failures = defaultdict(int)
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def agent_model(self, agent_name: str, default: str) -> str:
+        """Modèle de base d'un agent."""
+        return self.agent_models.get(agent_name, default)
+
+    def model_for_file(self, agent_name: str, filename: str, default: str) -> str:
+        """
+        Modèle à utiliser pour un fichier : modèle de l'agent, ou échelon d'escalade atteint.
+
+        Args:
+            agent_name: Agent appelant
+            filename: Fichier concerné
+            default: Modèle de base de l'agent
+
+        Returns:
+            str: Nom du modèle
+        """
+        with self._lock:
+            level = self._levels.get(filename, 0)
+        if level == 0:
+            return self.agent_model(agent_name, default)
+        return self.escalation_models[level - 1]
+
+    def record_failure(self, filename: str, base_model: str):
+        """
+        Enregistre un cycle du Judge en échec pour un fichier ; escalade si le seuil est atteint.
+
+        Args:
+            filename: Fichier dont les tests échouent
+            base_model: Modèle courant du Fixer (pour le journal de la décision)
+        """
+        with self._lock:
+            self._failures[filename] += 1
+            failures = self._failures[filename]
+            level = self._levels.get(filename, 0)
+            if (not self.escalation_models or level >= len(self.escalation_models)
+                    or failures < self.escalate_after * (level + 1)):
+                return
+            previous = self.escalation_models[level - 1] if level else base_model
+            self._levels[filename] = level + 1
+            model = self.escalation_models[level]
+
+        print(f"    Escalade de {filename} : {previous} -> {model} ({failures} échec(s) du Judge)")
+        log_experiment(
+            agent_name="Model_Router",
+            model_used=model,
+            action=ActionType.DEBUG,
+            details={
+                "file_analyzed": filename,
+                "input_prompt": f"Routage de {filename} après {failures} cycle(s) du Judge en échec",
+                "output_response": f"Escalade du Fixer : {previous} -> {model}",
+                "issues_found": failures,
+                "previous_model": previous,
+                "escalation_level": level + 1
+            },
+            status="SUCCESS"
+        )
+
+    def print_routing_table(self, default_model: str):
+        """
+        Affiche la table de routage au démarrage, si elle diffère du modèle unique par défaut.
+        Ce n'est pas une action d'agent : rien n'est journalisé (la table figure dans le résumé du run).
+        """
+        if not self.agent_models and not self.escalation_models:
+            return
+        table = {
+            agent: self.agent_model(agent, default_model)
+            for agent in ("Auditor_Agent", "Fixer_Agent", "Judge_Agent")
+        }
+        print(" Routage des modèles : " + ", ".join(f"{agent}={model}" for agent, model in table.items()))
+        if self.escalation_models:
+            print(f"    Escalade après {self.escalate_after} échec(s) du Judge : "
+                  + " -> ".join(self.escalation_models))
+
+    def stats(self) -> Dict:
+        """Table de routage, échecs par fichier et échelons atteints."""
+        with self._lock:
+            return {
+                "agent_models": dict(self.agent_models),
+                "escalation_models": list(self.escalation_models),
+                "escalate_after": self.escalate_after,
+                "judge_failures": dict(self._failures),
+                "escalated_files": {
+                    filename: self.escalation_models[level - 1]
+                    for filename, level in self._levels.items()
+                },
+            }
+
+
+_router = ModelRouter()
+
+
+def configure_routing(auditor_model: str = None, fixer_model: str = None, judge_model: str = None,
+                      escalation_models: List[str] = None, escalate_after: int = ESCALATE_AFTER) -> ModelRouter:
+    """
+    Configure le routage des modèles pour les exécutions suivantes.
+
+    Args:
+        auditor_model: Modèle de l'Auditor (None = modèle par défaut)
+        fixer_model: Modèle du Fixer (None = modèle par défaut)
+        judge_model: Modèle du Judge (None = modèle par défaut)
+        escalation_models: Échelons d'escalade du Fixer (du moins au plus cher)
+        escalate_after: Échecs du Judge sur un fichier avant chaque escalade
+
+    Returns:
+        ModelRouter: Routeur actif
+    """
+    global _router
+    _router = ModelRouter(
+        {"Auditor_Agent": auditor_model, "Fixer_Agent": fixer_model, "Judge_Agent": judge_model},
+        escalation_models,
+        escalate_after
+    )
+    return _router
+
+
+def get_model_router() -> ModelRouter:
+    """Retourne le routeur actif (sans surcharge ni escalade par défaut)."""
+    return _router
@@ -0,0 +1,152 @@
+"""
+Réponses LLM en streaming
+Rôle : Consommer la réponse par morceaux au fur et à mesure de leur arrivée, mesurer le
+temps jusqu'au premier token (TTFT) et le débit, et couper le flux dès qu'il sort du
+format attendu (de la prose au lieu de code ou de JSON) pour ne pas payer une réponse inutilisable.
+"""
+
+import re
+import time
+from typing import Dict, List
+
+from src.llm.backends import LLMBackendError
+from src.llm.hedging import HedgeCancelled
+from src.llm.rate_limiter import estimate_tokens
+
+# Formats attendus par les agents
+EXPECT_JSON = "json"
+EXPECT_CODE = "code"
+EXPECT_TEXT = "text"
+
+# Nombre de caractères significatifs à partir duquel le format est jugé
+FORMAT_CHECK_CHARS = 200
+
+_FENCE = re.compile(r"^```[\w-]*\s*")
+_CODE_START = re.compile(
+    r"^(#|@|\"\"\"|'''|import\s|from\s|def\s|class\s|async\s|if\s|for\s|while\s|try:|with\s|"
+    r"[A-Za-z_][\w.]*\s*(=|\(|\[|:)|[A-Za-z_][\w.]*(\s*,\s*[A-Za-z_][\w.]*)+\s*=)"
+)
+
+_streaming_enabled = False
+
+
+class OffFormatResponse(LLMBackendError):
+    """Le flux a été interrompu car la réponse ne correspond pas au format attendu."""
+
+
+class StreamFormatGuard:
+    """Vérifie le début d'une réponse en cours de réception."""
+
+    def __init__(self, expect: str = EXPECT_TEXT):
+        """
+        Args:
+            expect: Format attendu ("json", "code" ou "text" pour ne rien vérifier)
+        """
+        self.expect = expect
+        self.decided = expect not in (EXPECT_JSON, EXPECT_CODE)
+
+    def check(self, text: str):
+        """
+        Examine le texte reçu jusqu'ici.
+
+        Args:
+            text: Texte accumulé
+
+        Raises:
+            OffFormatResponse: Si le début de la réponse est hors format
+        """
+        if self.decided:
+            return
+
+        body = text.lstrip()
+        if body.startswith("```") and "\n" not in body:
+            return  # balise de bloc pas encore complète
+        body = _FENCE.sub("", body, count=1)
+        complete_line = "\n" in body
+        if not complete_line and len(body) < FORMAT_CHECK_CHARS:
+            return
+
+        if self.expect == EXPECT_JSON:
+            # Un objet JSON peut être précédé d'une courte phrase : on le cherche dans le début
+            ok = body[:1] in ("{", "[") or "{" in body[:FORMAT_CHECK_CHARS]
+            if not ok and len(body) < FORMAT_CHECK_CHARS:
+                return
+        else:
+            first_line = next((line for line in body.split("\n") if line.strip()), "")
+            if not first_line and len(body) < FORMAT_CHECK_CHARS:
+                return
+            ok = bool(_CODE_START.match(first_line.strip()))
+
+        self.decided = True
+        if not ok:
+            preview = text.strip()[:80].replace("\n", " ")
+            raise OffFormatResponse(f"Réponse hors format ({self.expect} attendu) : « {preview} »")
+
+
+def stream_chat(llm, messages: List[Dict], expect: str = EXPECT_TEXT, cancel=None):
+    """
+    Reçoit une réponse en streaming.
+
+    Args:
+        llm: Backend exposant stream(messages)
+        messages: Messages système + utilisateur
+        expect: Format attendu (voir StreamFormatGuard)
+        cancel: threading.Event signalant l'abandon de l'appel (requête couverte perdante)
+
+    Returns:
+        Tuple: (réponse agrégée, texte, statistiques {"ttft_s", "duration_s", "tokens_per_s"})
+
+    Raises:
+        OffFormatResponse: Si le flux a été coupé car hors format
+        HedgeCancelled: Si l'appel a été abandonné via cancel
+    """
+    # Import local : la passerelle importe ce module
+    from src.llm.gateway import extract_text
+
+    guard = StreamFormatGuard(expect)
+    start = time.perf_counter()
+    first_token_at = None
+    response = None
+    parts = []
+
+    stream = llm.stream(messages)
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                raise HedgeCancelled("Flux abandonné : la requête couverte a répondu en premier")
+            piece = extract_text(chunk) or ""
+            if first_token_at is None and piece:
+                first_token_at = time.perf_counter()
+            # Les morceaux LangChain (AIMessageChunk) et les chaînes s'additionnent
+            response = chunk if response is None else response + chunk
+            parts.append(piece)
+            if not guard.decided:
+                guard.check("".join(parts))
+    finally:
+        # Ferme la connexion si le flux est abandonné en cours de route
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    end = time.perf_counter()
+    text = "".join(parts)
+    if first_token_at is None:
+        first_token_at = end
+    generation_time = end - first_token_at
+
+    return response, text, {
+        "ttft_s": first_token_at - start,
+        "duration_s": end - start,
+        "tokens_per_s": estimate_tokens(text) / generation_time if generation_time > 0 else None,
+    }
+
+
+def configure_streaming(enabled: bool = True):
+    """Active ou désactive le streaming des réponses LLM."""
+    global _streaming_enabled
+    _streaming_enabled = enabled
+
+
+def is_streaming_enabled() -> bool:
+    """Indique si le streaming est actif."""
+    return _streaming_enabled
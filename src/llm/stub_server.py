@@ -0,0 +1,103 @@
+"""
+Serveur LLM stub local
+Rôle : Servir les réponses déterministes du StubBackend en HTTP sur localhost,
+pour mesurer le débit et la concurrence de l'orchestrateur sans réseau ni clé API.
+
+Usage :
+    python -m src.llm.stub_server --port 8765 --latency 0.3 --error_rate 0.05
+    python main.py --target_dir ./sandbox/ --llm_backend http --stub_url http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from src.llm.backends import LLMBackendError, StubBackend
+
+
+def _make_handler(backend: StubBackend):
+    class StubHandler(BaseHTTPRequestHandler):
+        """POST /v1/chat {"messages": [...]} -> {"content": "..."}"""
+
+        def do_POST(self):
+            if self.path != "/v1/chat":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length).decode("utf-8"))
+                content = backend.invoke(payload.get("messages", []))
+            except LLMBackendError as e:
+                self._send_json(e.status or 500, {"error": str(e)}, retry_after=e.retry_after or 1)
+                return
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            self._send_json(200, {"content": content})
+
+        def _send_json(self, status: int, body: dict, retry_after: float = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if retry_after is not None:
+                self.send_header("Retry-After", str(retry_after))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # Pas de log par requête : le serveur sert aux mesures de débit
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, **stub_options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Démarre le serveur stub dans un thread du processus courant.
+
+    Args:
+        host: Adresse d'écoute
+        port: Port (0 = port libre choisi par le système)
+        **stub_options: Options du StubBackend (latency_s, jitter_s, error_rate, seed)
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: Serveur (à arrêter avec shutdown()) et son URL
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(StubBackend(**stub_options)))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="llm-stub-server", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    """Point d'entrée CLI."""
+    parser = argparse.ArgumentParser(description="Serveur LLM stub local (réponses déterministes)")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence fixe par appel (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latence aléatoire supplémentaire max (s)")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Proportion d'appels en erreur 503")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        _make_handler(StubBackend(args.latency, args.jitter, args.error_rate, args.seed))
+    )
+    print(f" Serveur LLM stub en écoute sur http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n Arrêt du serveur stub")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
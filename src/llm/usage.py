@@ -0,0 +1,249 @@
+"""
+Comptabilité des tokens et budget d'exécution
+Rôle : Mesurer les tokens de chaque appel LLM (métadonnées de la réponse, sinon estimation),
+les agréger par agent, fichier et itération, et arrêter de lancer des appels
+une fois le budget en tokens ou en coût atteint.
+"""
+
+import contextvars
+import threading
+from collections import defaultdict
+from typing import Dict
+
+from src.llm.rate_limiter import estimate_tokens
+
+# Prix indicatifs en USD par million de tokens (entrée, sortie)
+MODEL_PRICES = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+# Prix appliqué aux modèles inconnus (volontairement prudent)
+DEFAULT_PRICE = (0.30, 2.50)
+
+
+class BudgetExceeded(Exception):
+    """Le budget de l'exécution (tokens ou coût) est épuisé : aucun nouvel appel LLM n'est lancé."""
+
+
+def empty_usage() -> Dict:
+    """Consommation nulle."""
+    return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "estimated": False}
+
+
+def usage_from_response(response, prompt_text: str, completion_text: str) -> Dict:
+    """
+    Lit la consommation d'un appel dans les métadonnées de la réponse, ou l'estime.
+
+    Args:
+        response: Réponse brute du backend (message LangChain ou chaîne)
+        prompt_text: Texte envoyé (prompts système + utilisateur)
+        completion_text: Texte reçu
+
+    Returns:
+        Dict: prompt_tokens, completion_tokens, total_tokens, estimated
+    """
+    prompt_tokens = completion_tokens = None
+
+    metadata = getattr(response, "usage_metadata", None)
+    if isinstance(metadata, dict) and metadata:
+        prompt_tokens = metadata.get("input_tokens")
+        completion_tokens = metadata.get("output_tokens")
+    else:
+        response_metadata = getattr(response, "response_metadata", None) or {}
+        metadata = response_metadata.get("usage_metadata") or {}
+        prompt_tokens = metadata.get("prompt_token_count")
+        completion_tokens = metadata.get("candidates_token_count")
+
+    estimated = prompt_tokens is None or completion_tokens is None
+    if prompt_tokens is None:
+        prompt_tokens = estimate_tokens(prompt_text)
+    if completion_tokens is None:
+        completion_tokens = estimate_tokens(completion_text)
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "estimated": estimated,
+    }
+
+
+def call_cost(model_name: str, usage: Dict) -> float:
+    """Coût en USD d'un appel selon MODEL_PRICES."""
+    # Les backends de test préfixent parfois le modèle (ex: "stub/gemini-2.5-flash")
+    input_price, output_price = MODEL_PRICES.get(model_name.split("/")[-1], DEFAULT_PRICE)
+    return (usage["prompt_tokens"] * input_price + usage["completion_tokens"] * output_price) / 1_000_000
+
+
+class TokenLedger:
+    """
+    Registre des tokens consommés pendant une exécution, avec budget optionnel.
+    Thread-safe : les agents peuvent enregistrer depuis plusieurs threads.
+    """
+
+    def __init__(self, token_budget: int = None, cost_budget: float = None):
+        """
+        Args:
+            token_budget: Nombre maximal de tokens (None = illimité)
+            cost_budget: Coût maximal en USD (None = illimité)
+        """
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.iteration = 0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.totals = empty_usage()
+        self.cost_usd = 0.0
+        self.by_agent = defaultdict(empty_usage)
+        self.by_file = defaultdict(empty_usage)
+        self.by_iteration = defaultdict(empty_usage)
+
+    def set_iteration(self, iteration: int):
+        """Attribue les appels suivants à cette itération du Swarm."""
+        self.iteration = iteration
+
+    def record(self, agent_name: str, model_name: str, usage: Dict):
+        """Enregistre la consommation d'un appel."""
+        with self._lock:
+            self.calls += 1
+            self.cost_usd += call_cost(model_name, usage)
+            for bucket in (self.totals, self.by_agent[agent_name], self.by_iteration[self.iteration]):
+                _add_usage(bucket, usage)
+
+    def attribute_file(self, filename: str, usage: Dict):
+        """Attribue une consommation déjà enregistrée à un fichier."""
+        with self._lock:
+            _add_usage(self.by_file[filename], usage)
+
+    def exhausted(self) -> bool:
+        """Indique si le budget est atteint."""
+        with self._lock:
+            return (
+                (self.token_budget is not None and self.totals["total_tokens"] >= self.token_budget)
+                or (self.cost_budget is not None and self.cost_usd >= self.cost_budget)
+            )
+
+    def check(self):
+        """
+        Raises:
+            BudgetExceeded: Si le budget est atteint
+        """
+        if self.exhausted():
+            raise BudgetExceeded(
+                f"Budget atteint : {self.totals['total_tokens']} tokens, {self.cost_usd:.4f} USD "
+                f"(limites : {self.token_budget or '-'} tokens, {self.cost_budget or '-'} USD)"
+            )
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            Dict: Totaux, coût, budget et répartition par agent, fichier et itération
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                **{key: value for key, value in self.totals.items() if key != "estimated"},
+                "cost_usd": round(self.cost_usd, 6),
+                "budget": {
+                    "tokens": self.token_budget,
+                    "cost_usd": self.cost_budget,
+                },
+                "by_agent": {agent: dict(usage) for agent, usage in self.by_agent.items()},
+                "by_file": {filename: dict(usage) for filename, usage in self.by_file.items()},
+                "by_iteration": {str(i): dict(usage) for i, usage in sorted(self.by_iteration.items())},
+            }
+
+
+def _add_usage(bucket: Dict, usage: Dict):
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        bucket[key] += usage[key]
+    bucket["estimated"] = bucket["estimated"] or usage["estimated"]
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+# Consommation des appels pas encore rattachés à une entrée de log, par thread ou tâche asyncio
+# (une ContextVar se comporte comme un threading.local pour les threads, et isole chaque tâche)
+_pending = contextvars.ContextVar("pending_call_usage", default=None)
+
+
+def configure_budget(token_budget: int = None, cost_budget: float = None) -> TokenLedger:
+    """
+    Démarre un nouveau registre avec le budget de l'exécution.
+
+    Args:
+        token_budget: Nombre maximal de tokens (None = illimité)
+        cost_budget: Coût maximal en USD (None = illimité)
+
+    Returns:
+        TokenLedger: Registre actif
+    """
+    global _ledger
+    with _ledger_lock:
+        _ledger = TokenLedger(token_budget, cost_budget)
+    return _ledger
+
+
+def get_token_ledger() -> TokenLedger:
+    """Retourne le registre actif (créé sans budget à la demande)."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = TokenLedger()
+        return _ledger
+
+
+def record_call_usage(agent_name: str, model_name: str, usage: Dict):
+    """
+    Enregistre un appel dans le registre et le met en attente pour la prochaine
+    entrée de log du thread (ou de la tâche asyncio) courant.
+    """
+    get_token_ledger().record(agent_name, model_name, usage)
+    add_pending_usage(usage)
+
+
+def add_pending_usage(usage: Dict):
+    """Met une consommation en attente pour la prochaine entrée de log du contexte courant."""
+    if not usage:
+        return
+    # Copie : le dictionnaire peut être partagé avec le contexte parent (tâches asyncio)
+    pending = dict(_pending.get() or empty_usage())
+    _add_usage(pending, usage)
+    _pending.set(pending)
+
+
+def take_pending_usage():
+    """
+    Retire la consommation en attente du contexte courant, sans l'attribuer.
+    Sert à la transférer vers un autre contexte (appel exécuté dans un thread pour une tâche asyncio).
+
+    Returns:
+        Dict: Consommation en attente, None s'il n'y en a pas
+    """
+    usage = _pending.get()
+    _pending.set(None)
+    return usage
+
+
+def consume_call_usage(filename: str = None) -> Dict:
+    """
+    Retourne (et remet à zéro) la consommation des appels du thread (ou de la tâche) courant
+    depuis la dernière entrée de log, en l'attribuant au fichier indiqué.
+
+    Args:
+        filename: Fichier concerné par l'entrée de log (None ou "N/A" : non attribué)
+
+    Returns:
+        Dict: prompt_tokens, completion_tokens, total_tokens, estimated
+    """
+    usage = take_pending_usage()
+    if usage is None:
+        return empty_usage()
+    if filename and filename != "N/A":
+        get_token_ledger().attribute_file(filename, usage)
+    return usage
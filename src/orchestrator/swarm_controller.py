@@ -3,19 +3,33 @@ Swarm Controller
 Rôle : Orchestrer les 3 agents (Auditor, Fixer, Judge) dans une boucle itérative
 """
 
+import asyncio
 import os
+import time
 import argparse
 from typing import Dict
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from src.agents.auditor import AuditorAgent
+from src.agents.auditor import AuditorAgent, PACK_PROMPT_MAX_CHARS
 from src.agents.fixer import FixerAgent
 from src.agents.judge import JudgeAgent
 
 
-from src.utils.logger import log_experiment, ActionType
+from src.utils.logger import log_experiment, ActionType, get_run_id, flush_logs
+from src.utils.cancellation import OperationCancelled, start_cancellation
+from src.utils.async_utils import SKIPPED, map_bounded, run_sync
+from src.utils.perf_metrics import start_run_metrics
+from src.llm.cache import get_llm_cache
+from src.llm.registry import registry_stats
+from src.llm.hedging import get_hedge_policy
+from src.llm.circuit_breaker import get_circuit_breaker, llm_available
+from src.llm.router import get_model_router
+from src.llm.usage import BudgetExceeded, get_token_ledger
+
+# Rapports d'audit en attente de correction en mode pipeline (au-delà, l'Auditor attend le Fixer)
+PIPELINE_QUEUE_SIZE = 4
 
 
 def run_refactoring_swarm(
@@ -23,7 +37,48 @@ def run_refactoring_swarm(
     model_name: str = "gemini-2.0-flash-exp",
     max_iterations: int = 10,
     generate_tests: bool = True,
-    generate_docs: bool = False
+    generate_docs: bool = False,
+    pack_audit: bool = False,
+    pack_chars: int = PACK_PROMPT_MAX_CHARS,
+    deadline: float = None,
+    concurrency: int = 1,
+    audit_workers: int = None,
+    pipeline: bool = False,
+    generation_workers: int = None
+) -> Dict:
+    """
+    Fonction principale d'orchestration du Swarm (enveloppe synchrone de run_refactoring_swarm_async).
+    Voir run_refactoring_swarm_async pour les arguments et le résultat.
+    """
+    return run_sync(run_refactoring_swarm_async(
+        target_dir=target_dir,
+        model_name=model_name,
+        max_iterations=max_iterations,
+        generate_tests=generate_tests,
+        generate_docs=generate_docs,
+        pack_audit=pack_audit,
+        pack_chars=pack_chars,
+        deadline=deadline,
+        concurrency=concurrency,
+        audit_workers=audit_workers,
+        pipeline=pipeline,
+        generation_workers=generation_workers
+    ))
+
+
+async def run_refactoring_swarm_async(
+    target_dir: str,
+    model_name: str = "gemini-2.0-flash-exp",
+    max_iterations: int = 10,
+    generate_tests: bool = True,
+    generate_docs: bool = False,
+    pack_audit: bool = False,
+    pack_chars: int = PACK_PROMPT_MAX_CHARS,
+    deadline: float = None,
+    concurrency: int = 1,
+    audit_workers: int = None,
+    pipeline: bool = False,
+    generation_workers: int = None
 ) -> Dict:
     """
     Fonction principale d'orchestration du Swarm.
@@ -42,9 +97,19 @@ def run_refactoring_swarm(
         max_iterations: Nombre maximum d'itérations (défaut: 10)
         generate_tests: Générer automatiquement les tests unitaires manquants
         generate_docs: Générer automatiquement la documentation
+        pack_audit: Regrouper les petits fichiers dans un même appel LLM de l'Auditor
+        pack_chars: Taille maximale du code regroupé dans un appel (caractères)
+        deadline: Durée maximale de l'exécution en secondes (None = sans échéance) ; à l'échéance,
+            les appels en cours sont interrompus et les résultats partiels conservés
+        concurrency: Nombre de fichiers traités simultanément par chaque agent (1 = séquentiel)
+        audit_workers: Nombre de fichiers analysés simultanément par l'Auditor (défaut : concurrency)
+        pipeline: Transmet chaque fichier audité au Fixer sans attendre la fin de l'audit
+        generation_workers: Nombre de générations de tests/documentation simultanées (défaut : concurrency)
     
     Returns:
         Dict: Résultats finaux avec statut et statistiques
+              (dont "performance_summary" : chemin du résumé runs/<run_id>.json
+              et "token_usage" : tokens consommés par agent, fichier et itération)
     """
     
     print("="*80)
@@ -55,31 +120,61 @@ def run_refactoring_swarm(
     print(f" Itérations max : {max_iterations}")
     print(f" Génération tests : {'' if generate_tests else ''}")
     print(f" Génération docs : {'' if generate_docs else ''}")
+    audit_workers = audit_workers or concurrency
+    generation_workers = generation_workers or concurrency
+    if concurrency > 1:
+        print(f" Concurrence : {concurrency} fichier(s) simultané(s)")
+    if audit_workers != concurrency:
+        print(f" Workers d'audit : {audit_workers}")
+    if generation_workers != concurrency:
+        print(f" Workers de génération : {generation_workers}")
+    if pipeline:
+        print(f" Pipeline Auditor -> Fixer : activé (file de {PIPELINE_QUEUE_SIZE} rapport(s))")
     print("="*80)
     
     
     if not os.path.exists(target_dir):
         raise FileNotFoundError(f" Le dossier {target_dir} n'existe pas")
     
+    metrics = start_run_metrics(get_run_id())
+    token = start_cancellation(deadline)
+    ledger = get_token_ledger()
+    router = get_model_router()
     
     
     
     print("\n Initialisation des agents...")
-    auditor = AuditorAgent(model_name=model_name)
-    fixer = FixerAgent(model_name=model_name)
+    auditor = AuditorAgent(model_name=model_name, pack_small_files=pack_audit, pack_max_chars=pack_chars,
+                           concurrency=audit_workers)
+    fixer = FixerAgent(model_name=model_name, concurrency=concurrency)
     judge = JudgeAgent(model_name=model_name)
     print(" Tous les agents sont prêts\n")
+    router.print_routing_table(model_name)
     
     
     iteration = 0
     all_tests_passed = False
+    budget_exhausted = False
+    degraded = False
+    deadline_reached = False
     history = []
     
     
     
     
     while iteration < max_iterations and not all_tests_passed:
+        if ledger.exhausted():
+            budget_exhausted = True
+            print("\n Budget de tokens/coût atteint : arrêt avant une nouvelle itération")
+            break
+        if token.cancelled:
+            deadline_reached = True
+            print(f"\n {token.reason} : arrêt avant une nouvelle itération")
+            break
+        
         iteration += 1
+        ledger.set_iteration(iteration)
+        audit_report = fix_result = test_result = None
         
         print("\n" + "="*80)
         print(f" ITÉRATION {iteration}/{max_iterations}")
@@ -89,50 +184,52 @@ def run_refactoring_swarm(
             
             
             
-            print("\n ÉTAPE 1/4 : Analyse du code par l'Auditor")
-            print("-"*80)
-            
-            audit_report = auditor.analyze(target_dir=target_dir)
-            
-            print(f"\n Analyse terminée :")
-            print(f"    Fichiers analysés : {len(audit_report['files_analyzed'])}")
-            print(f"    Problèmes détectés : {audit_report['total_issues']}")
-            
-            if audit_report['total_issues'] > 0:
-                print(f"\n Recommandations :")
-                for rec in audit_report.get('recommendations', [])[:3]:
-                    print(f"   - {rec}")
-            
-            
-            
-            
-            print("\n ÉTAPE 2/4 : Correction du code par le Fixer")
-            print("-"*80)
-            
-            if audit_report['total_issues'] == 0:
-                print(" Aucun problème à corriger, passage direct aux tests")
-                fix_result = {
-                    "files_fixed": [],
-                    "total_fixes": 0,
-                    "status": "no_issues"
-                }
+            if pipeline:
+                print("\n ÉTAPES 1-2/4 : Analyse et correction en pipeline (Auditor -> Fixer)")
+                print("-"*80)
+                
+                with metrics.stage("audit_fix"):
+                    audit_report, fix_result = await _audit_fix_pipeline(auditor, fixer, target_dir)
+                
+                _print_audit_summary(audit_report)
+                _print_fix_summary(fix_result)
+                token.check()
             else:
-                fix_result = fixer.fix(
-                    audit_report=audit_report,
-                    target_dir=target_dir
-                )
+                print("\n ÉTAPE 1/4 : Analyse du code par l'Auditor")
+                print("-"*80)
+                
+                with metrics.stage("audit"):
+                    audit_report = await auditor.analyze_async(target_dir=target_dir)
+                
+                _print_audit_summary(audit_report)
+                token.check()
                 
-                print(f"\n Corrections terminées :")
-                print(f"    Fichiers corrigés : {len(fix_result['files_fixed'])}")
-                print(f"    Corrections appliquées : {fix_result['total_fixes']}")
                 
-                if fix_result['files_fixed']:
-                    print(f"    Fichiers modifiés : {', '.join(fix_result['files_fixed'])}")
+                
+                
+                print("\n ÉTAPE 2/4 : Correction du code par le Fixer")
+                print("-"*80)
+                
+                if audit_report['total_issues'] == 0:
+                    print(" Aucun problème à corriger, passage direct aux tests")
+                    fix_result = {
+                        "files_fixed": [],
+                        "total_fixes": 0,
+                        "status": "no_issues"
+                    }
+                else:
+                    with metrics.stage("fix"):
+                        fix_result = await fixer.fix_async(
+                            audit_report=audit_report,
+                            target_dir=target_dir
+                        )
+                    _print_fix_summary(fix_result)
+                token.check()
             
             
             
             
-            if generate_tests and iteration == 1:  
+            if generate_tests and iteration == 1 and not ledger.exhausted() and llm_available():  
                 print("\n ÉTAPE 3/4 : Génération des tests unitaires manquants")
                 print("-"*80)
                 
@@ -143,37 +240,60 @@ def run_refactoring_swarm(
                 ]
                 
                 tests_generated = []
+                tests_discarded = []
+                missing_tests = []
                 
                 for filename in python_files:
-                    test_filename = f"test_{filename}"
-                    test_filepath = os.path.join(target_dir, test_filename)
-                    
-                    
-                    if not os.path.exists(test_filepath):
-                        print(f"    Génération de tests pour {filename}...")
-                        try:
-                            fixer.generate_tests(filename, target_dir)
-                            tests_generated.append(test_filename)
-                            print(f"       {test_filename} créé")
-                        except Exception as e:
-                            print(f"       Échec : {str(e)}")
-                    else:
+                    if os.path.exists(os.path.join(target_dir, f"test_{filename}")):
                         print(f"    Tests déjà présents pour {filename}")
+                    else:
+                        missing_tests.append(filename)
+                
+                async def generate_file_tests(filename):
+                    print(f"    Génération de tests pour {filename}...")
+                    return await fixer.generate_validated_tests_async(filename, target_dir)
+                
+                # Chaque fichier de tests est validé isolément dès sa génération, en parallèle des autres
+                with metrics.stage("generate"):
+                    results = await map_bounded(
+                        generate_file_tests, missing_tests, limit=generation_workers,
+                        stop_on=(BudgetExceeded, OperationCancelled)
+                    )
+                
+                stop = None
+                for filename, result in zip(missing_tests, results):
+                    if isinstance(result, (BudgetExceeded, OperationCancelled)):
+                        stop = stop or result
+                    elif isinstance(result, Exception):
+                        print(f"       Échec ({filename}) : {str(result)}")
+                    elif isinstance(result, BaseException):
+                        raise result
+                    elif isinstance(result, str):
+                        tests_generated.append(result)
+                    elif result is None:
+                        tests_discarded.append(f"test_{filename}")
                 
                 if tests_generated:
-                    print(f"\n {len(tests_generated)} fichier(s) de tests généré(s)")
-                else:
+                    print(f"\n {len(tests_generated)} fichier(s) de tests généré(s) et validé(s)")
+                elif not missing_tests:
                     print(f"\n Tous les fichiers ont déjà leurs tests")
+                if tests_discarded:
+                    print(f" {len(tests_discarded)} fichier(s) de tests abandonné(s) : {', '.join(tests_discarded)}")
+                if stop is not None:
+                    raise stop
             else:
                 print("\n  ÉTAPE 3/4 : Génération de tests (ignorée)")
             
             
             
             
+            token.check()
             print("\n ÉTAPE 4/4 : Validation par le Judge")
             print("-"*80)
             
-            test_result = judge.test(target_dir=target_dir)
+            with metrics.stage("judge"):
+                test_result = await judge.test_async(target_dir=target_dir)
+            token.check()
             
             print(f"\n Résultats des tests :")
             print(f"    Tests réussis : {test_result['passed']}")
@@ -198,7 +318,7 @@ def run_refactoring_swarm(
                         print(f"   - {rec}")
                 
                 
-                if iteration < max_iterations:
+                if iteration < max_iterations and not ledger.exhausted() and llm_available():
                     print("\n Tentative de correction avec feedback des tests...")
                     
                     
@@ -215,7 +335,11 @@ def run_refactoring_swarm(
                                 problematic_files.add(pfile)
                     
                     
+                    # Un fichier qui échoue encore peut passer à un modèle plus puissant
                     for filename in problematic_files:
+                        router.record_failure(filename, fixer.model_name)
+                    
+                    async def retry_file(filename):
                         filepath = os.path.join(target_dir, filename)
                         
                         
@@ -223,11 +347,19 @@ def run_refactoring_swarm(
                         error_message = "\n".join(file_errors[:3])  
                         
                         print(f"    Correction de {filename}...")
-                        try:
-                            fixer.retry_fix(filepath, target_dir, error_message)
-                            print(f"       Nouvelle version générée")
-                        except Exception as e:
-                            print(f"       Échec : {str(e)}")
+                        await asyncio.to_thread(fixer.retry_fix, filepath, target_dir, error_message)
+                        print(f"       Nouvelle version générée ({filename})")
+                    
+                    with metrics.stage("fix"):
+                        retried = sorted(problematic_files)
+                        results = await map_bounded(
+                            retry_file, retried, limit=concurrency, stop_on=(BudgetExceeded, OperationCancelled)
+                        )
+                    for filename, result in zip(retried, results):
+                        if isinstance(result, (BudgetExceeded, OperationCancelled)):
+                            raise result
+                        if isinstance(result, Exception):
+                            print(f"       Échec ({filename}) : {str(result)}")
             
             
             history.append({
@@ -238,6 +370,62 @@ def run_refactoring_swarm(
                 "tests_failed": test_result['failed']
             })
             
+            if not llm_available():
+                # Mode dégradé : sans LLM, une nouvelle itération ne corrigerait rien
+                degraded = True
+                print("\n Backend LLM indisponible (disjoncteur ouvert) : arrêt anticipé en mode dégradé")
+                break
+            
+        except BudgetExceeded as e:
+            budget_exhausted = True
+            print(f"\n {str(e)} : arrêt de l'itération {iteration}")
+            
+            log_experiment(
+                agent_name="Swarm_Controller",
+                model_used=model_name,
+                action=ActionType.DEBUG,
+                details={
+                    "file_analyzed": f"iteration_{iteration}",
+                    "input_prompt": f"Orchestration itération {iteration} sur {target_dir}",
+                    "output_response": f"Arrêt : {str(e)}",
+                    "issues_found": 0,
+                    "error_type": type(e).__name__,
+                    "iteration": iteration
+                },
+                status="FAILURE"
+            )
+            break
+            
+        except OperationCancelled as e:
+            deadline_reached = True
+            print(f"\n {str(e)} : itération {iteration} interrompue, résultats partiels conservés")
+            
+            # Résultats partiels : étapes terminées avant l'échéance
+            history.append({
+                "iteration": iteration,
+                "issues_detected": audit_report['total_issues'] if audit_report else None,
+                "fixes_applied": fix_result.get('total_fixes', 0) if fix_result else None,
+                "tests_passed": test_result['passed'] if test_result else None,
+                "tests_failed": test_result['failed'] if test_result else None,
+                "interrupted": True
+            })
+            
+            log_experiment(
+                agent_name="Swarm_Controller",
+                model_used=model_name,
+                action=ActionType.DEBUG,
+                details={
+                    "file_analyzed": f"iteration_{iteration}",
+                    "input_prompt": f"Orchestration itération {iteration} sur {target_dir}",
+                    "output_response": f"Arrêt : {str(e)}",
+                    "issues_found": 0,
+                    "error_type": type(e).__name__,
+                    "iteration": iteration
+                },
+                status="FAILURE"
+            )
+            break
+            
         except Exception as e:
             print(f"\n ERREUR lors de l'itération {iteration} : {str(e)}")
             
@@ -264,7 +452,7 @@ def run_refactoring_swarm(
     
     
     
-    if all_tests_passed and generate_docs:
+    if all_tests_passed and generate_docs and not ledger.exhausted() and llm_available() and not token.cancelled:
         print("\n" + "="*80)
         print(" GÉNÉRATION DE LA DOCUMENTATION")
         print("="*80)
@@ -274,19 +462,36 @@ def run_refactoring_swarm(
             if f.endswith(".py") and not f.startswith("test_") and f != "__init__.py"
         ]
         
+        missing_docs = []
         for filename in python_files:
-            doc_filename = f"README_{filename.replace('.py', '')}.md"
-            doc_filepath = os.path.join(target_dir, doc_filename)
-            
-            if not os.path.exists(doc_filepath):
-                print(f"\n Génération de documentation pour {filename}...")
-                try:
-                    fixer.generate_documentation(filename, target_dir)
-                    print(f"    {doc_filename} créé")
-                except Exception as e:
-                    print(f"    Échec : {str(e)}")
-            else:
+            if os.path.exists(os.path.join(target_dir, f"README_{filename.replace('.py', '')}.md")):
                 print(f" Documentation déjà présente pour {filename}")
+            else:
+                missing_docs.append(filename)
+        
+        async def generate_file_docs(filename):
+            print(f"\n Génération de documentation pour {filename}...")
+            await asyncio.to_thread(fixer.generate_documentation, filename, target_dir)
+        
+        with metrics.stage("generate"):
+            results = await map_bounded(
+                generate_file_docs, missing_docs, limit=generation_workers,
+                stop_on=(BudgetExceeded, OperationCancelled)
+            )
+        
+        interrupted = False
+        for filename, result in zip(missing_docs, results):
+            doc_filename = f"README_{filename.replace('.py', '')}.md"
+            if isinstance(result, (BudgetExceeded, OperationCancelled)):
+                if not interrupted:
+                    print(f"    {str(result)} : génération de documentation interrompue")
+                interrupted = True
+            elif isinstance(result, Exception):
+                print(f"    Échec ({doc_filename}) : {str(result)}")
+            elif isinstance(result, BaseException):
+                raise result
+            elif result is not SKIPPED:
+                print(f"    {doc_filename} créé")
     
     
     
@@ -301,9 +506,36 @@ def run_refactoring_swarm(
         "max_iterations_reached": iteration >= max_iterations and not all_tests_passed,
         "history": history,
         "target_dir": target_dir,
-        "model_used": model_name
+        "model_used": model_name,
+        "budget_exhausted": budget_exhausted or ledger.exhausted(),
+        "degraded": degraded,
+        "deadline_reached": deadline_reached,
+        "token_usage": ledger.summary()
     }
     
+    llm_cache = get_llm_cache()
+    hedge_policy = get_hedge_policy()
+    breaker = get_circuit_breaker()
+    final_result["performance_summary"] = metrics.write(extra={
+        "target_dir": target_dir,
+        "model_used": model_name,
+        "success": all_tests_passed,
+        "total_iterations": iteration,
+        "history": history,
+        "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+        "llm_clients": registry_stats(),
+        "llm_hedging": hedge_policy.stats() if hedge_policy is not None else None,
+        "circuit_breaker": breaker.stats() if breaker is not None else None,
+        "deadline_s": deadline,
+        "deadline_reached": deadline_reached,
+        "concurrency": concurrency,
+        "audit_workers": audit_workers,
+        "pipeline": pipeline,
+        "generation_workers": generation_workers,
+        "model_routing": router.stats(),
+        "token_usage": final_result["token_usage"]
+    })
+    
     if all_tests_passed:
         print(f"\n MISSION ACCOMPLIE en {iteration} itération(s) ! ")
         print(f"    Tous les tests passent avec succès")
@@ -315,22 +547,98 @@ def run_refactoring_swarm(
         print(f"\n ÉCHEC après {iteration} itération(s)")
         if iteration >= max_iterations:
             print(f"    Nombre maximum d'itérations atteint ({max_iterations})")
+        if final_result["budget_exhausted"]:
+            print(f"    Budget de tokens/coût atteint")
+        if degraded:
+            print(f"    Backend LLM indisponible : exécution terminée en mode dégradé")
+        if deadline_reached:
+            print(f"    {token.reason} : résultats partiels")
         print(f"    Certains tests échouent encore")
     
     print("\n STATISTIQUES PAR ITÉRATION :")
     print("-"*80)
     for i, iter_data in enumerate(history, 1):
-        print(f"   Itération {i} :")
+        print(f"   Itération {i} :{' (interrompue)' if iter_data.get('interrupted') else ''}")
         print(f"       Problèmes détectés : {iter_data['issues_detected']}")
         print(f"       Corrections appliquées : {iter_data['fixes_applied']}")
         print(f"       Tests réussis : {iter_data['tests_passed']}")
         print(f"       Tests échoués : {iter_data['tests_failed']}")
     
+    token_usage = final_result["token_usage"]
+    print(f"\n Tokens consommés : {token_usage['total_tokens']} "
+          f"({token_usage['prompt_tokens']} en entrée, {token_usage['completion_tokens']} en sortie), "
+          f"coût estimé {token_usage['cost_usd']:.4f} USD")
+    print(f" Résumé de performance : {final_result['performance_summary']}")
     print("\n" + "="*80)
     
+    # Les entrées du writer d'arrière-plan sont écrites avant de rendre la main
+    flush_logs()
     return final_result
 
 
+async def _audit_fix_pipeline(auditor: AuditorAgent, fixer: FixerAgent, target_dir: str):
+    """
+    Mode pipeline : le rapport de chaque fichier est transmis au Fixer dès que l'Auditor l'a produit,
+    par une file bornée (contre-pression : l'Auditor attend quand le Fixer a du retard).
+    
+    Args:
+        auditor: Agent auditeur (producteur)
+        fixer: Agent correcteur (consommateur)
+        target_dir: Dossier traité
+    
+    Returns:
+        Tuple[Dict, Dict]: (rapport d'audit, résumé des corrections)
+    """
+    queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    timings = {}
+    start = time.perf_counter()
+    
+    async def hand_over(filename, file_issues):
+        await queue.put((filename, file_issues))
+    
+    async def produce():
+        try:
+            return await auditor.analyze_async(target_dir, on_file_report=hand_over)
+        finally:
+            # Fin du flux, même si l'audit échoue : le Fixer termine les fichiers reçus
+            await queue.put(None)
+            timings["audit"] = time.perf_counter() - start
+    
+    async def consume():
+        try:
+            return await fixer.fix_stream(queue, target_dir)
+        finally:
+            timings["fix"] = time.perf_counter() - start
+    
+    audit_report, fix_result = await asyncio.gather(produce(), consume(), return_exceptions=True)
+    for outcome in (audit_report, fix_result):
+        if isinstance(outcome, BaseException):
+            raise outcome
+    
+    print(f"\n Pipeline : audit terminé à {timings['audit']:.1f}s, corrections terminées à {timings['fix']:.1f}s")
+    return audit_report, fix_result
+
+
+def _print_audit_summary(audit_report: Dict):
+    print(f"\n Analyse terminée :")
+    print(f"    Fichiers analysés : {len(audit_report['files_analyzed'])}")
+    print(f"    Problèmes détectés : {audit_report['total_issues']}")
+    
+    if audit_report['total_issues'] > 0:
+        print(f"\n Recommandations :")
+        for rec in audit_report.get('recommendations', [])[:3]:
+            print(f"   - {rec}")
+
+
+def _print_fix_summary(fix_result: Dict):
+    print(f"\n Corrections terminées :")
+    print(f"    Fichiers corrigés : {len(fix_result['files_fixed'])}")
+    print(f"    Corrections appliquées : {fix_result['total_fixes']}")
+    
+    if fix_result['files_fixed']:
+        print(f"    Fichiers modifiés : {', '.join(fix_result['files_fixed'])}")
+
+
 def main():
     """
     Point d'entrée principal avec gestion des arguments CLI.
@@ -4,11 +4,13 @@ import sys
 
 try:
     from ..utils.sandbox_guard import is_path_safe
+    from ..utils.perf_metrics import get_run_metrics
 except (ImportError, ValueError):
     src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     if src_dir not in sys.path:
         sys.path.insert(0, src_dir)
     from utils.sandbox_guard import is_path_safe
+    from utils.perf_metrics import get_run_metrics
 
 def read_file_safe(filepath: str, sandbox_dir: str = None) -> str:
     """
@@ -36,7 +38,10 @@ def read_file_safe(filepath: str, sandbox_dir: str = None) -> str:
     
     
     with open(abs_path, "r", encoding="utf-8") as f:
-        return f.read()
+        content = f.read()
+    
+    get_run_metrics().record_io(read=len(content.encode("utf-8")))
+    return content
 
 def write_file_safe(filepath: str, content: str, sandbox_dir: str = None):
     """
@@ -64,6 +69,32 @@ def write_file_safe(filepath: str, content: str, sandbox_dir: str = None):
     
     with open(abs_path, "w", encoding="utf-8") as f:
         f.write(content)
+    
+    get_run_metrics().record_io(written=len(content.encode("utf-8")))
+
+def delete_file_safe(filepath: str, sandbox_dir: str = None):
+    """
+    Supprime un fichier de manière sécurisée (ex: test généré invalide).
+    
+    Args:
+        filepath: Chemin du fichier
+        sandbox_dir: Dossier sandbox (optionnel)
+    """
+    if sandbox_dir is None:
+        sandbox_dir = os.path.abspath("sandbox")
+    else:
+        sandbox_dir = os.path.abspath(sandbox_dir)
+    
+    
+    abs_path = os.path.abspath(filepath)
+    
+    
+    if not abs_path.startswith(sandbox_dir):
+        raise PermissionError(f" Accès refusé : {filepath} est hors du sandbox")
+    
+    
+    if os.path.exists(abs_path):
+        os.remove(abs_path)
 
 def list_python_files(directory: str) -> list:
     """
@@ -1,13 +1,38 @@
 
 import subprocess
 import json
+import time
+
+from src.utils.perf_metrics import get_run_metrics
+from src.utils.cancellation import get_timeout, run_command, run_command_async
 
 def run_pylint(filename: str):
-    result = subprocess.run(
-        ["pylint", filename, "--output-format=json"],
-        capture_output=True,
-        text=True
-    )
+    start = time.perf_counter()
+    try:
+        result = run_command(
+            ["pylint", filename, "--output-format=json"],
+            timeout=get_timeout("pylint")
+        )
+    except subprocess.TimeoutExpired as e:
+        # Sortie vide : le fichier est audité sans rapport pylint (score 0)
+        print(f"   pylint a dépassé le délai de {e.timeout:g}s sur {filename}")
+        return ""
+    finally:
+        get_run_metrics().record_subprocess("pylint", time.perf_counter() - start)
+    return result.stdout
+
+async def run_pylint_async(filename: str):
+    start = time.perf_counter()
+    try:
+        result = await run_command_async(
+            ["pylint", filename, "--output-format=json"],
+            timeout=get_timeout("pylint")
+        )
+    except subprocess.TimeoutExpired as e:
+        print(f"   pylint a dépassé le délai de {e.timeout:g}s sur {filename}")
+        return ""
+    finally:
+        get_run_metrics().record_subprocess("pylint", time.perf_counter() - start)
     return result.stdout
 
 def parse_pylint_output(output: str):
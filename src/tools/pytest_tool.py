@@ -1,7 +1,16 @@
 import subprocess
 import json
 import os
+import re
 import sys
+import time
+
+from src.utils.perf_metrics import get_run_metrics
+from src.utils.cancellation import get_timeout, run_command, run_command_async
+from src.utils.async_utils import map_bounded
+
+# Nombre maximal de fichiers Python exécutés simultanément (exécution directe)
+DIRECT_RUN_WORKERS = 4
 
 def run_pytest(test_dir: str) -> dict:
     """
@@ -17,26 +26,122 @@ def run_pytest(test_dir: str) -> dict:
     
     report_path = os.path.join(test_dir, ".report.json")
     
+    start = time.perf_counter()
+    timeout = get_timeout("pytest")
+    try:
+        result = run_command(_pytest_command(test_dir, report_path), timeout=timeout)
+    except subprocess.TimeoutExpired:
+        # Un test bloqué est un échec réel : le Judge le remonte comme tel
+        return _pytest_timeout_result(test_dir, timeout)
+    finally:
+        get_run_metrics().record_subprocess("pytest", time.perf_counter() - start)
     
-    result = subprocess.run(
-        [
-            "pytest", 
-            test_dir,
-            "--python_files=*.py",      
-            "--python_classes=*",        
-            "--python_functions=*",      
-            "--json-report",
-            f"--json-report-file={report_path}",
-            "--tb=short",
-            "-v",
-            "--ignore-glob=__pycache__/*"
-        ],
-        capture_output=True,
-        text=True
-    )
+    return parse_test_results(report_path, result.stdout, result.stderr, test_dir)
+
+async def run_pytest_async(test_dir: str) -> dict:
+    """
+    Variante asynchrone de run_pytest (sous-processus asyncio).
     
+    Args:
+        test_dir: Dossier contenant les fichiers Python
+        
+    Returns:
+        dict: Résultats des tests
+    """
+    report_path = os.path.join(test_dir, ".report.json")
     
-    return parse_test_results(report_path, result.stdout, result.stderr, test_dir)
+    start = time.perf_counter()
+    timeout = get_timeout("pytest")
+    try:
+        await run_command_async(_pytest_command(test_dir, report_path), timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return _pytest_timeout_result(test_dir, timeout)
+    finally:
+        get_run_metrics().record_subprocess("pytest", time.perf_counter() - start)
+    
+    results = _parse_report(report_path)
+    if results is not None:
+        return results
+    print(" Aucun test pytest trouvé, exécution directe des fichiers Python...")
+    return await run_python_files_directly_async(test_dir)
+
+async def run_test_file_async(test_filepath: str) -> dict:
+    """
+    Collecte et exécute un seul fichier de tests, isolément (validation d'un test généré).
+    
+    Args:
+        test_filepath: Chemin du fichier test_*.py
+        
+    Returns:
+        dict: success, passed, failed, output (fin de la sortie de pytest en cas d'échec)
+    """
+    abs_path = os.path.abspath(test_filepath)
+    start = time.perf_counter()
+    timeout = get_timeout("pytest")
+    try:
+        # Même collecte que le Judge, depuis le dossier du fichier : les imports du module testé
+        # se résolvent comme lors de sa validation
+        result = await run_command_async(
+            _pytest_command(abs_path) + ["-p", "no:cacheprovider"],
+            timeout=timeout,
+            cwd=os.path.dirname(abs_path)
+        )
+    except subprocess.TimeoutExpired:
+        return {"success": False, "passed": 0, "failed": 1,
+                "output": f"pytest interrompu après {timeout:g}s (test bloqué ou boucle infinie ?)"}
+    finally:
+        get_run_metrics().record_subprocess("pytest", time.perf_counter() - start)
+    
+    output = (result.stdout + result.stderr).strip()
+    # Ligne de résumé de pytest : "==== 1 failed, 2 passed, 1 error in 0.12s ===="
+    summary = output.splitlines()[-1] if output else ""
+    passed = sum(int(n) for n in re.findall(r"(\d+) passed", summary))
+    failed = sum(int(n) for n in re.findall(r"(\d+) failed", summary))
+    # Code 5 : aucun test collecté, le fichier généré ne teste rien
+    if result.returncode == 5:
+        output = output or "Aucun test collecté"
+    return {
+        # Même critère que le Judge (_parse_report) : aucun test en échec. Les erreurs de
+        # collecte d'une fonction importée (fixture introuvable) n'en sont pas
+        "success": passed > 0 and failed == 0,
+        "passed": passed,
+        "failed": failed,
+        "output": output[-2000:]
+    }
+
+def _pytest_command(test_dir: str, report_path: str = None) -> list:
+    """
+    Commande pytest du Judge (collecte de tous les .py, fonctions et classes).
+    Partagée avec la validation isolée des tests générés pour que les deux collectent pareil.
+    
+    Args:
+        test_dir: Dossier (ou fichier) à tester
+        report_path: Rapport JSON à produire (None = aucun rapport)
+    """
+    # Options ini passées par -o : pytest refuse --python_files=... sur la ligne de commande
+    command = [
+        "pytest", 
+        test_dir,
+        "-o", "python_files=*.py",
+        "-o", "python_classes=*",
+        "-o", "python_functions=*",
+    ]
+    if report_path is not None:
+        command += ["--json-report", f"--json-report-file={report_path}"]
+    return command + [
+        "--tb=short",
+        "-v",
+        "--ignore-glob=__pycache__/*"
+    ]
+
+def _pytest_timeout_result(test_dir: str, timeout: float) -> dict:
+    print(f" pytest a dépassé le délai de {timeout:g}s")
+    return {
+        "success": False,
+        "passed": 0,
+        "failed": 1,
+        "errors": [f"{test_dir}: pytest interrompu après {timeout:g}s (test bloqué ou boucle infinie ?)"]
+    }
 
 def parse_test_results(report_path: str, stdout: str, stderr: str, test_dir: str) -> dict:
     """
@@ -52,6 +157,20 @@ def parse_test_results(report_path: str, stdout: str, stderr: str, test_dir: str
     Returns:
         dict: Résultats structurés
     """
+    results = _parse_report(report_path)
+    if results is not None:
+        return results
+    
+    print(" Aucun test pytest trouvé, exécution directe des fichiers Python...")
+    return run_python_files_directly(test_dir)
+
+def _parse_report(report_path: str):
+    """
+    Lit le rapport JSON de pytest.
+    
+    Returns:
+        dict: Résultats structurés, None si le rapport est absent ou ne contient aucun test
+    """
     try:
         
         if os.path.exists(report_path):
@@ -78,10 +197,7 @@ def parse_test_results(report_path: str, stdout: str, stderr: str, test_dir: str
                 }
     except Exception as e:
         print(f" Erreur lors du parsing du rapport : {str(e)}")
-    
-    
-    print(" Aucun test pytest trouvé, exécution directe des fichiers Python...")
-    return run_python_files_directly(test_dir)
+    return None
 
 def run_python_files_directly(test_dir: str) -> dict:
     """
@@ -104,34 +220,81 @@ def run_python_files_directly(test_dir: str) -> dict:
             "errors": ["Aucun fichier Python trouvé dans le dossier"]
         }
     
-    passed = 0
-    failed = 0
-    errors = []
-    
+    outcomes = []
     for filename in python_files:
         filepath = os.path.join(test_dir, filename)
         print(f"   Exécution de {filename}...")
         
+        start = time.perf_counter()
+        timeout = get_timeout("python")
+        try:
+            result = run_command([sys.executable, filepath], timeout=timeout)
+        except subprocess.TimeoutExpired:
+            result = None
+        finally:
+            get_run_metrics().record_subprocess("python", time.perf_counter() - start)
+        outcomes.append(_file_outcome(filename, result, timeout))
+    
+    return _merge_outcomes(outcomes)
+
+async def run_python_files_directly_async(test_dir: str) -> dict:
+    """
+    Variante asynchrone de run_python_files_directly : les fichiers sont exécutés
+    simultanément (au plus DIRECT_RUN_WORKERS processus), les résultats restent dans l'ordre des fichiers.
+    
+    Args:
+        test_dir: Dossier contenant les fichiers
         
-        result = subprocess.run(
-            [sys.executable, filepath],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        if result.returncode == 0:
-            passed += 1
-            print(f"    {filename} exécuté sans erreur")
-        else:
-            failed += 1
-            error_msg = result.stderr if result.stderr else result.stdout
-            errors.append(f"{filename}: {error_msg[:500]}")
-            print(f"    {filename} a produit une erreur")
+    Returns:
+        dict: Résultats de l'exécution
+    """
+    python_files = [f for f in os.listdir(test_dir) if f.endswith('.py') and not f.startswith('__')]
+    
+    if not python_files:
+        return {
+            "success": False,
+            "passed": 0,
+            "failed": 0,
+            "errors": ["Aucun fichier Python trouvé dans le dossier"]
+        }
     
+    async def run_file(filename):
+        print(f"   Exécution de {filename}...")
+        start = time.perf_counter()
+        timeout = get_timeout("python")
+        try:
+            result = await run_command_async([sys.executable, os.path.join(test_dir, filename)], timeout=timeout)
+        except subprocess.TimeoutExpired:
+            result = None
+        finally:
+            get_run_metrics().record_subprocess("python", time.perf_counter() - start)
+        return _file_outcome(filename, result, timeout)
+    
+    outcomes = await map_bounded(run_file, python_files, limit=DIRECT_RUN_WORKERS)
+    for outcome in outcomes:
+        # Annulation ou erreur inattendue : propagée comme avec un appel direct
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return _merge_outcomes(outcomes)
+
+def _file_outcome(filename: str, result, timeout: float):
+    """Résultat de l'exécution d'un fichier : (réussi, message d'erreur). result None = délai dépassé."""
+    if result is None:
+        print(f"    {filename} a dépassé le délai d'exécution")
+        return False, f"{filename}: exécution interrompue après {timeout:g}s (boucle infinie ?)"
+    if result.returncode == 0:
+        print(f"    {filename} exécuté sans erreur")
+        return True, None
+    print(f"    {filename} a produit une erreur")
+    error_msg = result.stderr if result.stderr else result.stdout
+    return False, f"{filename}: {error_msg[:500]}"
+
+def _merge_outcomes(outcomes) -> dict:
+    passed = sum(1 for ok, _ in outcomes if ok)
+    failed = len(outcomes) - passed
     return {
         "success": failed == 0,
         "passed": passed,
         "failed": failed,
-        "errors": errors
-    }
\ No newline at end of file
+        "errors": [error for ok, error in outcomes if not ok]
+    }
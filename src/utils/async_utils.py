@@ -0,0 +1,77 @@
+"""
+Outils asyncio du Swarm
+Rôle : Exécuter l'API asynchrone des agents depuis du code synchrone et traiter des
+fichiers en parallèle avec une limite de concurrence, en conservant l'ordre des résultats.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, List, Tuple, Type
+
+# Threads disponibles pour asyncio.to_thread (appels synchrones lancés depuis une coroutine)
+ASYNC_THREAD_WORKERS = 32
+
+# Marque d'un élément non traité car une exception d'arrêt est survenue avant son démarrage
+SKIPPED = object()
+
+
+def run_sync(coro: Awaitable):
+    """
+    Exécute une coroutine jusqu'à son terme depuis du code synchrone.
+    Sert d'enveloppe aux méthodes synchrones des agents (analyze, fix, test).
+
+    Args:
+        coro: Coroutine à exécuter
+
+    Returns:
+        Résultat de la coroutine
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_with_thread_pool(coro))
+
+    # Appel synchrone depuis une boucle déjà active : la coroutine tourne dans sa propre boucle
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _with_thread_pool(coro)).result()
+
+
+async def _with_thread_pool(coro: Awaitable):
+    # Le pool par défaut (min(32, CPU + 4) threads) briderait les appels parallèles sur une petite machine
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ASYNC_THREAD_WORKERS, thread_name_prefix="swarm-async")
+    )
+    return await coro
+
+
+async def map_bounded(func: Callable[..., Awaitable], items: Iterable, limit: int = 1,
+                      stop_on: Tuple[Type[BaseException], ...] = ()) -> List:
+    """
+    Applique une coroutine à chaque élément, avec au plus `limit` exécutions simultanées.
+
+    Args:
+        func: Fonction asynchrone appelée avec chaque élément
+        items: Éléments à traiter
+        limit: Nombre maximal d'exécutions simultanées (1 = séquentiel)
+        stop_on: Exceptions qui interrompent le traitement : les éléments pas encore
+            démarrés sont ignorés (SKIPPED)
+
+    Returns:
+        List: Un résultat par élément, dans l'ordre des éléments ; une exception levée
+        par func est rendue à la place du résultat
+    """
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(1, limit))
+    stopped = []
+
+    async def run(item):
+        async with semaphore:
+            if stopped:
+                return SKIPPED
+            try:
+                return await func(item)
+            except stop_on:
+                stopped.append(item)
+                raise
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
@@ -0,0 +1,126 @@
+"""
+Stockage adressé par contenu des textes volumineux des logs
+Rôle : Écrire une seule fois chaque prompt/réponse (compressé, indexé par son hash)
+et ne garder qu'une référence dans les entrées de log.
+"""
+
+import hashlib
+import os
+import zlib
+from typing import Dict
+
+# Dossier des blobs : logs/blobs/<2 premiers caractères du hash>/<hash>.z
+BLOB_DIR = os.path.join("logs", "blobs")
+
+# Taille (en caractères) à partir de laquelle un champ texte est externalisé
+BLOB_THRESHOLD = 512
+
+# Clé identifiant une référence de blob dans les détails d'une entrée
+BLOB_REF_KEY = "blob"
+
+
+class BlobStore:
+    """
+    Répertoire de blobs compressés (zlib) nommés par le SHA-256 de leur contenu.
+    Un même texte n'est écrit qu'une fois, quel que soit le nombre d'entrées qui le référencent.
+    """
+
+    def __init__(self, root: str = BLOB_DIR):
+        """
+        Args:
+            root: Dossier racine des blobs
+        """
+        self.root = root
+
+    def put(self, text: str) -> str:
+        """
+        Stocke un texte s'il n'est pas déjà présent.
+
+        Args:
+            text: Contenu à stocker
+
+        Returns:
+            str: Digest "sha256:<hex>" du contenu
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Écriture atomique : un lecteur ne voit jamais un blob partiel
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp_path, path)
+
+        return f"sha256:{digest}"
+
+    def get(self, ref: str) -> str:
+        """
+        Relit un texte à partir de son digest.
+
+        Args:
+            ref: Digest "sha256:<hex>"
+
+        Returns:
+            str: Contenu d'origine
+
+        Raises:
+            FileNotFoundError: Si le blob est absent
+        """
+        digest = ref.split(":", 1)[-1]
+        with open(self._path(digest), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def externalize(self, details: Dict, threshold: int = BLOB_THRESHOLD) -> Dict:
+        """
+        Remplace les champs texte volumineux par une référence de blob.
+
+        Args:
+            details: Détails d'une entrée de log (non modifiés)
+            threshold: Taille minimale d'un champ externalisé
+
+        Returns:
+            Dict: Copie des détails avec {"blob": "sha256:...", "size": n} à la place des textes longs
+        """
+        result = {}
+        for key, value in details.items():
+            if isinstance(value, str) and len(value) >= threshold:
+                result[key] = {BLOB_REF_KEY: self.put(value), "size": len(value)}
+            else:
+                result[key] = value
+        return result
+
+    def rehydrate(self, entry: Dict) -> Dict:
+        """
+        Remplace les références de blob d'une entrée par leur contenu.
+        Un blob manquant est signalé dans le texte plutôt que de faire échouer la lecture.
+
+        Args:
+            entry: Entrée de log
+
+        Returns:
+            Dict: Copie de l'entrée avec les textes d'origine
+        """
+        details = entry.get("details")
+        if not isinstance(details, dict) or not any(is_blob_ref(v) for v in details.values()):
+            return entry
+
+        restored = {}
+        for key, value in details.items():
+            if is_blob_ref(value):
+                try:
+                    value = self.get(value[BLOB_REF_KEY])
+                except FileNotFoundError:
+                    value = f"[blob introuvable : {value[BLOB_REF_KEY]}]"
+            restored[key] = value
+        return {**entry, "details": restored}
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.z")
+
+
+def is_blob_ref(value) -> bool:
+    """Indique si une valeur de détails est une référence de blob."""
+    return isinstance(value, dict) and isinstance(value.get(BLOB_REF_KEY), str) and "size" in value
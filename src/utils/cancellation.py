@@ -0,0 +1,286 @@
+"""
+Délais d'exécution et annulation coopérative
+Rôle : Borner chaque appel (LLM, pylint, pytest) par un délai configurable et l'exécution
+complète du Swarm par une échéance (--deadline). Le jeton d'annulation de l'exécution est
+consulté par les appels en cours : à l'échéance, ils s'interrompent (sous-processus tués,
+flux LLM coupés) et le contrôleur conserve les résultats partiels.
+"""
+
+import asyncio
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, List
+
+# Délais par défaut d'un appel (secondes, None = illimité)
+LLM_TIMEOUT_S = 120.0
+PYLINT_TIMEOUT_S = 60.0
+PYTEST_TIMEOUT_S = 300.0
+PYTHON_RUN_TIMEOUT_S = 10.0
+
+# Intervalle de vérification du jeton pendant une attente (secondes)
+POLL_INTERVAL_S = 0.1
+
+_timeouts = {
+    "llm": LLM_TIMEOUT_S,
+    "pylint": PYLINT_TIMEOUT_S,
+    "pytest": PYTEST_TIMEOUT_S,
+    "python": PYTHON_RUN_TIMEOUT_S,
+}
+
+# Threads des appels bornés (un appel abandonné y termine en arrière-plan)
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="bounded-call")
+
+
+class OperationCancelled(BaseException):
+    """
+    L'exécution a été annulée (échéance atteinte).
+    Hérite de BaseException, comme asyncio.CancelledError, pour traverser les
+    `except Exception` des agents au lieu d'être comptée comme une erreur de fichier.
+    """
+
+
+class CallTimeout(TimeoutError):
+    """Un appel a dépassé son délai (il peut être réessayé)."""
+
+
+class CancellationToken:
+    """Jeton d'annulation d'une exécution, partagé par tous les threads."""
+
+    def __init__(self, deadline_s: float = None):
+        """
+        Args:
+            deadline_s: Durée maximale de l'exécution en secondes (None = sans échéance)
+        """
+        self.deadline_s = deadline_s
+        self._deadline = time.monotonic() + deadline_s if deadline_s else None
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason: str = "Exécution annulée"):
+        """Annule l'exécution : les appels en cours s'interrompent au prochain point de contrôle."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Indique si l'exécution est annulée (l'échéance dépassée vaut annulation)."""
+        if not self._event.is_set() and self._deadline is not None and time.monotonic() >= self._deadline:
+            self.cancel(f"Échéance de {self.deadline_s:g}s atteinte")
+        return self._event.is_set()
+
+    def remaining(self):
+        """Secondes restantes avant l'échéance (None sans échéance)."""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def check(self):
+        """
+        Point de contrôle.
+
+        Raises:
+            OperationCancelled: Si l'exécution est annulée
+        """
+        if self.cancelled:
+            raise OperationCancelled(self.reason)
+
+    def timeout_for(self, timeout: float = None):
+        """
+        Délai effectif d'un appel : son propre délai, borné par le temps restant.
+
+        Args:
+            timeout: Délai de l'appel (None = illimité)
+
+        Returns:
+            float: Délai en secondes, None si ni délai ni échéance
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def sleep(self, seconds: float):
+        """Attente interrompue par l'annulation."""
+        limit = self.timeout_for(seconds)
+        self._event.wait(limit if limit is not None else seconds)
+        self.check()
+
+
+_token = CancellationToken()
+
+
+def start_cancellation(deadline_s: float = None) -> CancellationToken:
+    """
+    Crée le jeton d'annulation d'une nouvelle exécution.
+
+    Args:
+        deadline_s: Durée maximale de l'exécution en secondes (None = sans échéance)
+
+    Returns:
+        CancellationToken: Jeton actif
+    """
+    global _token
+    _token = CancellationToken(deadline_s)
+    return _token
+
+
+def get_cancellation_token() -> CancellationToken:
+    """Retourne le jeton de l'exécution courante."""
+    return _token
+
+
+def configure_timeouts(llm: float = LLM_TIMEOUT_S, pylint: float = PYLINT_TIMEOUT_S,
+                       pytest: float = PYTEST_TIMEOUT_S):
+    """
+    Configure les délais par appel (0 ou None = illimité).
+
+    Args:
+        llm: Délai d'un appel LLM (secondes)
+        pylint: Délai d'une analyse pylint (secondes)
+        pytest: Délai d'une exécution pytest (secondes)
+    """
+    _timeouts["llm"] = llm or None
+    _timeouts["pylint"] = pylint or None
+    _timeouts["pytest"] = pytest or None
+
+
+def get_timeout(kind: str):
+    """Délai configuré pour un type d'appel ("llm", "pylint", "pytest", "python")."""
+    return _timeouts.get(kind)
+
+
+def call_with_timeout(fn: Callable, timeout: float = None, description: str = "Appel"):
+    """
+    Exécute fn(cancel_event) en le bornant par un délai et par le jeton d'annulation.
+    Le délai court à partir du début de l'exécution de fn (pas de son attente d'un thread libre).
+    En cas d'abandon, l'appel encore en file est retiré et cancel_event est positionné pour
+    que fn s'arrête au plus tôt (ex: flux LLM) ; sinon l'appel se termine en arrière-plan
+    et son résultat est ignoré.
+
+    Args:
+        fn: Fonction fn(cancel_event) à exécuter
+        timeout: Délai de l'appel (None = illimité)
+        description: Libellé de l'appel pour les messages d'erreur
+
+    Returns:
+        Résultat de fn
+
+    Raises:
+        CallTimeout: Si le délai est dépassé
+        OperationCancelled: Si l'exécution est annulée pendant l'appel
+    """
+    token = get_cancellation_token()
+    token.check()
+    if token.timeout_for(timeout) is None:
+        return fn(None)
+
+    cancel = threading.Event()
+    started = threading.Event()
+    start = []
+
+    def run():
+        # Le délai court à partir du début effectif de l'exécution, pas de l'attente d'un thread libre
+        start.append(time.monotonic())
+        started.set()
+        return fn(cancel)
+
+    future = _executor.submit(run)
+    while True:
+        try:
+            return future.result(timeout=POLL_INTERVAL_S)
+        except FutureTimeout:
+            pass
+        if token.cancelled:
+            cancel.set()
+            future.cancel()
+            raise OperationCancelled(token.reason)
+        if timeout is not None and started.is_set() and time.monotonic() - start[0] >= timeout:
+            cancel.set()
+            future.cancel()
+            raise CallTimeout(f"{description} : délai de {timeout:g}s dépassé")
+
+
+def run_command(args: List[str], timeout: float = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Équivalent de subprocess.run(capture_output=True, text=True) borné par un délai et par
+    le jeton d'annulation : le processus est tué s'il les dépasse.
+
+    Args:
+        args: Commande à exécuter
+        timeout: Délai du processus (None = illimité)
+        **kwargs: Options passées à subprocess.Popen (cwd, env...)
+
+    Returns:
+        subprocess.CompletedProcess: Code de retour et sorties
+
+    Raises:
+        subprocess.TimeoutExpired: Si le délai est dépassé
+        OperationCancelled: Si l'exécution est annulée pendant le processus
+    """
+    token = get_cancellation_token()
+    token.check()
+    start = time.monotonic()
+    with subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs) as process:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=POLL_INTERVAL_S)
+                return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+            except subprocess.TimeoutExpired:
+                pass
+            if token.cancelled:
+                process.kill()
+                process.communicate()
+                raise OperationCancelled(token.reason)
+            if timeout is not None and time.monotonic() - start >= timeout:
+                process.kill()
+                stdout, stderr = process.communicate()
+                raise subprocess.TimeoutExpired(args, timeout, output=stdout, stderr=stderr)
+
+
+async def run_command_async(args: List[str], timeout: float = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Variante asynchrone de run_command (asyncio.create_subprocess_exec) : la boucle
+    reste libre pendant l'exécution du processus.
+
+    Args:
+        args: Commande à exécuter
+        timeout: Délai du processus (None = illimité)
+        **kwargs: Options passées à asyncio.create_subprocess_exec (cwd, env...)
+
+    Returns:
+        subprocess.CompletedProcess: Code de retour et sorties (texte)
+
+    Raises:
+        subprocess.TimeoutExpired: Si le délai est dépassé
+        OperationCancelled: Si l'exécution est annulée pendant le processus
+    """
+    token = get_cancellation_token()
+    token.check()
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **kwargs
+    )
+    communicate = asyncio.ensure_future(process.communicate())
+    try:
+        while True:
+            done, _ = await asyncio.wait({communicate}, timeout=POLL_INTERVAL_S)
+            if done:
+                stdout, stderr = communicate.result()
+                return subprocess.CompletedProcess(args, process.returncode, _decode(stdout), _decode(stderr))
+            if token.cancelled:
+                raise OperationCancelled(token.reason)
+            if timeout is not None and time.monotonic() - start >= timeout:
+                process.kill()
+                stdout, stderr = await communicate
+                raise subprocess.TimeoutExpired(args, timeout, output=_decode(stdout), stderr=_decode(stderr))
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await communicate
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace") if data else ""
@@ -0,0 +1,367 @@
+"""
+Stockage indexé des logs d'expérience (SQLite)
+Rôle : Rendre les logs interrogeables (run, agent, action, statut, fichier, date)
+sans relire les tableaux JSON complets.
+
+Usage :
+    python -m src.utils.experiment_store import "logs/She codes experiment_data_ historique.json"
+    python -m src.utils.experiment_store query --agent Fixer_Agent --status FAILURE --file messy.py
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List
+
+from src.utils.logger import SQLITE_LOG_FILE, entry_key, iter_log_entries, is_run_start
+
+# Champs volumineux stockés à part pour garder la table principale compacte
+TEXT_FIELDS = ("input_prompt", "output_response")
+
+# Nombre d'entrées insérées par transaction lors des imports
+IMPORT_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    run_id TEXT,
+    timestamp TEXT,
+    agent TEXT,
+    model TEXT,
+    action TEXT,
+    status TEXT,
+    file_analyzed TEXT,
+    issues_found INTEGER,
+    details TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS entry_texts (
+    entry_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    content TEXT,
+    is_json INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (entry_id, field)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_run ON entries (run_id);
+CREATE INDEX IF NOT EXISTS idx_entries_agent_action_status ON entries (agent, action, status);
+CREATE INDEX IF NOT EXISTS idx_entries_status ON entries (status);
+CREATE INDEX IF NOT EXISTS idx_entries_file ON entries (file_analyzed);
+CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (timestamp);
+"""
+
+
+class ExperimentStore:
+    """
+    Base SQLite des entrées de log.
+    La table `entries` porte les colonnes indexées et les détails légers,
+    la table `entry_texts` les prompts et réponses.
+    """
+
+    def __init__(self, db_path: str = SQLITE_LOG_FILE):
+        """
+        Ouvre (ou crée) la base.
+
+        Args:
+            db_path: Chemin du fichier SQLite
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        # Une connexion partagée, protégée par un verrou (writer d'arrière-plan + lecteurs)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Ferme la connexion."""
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        """Retourne le nombre d'entrées stockées."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def insert_entries(self, entries: List[Dict], run_id: str = None, source: str = None) -> int:
+        """
+        Insère un lot d'entrées dans une seule transaction.
+        Les entrées déjà présentes (même id) sont ignorées, ce qui rend les imports idempotents.
+
+        Args:
+            entries: Entrées au format de log_experiment
+            run_id: Identifiant d'exécution à associer aux entrées
+            source: Fichier d'origine (pour les imports)
+
+        Returns:
+            int: Nombre d'entrées réellement insérées
+        """
+        rows = []
+        texts = []
+        for entry in entries:
+            row, entry_texts = self._split_entry(entry, run_id, source)
+            rows.append(row)
+            texts.extend(entry_texts)
+
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (id, run_id, timestamp, agent, model, action, status, "
+                "file_analyzed, issues_found, details, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            inserted = self._conn.total_changes - before
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entry_texts (entry_id, field, content, is_json) VALUES (?, ?, ?, ?)",
+                texts
+            )
+        return inserted
+
+    def import_json_log(self, path: str) -> int:
+        """
+        Importe un fichier de logs existant (tableau JSON ou NDJSON) en flux.
+        Les exécutions sont reconstituées à partir des entrées "System" d'initialisation :
+        chaque démarrage ouvre un nouveau run nommé "<fichier>#<n>".
+
+        Args:
+            path: Chemin du fichier de logs
+
+        Returns:
+            int: Nombre d'entrées importées
+        """
+        source = os.path.basename(path)
+        run_index = 0
+        imported = 0
+        batch = []
+
+        for entry in iter_log_entries(path):
+            if not isinstance(entry, dict):
+                continue
+            if is_run_start(entry):
+                run_index += 1
+            entry_run = f"{source}#{run_index}"
+            batch.append((entry, entry_run))
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += self._flush_import(batch, source)
+                batch = []
+
+        imported += self._flush_import(batch, source)
+        return imported
+
+    def _flush_import(self, batch: list, source: str) -> int:
+        """Insère un lot d'import en regroupant les entrées par run."""
+        inserted = 0
+        by_run = {}
+        for entry, run_id in batch:
+            by_run.setdefault(run_id, []).append(entry)
+        for run_id, entries in by_run.items():
+            inserted += self.insert_entries(entries, run_id=run_id, source=source)
+        return inserted
+
+    def query(self, run_id: str = None, agent: str = None, action: str = None, status: str = None,
+              file_analyzed: str = None, since: str = None, until: str = None,
+              limit: int = None, with_texts: bool = False) -> List[Dict]:
+        """
+        Recherche des entrées sur les colonnes indexées.
+
+        Args:
+            run_id: Identifiant d'exécution
+            agent: Nom de l'agent (ex: "Fixer_Agent")
+            action: Type d'action (ex: "FIX")
+            status: "SUCCESS" ou "FAILURE"
+            file_analyzed: Nom du fichier analysé
+            since: Horodatage ISO minimal (inclus)
+            until: Horodatage ISO maximal (exclu)
+            limit: Nombre maximal d'entrées retournées
+            with_texts: Inclure les prompts et réponses
+
+        Returns:
+            List[Dict]: Entrées au format de log_experiment, dans l'ordre d'insertion
+        """
+        clauses = []
+        params = []
+        for column, value in (("run_id", run_id), ("agent", agent), ("action", action),
+                              ("status", status), ("file_analyzed", file_analyzed)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+
+        sql = "SELECT * FROM entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            return [self._rebuild_entry(row, with_texts) for row in rows]
+
+    def iter_entries(self, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[Dict]:
+        """
+        Parcourt toutes les entrées (textes inclus) dans l'ordre d'insertion, par lots.
+
+        Yields:
+            Dict: Entrée au format de log_experiment
+        """
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM entries WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+                ).fetchall()
+                entries = [self._rebuild_entry(row, True) for row in rows]
+            if not rows:
+                return
+            last_seq = rows[-1]["seq"]
+            yield from entries
+
+    def runs(self) -> List[Dict]:
+        """
+        Liste les exécutions connues.
+
+        Returns:
+            List[Dict]: run_id, nombre d'entrées, premier et dernier horodatage, échecs
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, COUNT(*) AS entries, MIN(timestamp) AS started, MAX(timestamp) AS ended, "
+                "SUM(status = 'FAILURE') AS failures FROM entries GROUP BY run_id ORDER BY MIN(seq)"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _split_entry(entry: Dict, run_id: str, source: str):
+        """Sépare une entrée en ligne indexée + textes volumineux."""
+        # Anciennes entrées sans id : identifiant déterministe, pour qu'un nouvel import ne les duplique pas
+        entry_id = entry.get("id") or str(uuid.uuid5(uuid.NAMESPACE_URL, entry_key(entry)))
+        details = entry.get("details", {})
+        texts = []
+
+        if isinstance(details, dict):
+            light_details = {k: v for k, v in details.items() if k not in TEXT_FIELDS}
+            for field in TEXT_FIELDS:
+                if field in details:
+                    # Les valeurs non textuelles (ex: référence de blob) sont stockées en JSON
+                    value = details[field]
+                    is_json = not isinstance(value, str)
+                    texts.append((entry_id, field, _as_text(value), int(is_json)))
+            file_analyzed = details.get("file_analyzed")
+            issues_found = details.get("issues_found")
+            if not isinstance(issues_found, int):
+                issues_found = None
+        else:
+            # Anciennes entrées : "details" était une simple chaîne
+            light_details = details
+            file_analyzed = None
+            issues_found = None
+
+        row = (
+            entry_id,
+            run_id,
+            entry.get("timestamp"),
+            entry.get("agent"),
+            entry.get("model"),
+            entry.get("action"),
+            entry.get("status"),
+            _as_text(file_analyzed) if file_analyzed is not None else None,
+            issues_found,
+            json.dumps(light_details, ensure_ascii=False),
+            source,
+        )
+        return row, texts
+
+    def _rebuild_entry(self, row: sqlite3.Row, with_texts: bool) -> Dict:
+        """Reconstitue une entrée au format de log_experiment (appelé sous verrou)."""
+        details = json.loads(row["details"]) if row["details"] is not None else {}
+
+        if with_texts and isinstance(details, dict):
+            for text_row in self._conn.execute(
+                "SELECT field, content, is_json FROM entry_texts WHERE entry_id = ?", (row["id"],)
+            ):
+                content = text_row["content"]
+                details[text_row["field"]] = json.loads(content) if text_row["is_json"] else content
+
+        return {
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "agent": row["agent"],
+            "model": row["model"],
+            "action": row["action"],
+            "details": details,
+            "status": row["status"],
+        }
+
+
+def _as_text(value) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def main():
+    """Point d'entrée CLI : import des logs JSON et requêtes sur la base."""
+    parser = argparse.ArgumentParser(description="Stockage SQLite indexé des logs d'expérience")
+    parser.add_argument("--db", type=str, default=SQLITE_LOG_FILE, help="Chemin de la base SQLite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Importe des fichiers de logs JSON/NDJSON")
+    import_parser.add_argument("paths", nargs="+", help="Fichiers de logs à importer")
+
+    query_parser = subparsers.add_parser("query", help="Recherche des entrées")
+    query_parser.add_argument("--run", dest="run_id", type=str)
+    query_parser.add_argument("--agent", type=str)
+    query_parser.add_argument("--action", type=str)
+    query_parser.add_argument("--status", type=str)
+    query_parser.add_argument("--file", dest="file_analyzed", type=str)
+    query_parser.add_argument("--since", type=str)
+    query_parser.add_argument("--until", type=str)
+    query_parser.add_argument("--limit", type=int, default=50)
+
+    subparsers.add_parser("runs", help="Liste les exécutions connues")
+
+    args = parser.parse_args()
+    store = ExperimentStore(args.db)
+
+    if args.command == "import":
+        for path in args.paths:
+            start = time.perf_counter()
+            imported = store.import_json_log(path)
+            print(f" {path} : {imported} entrée(s) importée(s) en {time.perf_counter() - start:.2f}s")
+
+    elif args.command == "query":
+        start = time.perf_counter()
+        entries = store.query(
+            run_id=args.run_id, agent=args.agent, action=args.action, status=args.status,
+            file_analyzed=args.file_analyzed, since=args.since, until=args.until, limit=args.limit
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for entry in entries:
+            details = entry["details"] if isinstance(entry["details"], dict) else {}
+            print(f" {entry['timestamp']}  {entry['agent']:<16} {entry['action']:<14} "
+                  f"{entry['status']:<8} {details.get('file_analyzed', '-')}")
+        print(f"\n {len(entries)} entrée(s) en {elapsed_ms:.1f} ms")
+
+    elif args.command == "runs":
+        for run in store.runs():
+            print(f" {run['run_id']:<50} {run['entries']:>5} entrée(s)  {run['failures'] or 0:>4} échec(s)  "
+                  f"{run['started']} → {run['ended']}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Lecture tolérante des réponses JSON des LLM
+Rôle : Extraire l'objet JSON d'une réponse entourée de prose ou de balises markdown et
+réparer localement les défauts courants (virgules finales, guillemets simples, littéraux
+Python, clés sans guillemets, tableaux tronqués) avant de conclure à un échec.
+"""
+
+import ast
+import json
+import re
+from typing import Any, Tuple
+
+_FENCED = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.S)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_LITERAL = re.compile(r"\b(True|False|None)\b")
+_UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_][\w-]*)(\s*:)")
+
+
+class JSONRepairError(ValueError):
+    """La réponse ne contient aucun JSON exploitable, même après réparation."""
+
+
+def extract_json(text: str) -> str:
+    """
+    Isole le premier objet (ou tableau) JSON d'un texte.
+
+    Args:
+        text: Réponse brute (prose, balises ```json...```)
+
+    Returns:
+        str: Texte JSON candidat (jusqu'à la fin du texte s'il est tronqué)
+
+    Raises:
+        JSONRepairError: Si le texte ne contient ni '{' ni '['
+    """
+    fenced = _FENCED.search(text)
+    if fenced and re.search(r"[{\[]", fenced.group(1)):
+        text = fenced.group(1)
+    elif text.lstrip().startswith("```"):
+        # Balise ouvrante sans fermeture (réponse tronquée)
+        text = text.lstrip()[3:].lstrip("jsonJSON")
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise JSONRepairError("Aucun objet JSON dans la réponse")
+    start = min(starts)
+
+    depth = 0
+    in_string = None
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == in_string:
+                in_string = None
+        elif ch in "\"'":
+            in_string = ch
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:].rstrip()
+
+
+def parse_json_lenient(text: str) -> Tuple[Any, bool]:
+    """
+    Parse une réponse JSON de LLM en la réparant si nécessaire.
+
+    Args:
+        text: Réponse brute
+
+    Returns:
+        Tuple: (données, True si une réparation a été nécessaire)
+
+    Raises:
+        JSONRepairError: Si aucune réparation ne produit de JSON valide
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise JSONRepairError("Réponse vide")
+
+    try:
+        return json.loads(text.strip()), False
+    except json.JSONDecodeError:
+        pass
+
+    candidate = extract_json(text)
+    try:
+        return json.loads(candidate), candidate.strip() != text.strip()
+    except json.JSONDecodeError:
+        pass
+
+    repaired = _fix_outside_strings(_close_truncated(_normalize_quotes(candidate)))
+    try:
+        return json.loads(repaired), True
+    except json.JSONDecodeError as e:
+        error = e
+
+    # Dernier recours : représentation Python d'un dict (guillemets simples, True/None...)
+    try:
+        data = ast.literal_eval(candidate)
+        if isinstance(data, (dict, list)):
+            return data, True
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+
+    raise JSONRepairError(f"JSON irréparable : {error}")
+
+
+def _normalize_quotes(text: str) -> str:
+    """Convertit les chaînes entre guillemets simples en chaînes JSON."""
+    out = []
+    in_string = None
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+                if ch == "'":
+                    out[-1] = "'"  # \' n'existe pas en JSON
+                else:
+                    out.append(ch)
+                continue
+            if ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch == in_string:
+                in_string = None
+                out.append('"')
+            elif ch == '"' and in_string == "'":
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+        elif ch in "\"'":
+            in_string = ch
+            out.append('"')
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _fix_outside_strings(text: str) -> str:
+    """Corrige virgules finales, littéraux Python et clés sans guillemets hors des chaînes."""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    for i in range(0, len(parts), 2):
+        segment = parts[i]
+        segment = _LITERAL.sub(lambda m: _PYTHON_LITERALS[m.group(1)], segment)
+        segment = _UNQUOTED_KEY.sub(r'\1"\2"\3', segment)
+        parts[i] = _TRAILING_COMMA.sub(r"\1", segment)
+    return "".join(parts)
+
+
+def _close_truncated(text: str) -> str:
+    """
+    Ferme un JSON tronqué : coupe après la dernière valeur complète et ajoute
+    les crochets/accolades manquants.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    last_safe = None
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack and stack[-1] == ch:
+                stack.pop()
+            last_safe = (i + 1, list(stack))
+        elif ch == ",":
+            last_safe = (i, list(stack))
+
+    if not stack and not in_string:
+        return text
+    if last_safe is None:
+        return text
+    cut, open_brackets = last_safe
+    return text[:cut] + "".join(reversed(open_brackets))
@@ -0,0 +1,189 @@
+"""
+Statistiques sur les logs d'expérience
+Rôle : Résumer les logs (appels, taux de succès, problèmes par itération, latences)
+pour identifier l'étape qui domine le temps d'exécution.
+
+Usage :
+    python -m src.utils.log_stats
+    python -m src.utils.log_stats "logs/She codes experiment_data_ historique.json" --json
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from src.utils.logger import entry_key, iter_log_entries, is_run_start
+
+# Percentiles de latence rapportés
+LATENCY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# Au-delà de cet écart (secondes) entre deux entrées, on considère une pause entre deux
+# exécutions mal délimitées plutôt qu'une latence d'appel
+MAX_GAP_S = 600
+
+
+def load_frame(paths: Iterable[str], max_gap_s: float = MAX_GAP_S) -> pd.DataFrame:
+    """
+    Construit un tableau colonne par colonne à partir des fichiers de logs.
+    Les fichiers sont lus en flux et seuls les champs scalaires sont conservés
+    (les prompts et réponses ne sont jamais gardés en mémoire).
+    Une entrée présente dans plusieurs fichiers (experiment_data.json exporté depuis le
+    journal .jsonl, par exemple) n'est comptée qu'une fois.
+
+    Args:
+        paths: Fichiers de logs (tableau JSON ou NDJSON)
+        max_gap_s: Écart maximal entre deux entrées compté comme latence
+
+    Returns:
+        pd.DataFrame: Une ligne par entrée, avec les colonnes run, iteration et latency_s
+    """
+    columns = {name: [] for name in (
+        "source", "run_start", "timestamp", "agent", "action", "status", "file_analyzed", "issues_found"
+    )}
+    seen = set()
+
+    for path in paths:
+        source = os.path.basename(path)
+        for entry in iter_log_entries(path):
+            if not isinstance(entry, dict):
+                continue
+            key = entry_key(entry)
+            if key in seen:
+                continue
+            seen.add(key)
+            details = entry.get("details")
+            if not isinstance(details, dict):
+                details = {}
+            issues_found = details.get("issues_found")
+
+            columns["source"].append(source)
+            columns["run_start"].append(is_run_start(entry))
+            columns["timestamp"].append(entry.get("timestamp"))
+            columns["agent"].append(entry.get("agent"))
+            columns["action"].append(entry.get("action"))
+            columns["status"].append(entry.get("status"))
+            columns["file_analyzed"].append(details.get("file_analyzed"))
+            columns["issues_found"].append(issues_found if isinstance(issues_found, (int, float)) else None)
+
+    frame = pd.DataFrame(columns)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], format="ISO8601", errors="coerce")
+    frame["issues_found"] = pd.to_numeric(frame["issues_found"], errors="coerce")
+
+    # Une exécution commence à chaque entrée "System" d'initialisation (par fichier source)
+    frame["run"] = frame["source"] + "#" + frame.groupby("source")["run_start"].cumsum().astype(str)
+
+    # Une itération commence quand l'Auditor reprend la main après un autre agent
+    is_auditor = frame["agent"] == "Auditor_Agent"
+    previous_agent = frame.groupby("run")["agent"].shift()
+    iteration_start = is_auditor & (previous_agent != "Auditor_Agent")
+    frame["iteration"] = iteration_start.astype(int).groupby(frame["run"]).cumsum()
+
+    # Latence attribuée à une entrée : temps écoulé depuis l'entrée précédente du même run
+    latency = frame.groupby("run")["timestamp"].diff().dt.total_seconds()
+    frame["latency_s"] = latency.where(latency <= max_gap_s)
+
+    return frame
+
+
+def calls_by_agent_action(frame: pd.DataFrame) -> pd.DataFrame:
+    """Nombre d'appels et taux de succès par (agent, action)."""
+    grouped = frame.assign(success=frame["status"] == "SUCCESS").groupby(["agent", "action"])
+    return grouped.agg(calls=("success", "size"), success_rate=("success", "mean")).sort_values(
+        "calls", ascending=False
+    )
+
+
+def issues_per_iteration(frame: pd.DataFrame) -> pd.DataFrame:
+    """Problèmes détectés par l'Auditor, agrégés par numéro d'itération sur l'ensemble des runs."""
+    audits = frame[(frame["agent"] == "Auditor_Agent") & (frame["iteration"] > 0)]
+    per_run = audits.groupby(["run", "iteration"])["issues_found"].sum()
+    return per_run.groupby(level="iteration").agg(["count", "mean", "sum", "max"]).rename(
+        columns={"count": "runs"}
+    )
+
+
+def latency_by_agent(frame: pd.DataFrame) -> pd.DataFrame:
+    """Percentiles de latence inter-entrées et part du temps total, par agent."""
+    timed = frame.dropna(subset=["latency_s"])
+    timed = timed[timed["latency_s"] >= 0]
+    grouped = timed.groupby("agent")["latency_s"]
+
+    stats = grouped.quantile(list(LATENCY_QUANTILES)).unstack()
+    stats.columns = [f"p{int(q * 100)}" for q in stats.columns]
+    stats["max"] = grouped.max()
+    stats["total_s"] = grouped.sum()
+    stats["share"] = stats["total_s"] / stats["total_s"].sum()
+    return stats.sort_values("total_s", ascending=False)
+
+
+def build_report(frame: pd.DataFrame) -> Dict:
+    """Rassemble toutes les statistiques dans un dictionnaire sérialisable."""
+    latency = latency_by_agent(frame)
+    return {
+        "entries": int(len(frame)),
+        "runs": int(frame["run"].nunique()),
+        "calls": _records(calls_by_agent_action(frame)),
+        "issues_per_iteration": _records(issues_per_iteration(frame)),
+        "latency": _records(latency),
+        "dominant_stage": latency.index[0] if len(latency) else None,
+    }
+
+
+def _records(table: pd.DataFrame) -> List[Dict]:
+    return json.loads(table.reset_index().to_json(orient="records"))
+
+
+def _default_paths() -> List[str]:
+    return sorted(glob.glob(os.path.join("logs", "*.json")) + glob.glob(os.path.join("logs", "*.jsonl")))
+
+
+def main():
+    """Point d'entrée CLI."""
+    parser = argparse.ArgumentParser(description="Statistiques sur les logs d'expérience")
+    parser.add_argument("paths", nargs="*", help="Fichiers de logs (défaut : logs/*.json et logs/*.jsonl)")
+    parser.add_argument("--json", action="store_true", help="Affiche le rapport au format JSON")
+    parser.add_argument("--max_gap", type=float, default=MAX_GAP_S,
+                        help=f"Écart max (s) entre deux entrées compté comme latence (défaut: {MAX_GAP_S})")
+    args = parser.parse_args()
+
+    paths = args.paths or _default_paths()
+    start = time.perf_counter()
+    frame = load_frame(paths, max_gap_s=args.max_gap)
+    load_time = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(build_report(frame), indent=4, ensure_ascii=False))
+        return
+
+    pd.set_option("display.width", 160)
+    pd.set_option("display.float_format", lambda value: f"{value:.3f}")
+
+    print("=" * 80)
+    print(f" {len(frame)} entrée(s), {frame['run'].nunique()} run(s), "
+          f"{len(paths)} fichier(s) chargé(s) en {load_time:.2f}s")
+    print("=" * 80)
+
+    print("\n APPELS PAR AGENT / ACTION")
+    print("-" * 80)
+    print(calls_by_agent_action(frame).to_string())
+
+    print("\n PROBLÈMES DÉTECTÉS PAR ITÉRATION (Auditor)")
+    print("-" * 80)
+    print(issues_per_iteration(frame).to_string())
+
+    latency = latency_by_agent(frame)
+    print("\n LATENCE INTER-ENTRÉES PAR AGENT (secondes)")
+    print("-" * 80)
+    print(latency.to_string())
+
+    if len(latency):
+        print(f"\n Étape dominante : {latency.index[0]} ({latency['share'].iloc[0]:.0%} du temps total)")
+
+
+if __name__ == "__main__":
+    main()
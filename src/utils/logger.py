@@ -1,12 +1,57 @@
+import atexit
 import json
 import os
+import queue
+import shutil
+import signal
+import sys
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum
 
+from src.llm.usage import consume_call_usage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 # Chemin du fichier de logs
 LOG_FILE = os.path.join("logs", "experiment_data.json")
 
+# Journal append-only : une entrée JSON par ligne (NDJSON)
+JSONL_LOG_FILE = os.path.join("logs", "experiment_data.jsonl")
+
+# Verrou inter-processus protégeant les écritures des fichiers de logs
+LOG_LOCK_FILE = os.path.join("logs", "experiment_data.lock")
+
+# Base SQLite indexée (optionnelle)
+SQLITE_LOG_FILE = os.path.join("logs", "experiment_data.sqlite")
+
+# Formats de stockage disponibles :
+# - "json"   : tableau JSON historique, relu et réécrit à chaque entrée (O(n))
+# - "jsonl"  : une ligne ajoutée par entrée, coût constant quelle que soit la taille (O(1))
+# - "sqlite" : base indexée (run, agent, action, statut, fichier, date), voir experiment_store
+LOG_FORMATS = ("json", "jsonl", "sqlite")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# Écriture en arrière-plan : taille de la file, taille des lots et délai max avant flush
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 0.5  # secondes
+
+# Writer d'arrière-plan actif (None = écriture synchrone)
+_background_writer = None
+
+# Identifiant de l'exécution courante (généré à la première demande)
+_run_id = None
+
+# Externalisation des textes volumineux dans logs/blobs (None = désactivée)
+_blob_store = None
+
 class ActionType(str, Enum):
     """
     Énumération des types d'actions possibles pour standardiser l'analyse.
@@ -58,6 +103,10 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
     # --- 3. PRÉPARATION DE L'ENTRÉE ---
     # Création du dossier logs s'il n'existe pas
     os.makedirs("logs", exist_ok=True)
+
+    # Tokens des appels LLM du thread depuis la dernière entrée (zéro si aucun appel)
+    if "token_usage" not in details:
+        details = {**details, "token_usage": consume_call_usage(details.get("file_analyzed"))}
     
     entry = {
         "id": str(uuid.uuid4()),  # ID unique pour éviter les doublons lors de la fusion des données
@@ -69,21 +118,593 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
         "status": status
     }
 
-    # --- 4. LECTURE & ÉCRITURE ROBUSTE ---
-    data = []
-    if os.path.exists(LOG_FILE):
+    # --- 4. ÉCRITURE (DIRECTE OU VIA LE WRITER D'ARRIÈRE-PLAN) ---
+    if _background_writer is not None:
+        _background_writer.submit(entry)
+    else:
+        _write_entries([entry])
+
+
+def get_run_id() -> str:
+    """
+    Retourne l'identifiant de l'exécution courante (un par processus).
+
+    Returns:
+        str: Identifiant du type "20260228-234652-1a2b3c".
+    """
+    global _run_id
+
+    if _run_id is None:
+        _run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    return _run_id
+
+
+class _FlushRequest:
+    """Marqueur déposé dans la file pour demander un flush (et éventuellement l'arrêt)."""
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class _BackgroundLogWriter:
+    """
+    Thread d'écriture des logs alimenté par une file bornée.
+    Les entrées sont regroupées en lots écrits dès que LOG_BATCH_SIZE entrées sont
+    en attente ou que la plus ancienne attend depuis LOG_FLUSH_INTERVAL secondes.
+    """
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: dict):
+        """Dépose une entrée ; ne bloque que si la file est pleine (contre-pression)."""
+        self._queue.put(entry)
+
+    def flush(self, stop: bool = False, timeout: float = 30.0) -> bool:
+        """Attend que toutes les entrées déposées avant l'appel soient écrites."""
+        if not self._thread.is_alive():
+            return True
+        request = _FlushRequest(stop=stop)
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def _run(self):
+        batch = []
+        oldest = None
+
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, oldest + self.flush_interval - time.monotonic())
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                batch = self._write(batch)
+                continue
+
+            if isinstance(item, _FlushRequest):
+                batch = self._write(batch)
+                item.done.set()
+                if item.stop:
+                    return
+                continue
+
+            if not batch:
+                oldest = time.monotonic()
+            batch.append(item)
+
+            if len(batch) >= self.batch_size:
+                batch = self._write(batch)
+
+    @staticmethod
+    def _write(batch: list) -> list:
+        if batch:
+            try:
+                _write_entries(batch)
+            except Exception as e:
+                print(f"⚠️ Attention : échec de l'écriture de {len(batch)} entrée(s) de logs : {str(e)}")
+        return []
+
+
+def flush_logs(timeout: float = 30.0) -> bool:
+    """
+    Force l'écriture des entrées en attente dans le writer d'arrière-plan.
+
+    Returns:
+        bool: True si toutes les entrées ont été écrites avant le timeout.
+    """
+    if _background_writer is None:
+        return True
+    return _background_writer.flush(timeout=timeout)
+
+
+def _shutdown_background_writer():
+    """Vide la file et arrête le writer (enregistré via atexit)."""
+    global _background_writer
+
+    writer = _background_writer
+    if writer is not None:
+        writer.flush(stop=True)
+        _background_writer = None
+
+
+def _install_signal_flush():
+    """
+    Vide les logs à la réception de SIGTERM/SIGHUP avant de laisser le processus se terminer.
+    SIGINT n'est pas intercepté : il devient un KeyboardInterrupt géré par main.py,
+    dont le sys.exit déclenche le flush via atexit.
+    Un signal ignoré (SIG_IGN, ex. SIGHUP sous nohup) reste ignoré : le flush atexit suffit.
+    """
+    for signame in ("SIGTERM", "SIGHUP"):
+        signum = getattr(signal, signame, None)
+        if signum is None:
+            continue
+
+        previous = signal.getsignal(signum)
+        if previous is signal.SIG_IGN:
+            continue
+
+        def handler(received, frame, previous=previous):
+            flush_logs()
+            if callable(previous):
+                previous(received, frame)
+            else:
+                sys.exit(128 + received)
+
         try:
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if content: # Vérifie que le fichier n'est pas juste vide
-                    data = json.loads(content)
-        except json.JSONDecodeError:
-            # Si le fichier est corrompu, on repart à zéro (ou on pourrait sauvegarder un backup)
-            print(f"⚠️ Attention : Le fichier de logs {LOG_FILE} était corrompu. Une nouvelle liste a été créée.")
-            data = []
-
-    data.append(entry)
-    
-    # Écriture
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+            signal.signal(signum, handler)
+        except ValueError:
+            # Hors du thread principal, impossible d'installer un handler
+            return
+
+
+def configure_logging(log_format: str = None, background: bool = None,
+                      batch_size: int = None, flush_interval: float = None, blobs: bool = None):
+    """
+    Configure le stockage des logs pour le processus courant.
+
+    Args:
+        log_format (str): "json" (tableau historique) ou "jsonl" (append-only).
+        background (bool): True pour écrire les logs depuis un thread dédié (par lots),
+            False pour revenir à l'écriture synchrone. None conserve le mode actuel.
+        batch_size (int): Nombre d'entrées déclenchant l'écriture d'un lot.
+        flush_interval (float): Délai maximal (secondes) avant l'écriture d'un lot.
+        blobs (bool): True pour stocker les prompts/réponses volumineux une seule fois dans
+            logs/blobs (compressés, adressés par hash) et ne garder que leur digest dans l'entrée.
+            Réservé aux formats jsonl et sqlite, dont l'export réintègre les textes.
+
+    Raises:
+        ValueError: Si le format demandé est inconnu, ou si les blobs sont demandés en format "json".
+    """
+    global LOG_FORMAT, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, _background_writer, _blob_store
+
+    if log_format is not None:
+        log_format = log_format.lower()
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"❌ Format de logs invalide : '{log_format}'. Formats disponibles : {LOG_FORMATS}")
+        LOG_FORMAT = log_format
+
+    if batch_size is not None:
+        LOG_BATCH_SIZE = batch_size
+    if flush_interval is not None:
+        LOG_FLUSH_INTERVAL = flush_interval
+
+    if blobs and LOG_FORMAT == "json":
+        # experiment_data.json est lu tel quel : ses prompts/réponses doivent rester des chaînes
+        raise ValueError("❌ Les blobs de logs nécessitent le format jsonl ou sqlite (exporté en JSON complet).")
+
+    if blobs is True and _blob_store is None:
+        from src.utils.blob_store import BlobStore
+        _blob_store = BlobStore()
+    elif blobs is False:
+        _blob_store = None
+
+    if LOG_FORMAT == "jsonl":
+        _seed_jsonl_from_json()
+    elif LOG_FORMAT == "sqlite":
+        _get_sqlite_store()
+
+    if background is True and _background_writer is None:
+        _background_writer = _BackgroundLogWriter(LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL)
+        atexit.register(_shutdown_background_writer)
+        _install_signal_flush()
+    elif background is False:
+        _shutdown_background_writer()
+
+
+def _write_entries(entries: list):
+    """Écrit un lot d'entrées selon le format configuré."""
+    if _blob_store is not None and LOG_FORMAT != "json":
+        # Hash + compression faits ici, donc dans le writer d'arrière-plan s'il est actif
+        entries = [
+            {**entry, "details": _blob_store.externalize(entry["details"])}
+            if isinstance(entry.get("details"), dict) else entry
+            for entry in entries
+        ]
+
+    if LOG_FORMAT == "jsonl":
+        _append_jsonl(entries)
+    elif LOG_FORMAT == "sqlite":
+        _get_sqlite_store().insert_entries(entries, run_id=get_run_id())
+    else:
+        _rewrite_json(entries)
+
+
+_sqlite_store = None
+
+
+def _get_sqlite_store():
+    """
+    Ouvre (une seule fois) la base SQLite et y importe les entrées du log historique qu'elle
+    ne contient pas encore (entrées écrites en format "json" depuis le dernier passage) :
+    l'export de fin d'exécution, qui réécrit le tableau depuis la base, n'en perd aucune.
+    """
+    global _sqlite_store
+
+    if _sqlite_store is None:
+        from src.utils.experiment_store import ExperimentStore
+
+        store = ExperimentStore(SQLITE_LOG_FILE)
+        if os.path.exists(LOG_FILE):
+            # Import idempotent : les entrées déjà présentes (même identifiant) sont ignorées
+            store.import_json_log(LOG_FILE)
+        _sqlite_store = store
+    return _sqlite_store
+
+
+# Verrou des threads du processus courant (le verrou fichier gère les autres processus)
+_thread_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(lock_path: str = LOG_LOCK_FILE):
+    """
+    Verrou exclusif partagé par tous les processus qui écrivent dans logs/.
+    Permet de lancer plusieurs swarms en parallèle sans perdre ni corrompre d'entrées.
+    """
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with _thread_lock, open(lock_path, 'a+b') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            import msvcrt  # pylint: disable=import-outside-toplevel
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK abandonne après ~10 s : on réessaie tant que le verrou est pris
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                import msvcrt  # pylint: disable=import-outside-toplevel
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _rewrite_json(entries: list):
+    """
+    Ajoute des entrées au tableau JSON historique (lecture + réécriture complète).
+    Le cycle lecture/écriture est fait sous verrou et le fichier est remplacé atomiquement.
+    """
+    with _file_lock():
+        data = []
+        if os.path.exists(LOG_FILE):
+            try:
+                with open(LOG_FILE, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+                    if content: # Vérifie que le fichier n'est pas juste vide
+                        data = json.loads(content)
+            except json.JSONDecodeError:
+                # Le fichier corrompu est conservé à part : aucune entrée n'est perdue
+                backup = f"{LOG_FILE}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+                os.replace(LOG_FILE, backup)
+                print(f"⚠️ Attention : Le fichier de logs {LOG_FILE} était corrompu. "
+                      f"Il a été sauvegardé dans {backup} et une nouvelle liste a été créée.")
+                data = []
+
+        data.extend(entries)
+
+        # Écriture dans un fichier temporaire puis remplacement atomique
+        tmp_path = f"{LOG_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, LOG_FILE)
+
+
+def _append_jsonl(entries: list):
+    """
+    Ajoute des entrées en fin de journal NDJSON en un seul write().
+    Le verrou évite l'entrelacement de lignes longues écrites par plusieurs processus.
+    """
+    lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    with _file_lock(), open(JSONL_LOG_FILE, 'a', encoding='utf-8') as f:
+        f.write(lines)
+
+
+def _seed_jsonl_from_json():
+    """
+    Reprend dans le journal NDJSON les entrées du tableau historique qu'il ne contient pas encore
+    (tout le tableau au premier passage, puis les entrées écrites depuis en format "json"),
+    afin que l'export vers le format JSON ne perde aucune entrée.
+    """
+    with _file_lock():
+        if not os.path.exists(LOG_FILE):
+            return
+
+        known = {entry_key(entry) for entry in iter_jsonl_entries(JSONL_LOG_FILE) if isinstance(entry, dict)}
+        tmp_path = f"{JSONL_LOG_FILE}.{os.getpid()}.tmp"
+        missing = 0
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in iter_json_array_entries(LOG_FILE):
+                    if isinstance(entry, dict) and entry_key(entry) in known:
+                        continue
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    missing += 1
+        except ValueError:
+            os.remove(tmp_path)
+            print(f"⚠️ Attention : {LOG_FILE} est corrompu, il ne sera pas repris dans {JSONL_LOG_FILE}.")
+            return
+
+        if missing:
+            with open(tmp_path, 'r', encoding='utf-8') as src, open(JSONL_LOG_FILE, 'a', encoding='utf-8') as dst:
+                shutil.copyfileobj(src, dst)
+        os.remove(tmp_path)
+
+
+def entry_key(entry: dict) -> str:
+    """
+    Identifiant stable d'une entrée de log, pour repérer une même entrée dans plusieurs stockages.
+
+    Args:
+        entry (dict): Entrée de log.
+
+    Returns:
+        str: Son id, ou à défaut (anciennes entrées) "horodatage|agent|action".
+    """
+    if entry.get("id"):
+        return str(entry["id"])
+    return f"{entry.get('timestamp')}|{entry.get('agent')}|{entry.get('action')}"
+
+
+def iter_jsonl_entries(jsonl_path: str = None):
+    """
+    Parcourt un journal NDJSON entrée par entrée, sans le charger en mémoire.
+
+    Args:
+        jsonl_path (str): Chemin du journal (défaut : JSONL_LOG_FILE).
+
+    Yields:
+        dict: Une entrée de log. Les lignes illisibles (écriture interrompue) sont ignorées.
+    """
+    jsonl_path = jsonl_path or JSONL_LOG_FILE
+    if not os.path.exists(jsonl_path):
+        return
+
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Ligne {line_number} illisible ignorée dans {jsonl_path}")
+
+
+def iter_json_array_entries(json_path: str, chunk_size: int = 1 << 16):
+    """
+    Parcourt un fichier contenant un tableau JSON d'entrées, en flux.
+    Seul le morceau en cours de décodage est gardé en mémoire, ce qui permet de lire
+    les historiques de plusieurs Mo sans charger tout le tableau.
+
+    Args:
+        json_path (str): Chemin du tableau JSON.
+        chunk_size (int): Taille des blocs lus sur le disque.
+
+    Yields:
+        dict: Une entrée du tableau.
+
+    Raises:
+        ValueError: Si le fichier n'est pas un tableau JSON valide.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        while True:
+            # Saute les séparateurs entre deux éléments
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+
+            if pos >= len(buffer):
+                if eof:
+                    if started:
+                        raise ValueError(f"❌ Tableau JSON non terminé dans {json_path}")
+                    return
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = chunk
+                pos = 0
+                continue
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"❌ {json_path} ne contient pas un tableau JSON")
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                return
+
+            try:
+                entry, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f"❌ Entrée JSON invalide dans {json_path} (position {pos})")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            yield entry
+            pos = end
+
+
+def iter_log_entries(path: str = None, rehydrate: bool = False):
+    """
+    Parcourt un fichier de logs (tableau JSON ou NDJSON) en flux.
+    Le format est déduit du contenu, pas de l'extension.
+
+    Args:
+        path (str): Chemin du fichier (défaut : le fichier du format configuré).
+        rehydrate (bool): Remplacer les références de blobs par les textes d'origine.
+
+    Yields:
+        dict: Une entrée de log.
+    """
+    if path is None:
+        path = JSONL_LOG_FILE if LOG_FORMAT == "jsonl" else LOG_FILE
+        flush_logs()
+
+    entries = iter_json_array_entries(path) if _is_json_array_file(path) else iter_jsonl_entries(path)
+    if rehydrate:
+        entries = rehydrate_entries(entries)
+    yield from entries
+
+
+def _is_json_array_file(path: str) -> bool:
+    """Indique si le fichier contient un tableau JSON (premier caractère significatif "[")."""
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                return False
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[0] == "["
+
+
+def rehydrate_entries(entries):
+    """
+    Remplace, entrée par entrée, les références de blobs par les textes d'origine.
+
+    Args:
+        entries: Itérable d'entrées de log.
+
+    Yields:
+        dict: Entrée avec ses prompts/réponses complets.
+    """
+    from src.utils.blob_store import BlobStore
+
+    store = _blob_store or BlobStore()
+    for entry in entries:
+        yield store.rehydrate(entry) if isinstance(entry, dict) else entry
+
+
+def is_run_start(entry: dict) -> bool:
+    """
+    Détecte l'entrée "System" qui marque le démarrage d'une exécution de main.py.
+
+    Args:
+        entry (dict): Entrée de log.
+
+    Returns:
+        bool: True si l'entrée ouvre une nouvelle exécution.
+    """
+    if entry.get("agent") != "System":
+        return False
+    if entry.get("action") == "STARTUP":
+        return True
+    details = entry.get("details")
+    return isinstance(details, dict) and str(details.get("input_prompt", "")).startswith("Initialisation")
+
+
+def write_json_array(entries, json_path: str) -> int:
+    """
+    Écrit des entrées en tableau JSON, en flux et de façon atomique (fichier temporaire + rename).
+    Le rendu est identique à json.dump(data, indent=4, ensure_ascii=False).
+
+    Args:
+        entries: Itérable d'entrées.
+        json_path (str): Fichier de sortie.
+
+    Returns:
+        int: Nombre d'entrées écrites.
+    """
+    os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+    tmp_path = f"{json_path}.{os.getpid()}.tmp"
+    count = 0
+
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write("[")
+        for entry in entries:
+            block = json.dumps(entry, indent=4, ensure_ascii=False)
+            out.write(",\n" if count else "\n")
+            out.write("\n".join("    " + line for line in block.splitlines()))
+            count += 1
+        out.write("\n]" if count else "]")
+
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def export_logs(json_path: str = None) -> int:
+    """
+    Régénère le tableau JSON historique depuis le stockage configuré (jsonl ou sqlite).
+    Sans effet en format "json", où le tableau est déjà la source de vérité.
+
+    Returns:
+        int: Nombre d'entrées exportées.
+    """
+    if LOG_FORMAT == "jsonl":
+        return export_jsonl_to_json(json_path=json_path)
+    if LOG_FORMAT == "sqlite":
+        flush_logs()
+        store = _get_sqlite_store()
+        with _file_lock():
+            return write_json_array(rehydrate_entries(store.iter_entries()), json_path or LOG_FILE)
+    return 0
+
+
+def export_jsonl_to_json(jsonl_path: str = None, json_path: str = None) -> int:
+    """
+    Convertit le journal NDJSON en tableau JSON (format historique attendu par les correcteurs).
+    La conversion est faite en flux : une seule entrée est en mémoire à la fois.
+    Les textes externalisés dans logs/blobs sont réintégrés.
+
+    Args:
+        jsonl_path (str): Journal source (défaut : JSONL_LOG_FILE).
+        json_path (str): Fichier de sortie (défaut : LOG_FILE).
+
+    Returns:
+        int: Nombre d'entrées exportées.
+    """
+    jsonl_path = jsonl_path or JSONL_LOG_FILE
+    json_path = json_path or LOG_FILE
+
+    # Les entrées encore en file doivent figurer dans l'export
+    flush_logs()
+
+    # Sous verrou : instantané cohérent du journal, même si d'autres processus y écrivent
+    with _file_lock():
+        return write_json_array(iter_log_entries(jsonl_path, rehydrate=True), json_path)
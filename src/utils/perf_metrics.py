@@ -0,0 +1,235 @@
+"""
+Métriques de performance d'une exécution du Swarm
+Rôle : Mesurer le temps par étape, les appels LLM, les sous-processus (pylint/pytest)
+et les entrées/sorties, puis écrire un résumé runs/<run_id>.json comparable d'un run à l'autre.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+# Dossier des résumés d'exécution
+RUNS_DIR = "runs"
+
+
+class RunMetrics:
+    """
+    Collecteur de métriques d'une exécution.
+    Thread-safe : les agents et outils peuvent enregistrer depuis plusieurs threads.
+    """
+
+    def __init__(self, run_id: str):
+        """
+        Args:
+            run_id: Identifiant de l'exécution (voir logger.get_run_id)
+        """
+        self.run_id = run_id
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._current_stage = None
+
+        self.stage_times = defaultdict(float)
+        self.stage_llm_calls = defaultdict(int)
+        self.llm_latencies = defaultdict(list)
+        self.llm_failures = defaultdict(int)
+        self.subprocess_times = defaultdict(list)
+        self.stream_ttft = defaultdict(list)
+        self.stream_rates = defaultdict(list)
+        self.stream_durations = defaultdict(list)
+        self.compression = defaultdict(lambda: {"prompts": 0, "tokens_before": 0, "tokens_after": 0})
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.counters = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mesure le temps mural d'une étape (audit, fix, generate, judge).
+        Les appels LLM effectués pendant l'étape lui sont attribués.
+        """
+        previous = self._current_stage
+        self._current_stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stage_times[name] += elapsed
+            self._current_stage = previous
+
+    def record_llm_call(self, agent: str, seconds: float, success: bool = True):
+        """Enregistre la durée d'un appel LLM pour un agent."""
+        with self._lock:
+            self.llm_latencies[agent].append(seconds)
+            if not success:
+                self.llm_failures[agent] += 1
+            if self._current_stage is not None:
+                self.stage_llm_calls[self._current_stage] += 1
+
+    def record_stream(self, agent: str, ttft_s: float, duration_s: float = None,
+                      tokens_per_s: float = None):
+        """Enregistre le temps jusqu'au premier token, la durée totale et le débit d'une réponse en streaming."""
+        with self._lock:
+            self.stream_ttft[agent].append(ttft_s)
+            if duration_s is not None:
+                self.stream_durations[agent].append(duration_s)
+            if tokens_per_s is not None:
+                self.stream_rates[agent].append(tokens_per_s)
+
+    def record_compression(self, agent: str, tokens_before: int, tokens_after: int):
+        """Enregistre la taille d'un prompt avant et après compression (tokens estimés)."""
+        with self._lock:
+            stats = self.compression[agent]
+            stats["prompts"] += 1
+            stats["tokens_before"] += tokens_before
+            stats["tokens_after"] += tokens_after
+
+    def record_subprocess(self, tool: str, seconds: float):
+        """Enregistre la durée d'un sous-processus (pylint, pytest, python)."""
+        with self._lock:
+            self.subprocess_times[tool].append(seconds)
+
+    def record_io(self, read: int = 0, written: int = 0):
+        """Comptabilise les octets lus et écrits par les outils de fichiers."""
+        with self._lock:
+            self.bytes_read += read
+            self.bytes_written += written
+
+    def increment(self, counter: str, amount: int = 1):
+        """Incrémente un compteur libre (ex: "llm_cache_hits")."""
+        with self._lock:
+            self.counters[counter] += amount
+
+    def summary(self) -> Dict:
+        """
+        Construit le résumé sérialisable de l'exécution.
+
+        Returns:
+            Dict: Temps par étape, latences LLM par agent, sous-processus et I/O
+        """
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "wall_time_s": round(time.perf_counter() - self._start, 3),
+                "stages": {
+                    name: {
+                        "wall_time_s": round(seconds, 3),
+                        "llm_calls": self.stage_llm_calls.get(name, 0),
+                    }
+                    for name, seconds in self.stage_times.items()
+                },
+                "llm": {
+                    "calls": sum(len(values) for values in self.llm_latencies.values()),
+                    "by_agent": {
+                        agent: {
+                            **_latency_stats(values),
+                            "failures": self.llm_failures.get(agent, 0),
+                        }
+                        for agent, values in self.llm_latencies.items()
+                    },
+                },
+                "streaming": {
+                    agent: {
+                        "ttft": _latency_stats(values),
+                        "duration": _latency_stats(self.stream_durations.get(agent, [])),
+                        "tokens_per_s_p50": (
+                            round(_percentile(sorted(self.stream_rates[agent]), 0.50), 1)
+                            if self.stream_rates.get(agent) else None
+                        ),
+                    }
+                    for agent, values in self.stream_ttft.items()
+                },
+                "prompt_compression": {
+                    agent: {
+                        **stats,
+                        "saved_pct": round(
+                            100.0 * (stats["tokens_before"] - stats["tokens_after"]) / stats["tokens_before"], 1
+                        ) if stats["tokens_before"] else 0.0,
+                    }
+                    for agent, stats in self.compression.items()
+                },
+                "subprocesses": {
+                    tool: _latency_stats(values) for tool, values in self.subprocess_times.items()
+                },
+                "io": {
+                    "bytes_read": self.bytes_read,
+                    "bytes_written": self.bytes_written,
+                },
+                "counters": dict(self.counters),
+            }
+
+    def write(self, directory: str = RUNS_DIR, extra: Dict = None) -> str:
+        """
+        Écrit le résumé dans <directory>/<run_id>.json.
+
+        Args:
+            directory: Dossier de sortie
+            extra: Informations complémentaires à inclure (résultat du run, paramètres...)
+
+        Returns:
+            str: Chemin du fichier écrit
+        """
+        data = self.summary()
+        if extra:
+            data.update(extra)
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        return path
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile par rang le plus proche sur une liste déjà triée."""
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _latency_stats(values: List[float]) -> Dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "total_s": round(sum(ordered), 3),
+        "p50_s": round(_percentile(ordered, 0.50), 3),
+        "p95_s": round(_percentile(ordered, 0.95), 3),
+        "max_s": round(ordered[-1], 3),
+    }
+
+
+_current_metrics = None
+
+
+def start_run_metrics(run_id: str) -> RunMetrics:
+    """
+    Démarre un nouveau collecteur pour l'exécution courante.
+
+    Args:
+        run_id: Identifiant de l'exécution
+
+    Returns:
+        RunMetrics: Collecteur actif
+    """
+    global _current_metrics
+    _current_metrics = RunMetrics(run_id)
+    return _current_metrics
+
+
+def get_run_metrics() -> RunMetrics:
+    """Retourne le collecteur actif (créé à la demande hors d'un run)."""
+    global _current_metrics
+    if _current_metrics is None:
+        from src.utils.logger import get_run_id
+        _current_metrics = RunMetrics(get_run_id())
+    return _current_metrics